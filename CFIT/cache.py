@@ -0,0 +1,136 @@
+"""
+Versioned result cache for expensive read endpoints (analytics, metrics, stats).
+
+Results are keyed by endpoint, normalized parameters and the current version
+of every model they read. Saving or deleting a tracked model bumps its
+version, so entries computed before the write are never read again and
+simply expire. A short lock makes concurrent misses for the same key wait
+for one computation instead of all running it.
+"""
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+_MISSING = object()
+
+
+class ResultCache:
+    VERSION_KEY = 'results:version:{}'
+    STATS_KEY = 'results:stats:{}:{}'
+
+    @staticmethod
+    def get_or_compute(namespace, params, compute, models, cacheable=None):
+        """
+        Return the cached result of compute() for (namespace, params) at the
+        current versions of `models`. Returns (value, outcome), where outcome
+        is 'hit', 'miss' or 'wait' (another request computed it meanwhile).
+        Results for which cacheable(value) is false are returned but not stored
+        """
+        key = ResultCache._key(namespace, params, models)
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value, ResultCache._count(namespace, 'hit')
+
+        lock_key = f'{key}:lock'
+        locked = cache.add(lock_key, 1, settings.RESULT_CACHE_LOCK_TIMEOUT)
+        if not locked:
+            # Someone else is computing this key; wait for their result and
+            # compute it ourselves only if they take too long
+            deadline = time.monotonic() + settings.RESULT_CACHE_LOCK_WAIT
+            while time.monotonic() < deadline:
+                time.sleep(0.05)
+                value = cache.get(key, _MISSING)
+                if value is not _MISSING:
+                    return value, ResultCache._count(namespace, 'wait')
+
+        try:
+            value = compute()
+            if cacheable is None or cacheable(value):
+                cache.set(key, value, settings.RESULT_CACHE_TIMEOUT)
+        finally:
+            if locked:
+                cache.delete(lock_key)
+        return value, ResultCache._count(namespace, 'miss')
+
+    @staticmethod
+    def stats(namespaces):
+        """Hit/miss/wait counters per namespace since the cache was last cleared"""
+        keys = {
+            ResultCache.STATS_KEY.format(namespace, outcome): (namespace, outcome)
+            for namespace in namespaces for outcome in ('hit', 'miss', 'wait')
+        }
+        counts = cache.get_many(list(keys))
+        stats = {namespace: {'hit': 0, 'miss': 0, 'wait': 0} for namespace in namespaces}
+        for key, (namespace, outcome) in keys.items():
+            stats[namespace][outcome] = counts.get(key, 0)
+        return stats
+
+    @staticmethod
+    def track(model, fields=None):
+        """
+        Bump `model`'s version whenever a row is saved or deleted. With
+        `fields`, saves whose update_fields miss all of them are ignored
+        """
+        label = model._meta.label_lower
+
+        def on_save(sender, instance, created, update_fields=None, raw=False, **kwargs):
+            if created or fields is None or update_fields is None or set(fields) & set(update_fields):
+                ResultCache.invalidate(label)
+
+        def on_delete(sender, instance, **kwargs):
+            ResultCache.invalidate(label)
+
+        # Weak references would drop these closures immediately
+        post_save.connect(on_save, sender=model, weak=False, dispatch_uid=f'results:{label}:save')
+        post_delete.connect(on_delete, sender=model, weak=False, dispatch_uid=f'results:{label}:delete')
+
+    @staticmethod
+    def invalidate(*labels):
+        """Bump the versions of the given model labels, now and once the current transaction commits"""
+        ResultCache._bump(labels)
+        transaction.on_commit(lambda: ResultCache._bump(labels))
+
+    @staticmethod
+    def version_stamp(models):
+        """Current versions of `models` as one string; it changes whenever any of them is written"""
+        labels = sorted(model._meta.label_lower for model in models)
+        version_keys = [ResultCache.VERSION_KEY.format(label) for label in labels]
+        versions = cache.get_many(version_keys)
+        missing = [key for key in version_keys if key not in versions]
+        for key in missing:
+            cache.add(key, 1, None)
+        if missing:
+            versions.update(cache.get_many(missing))
+        return '.'.join(str(versions.get(key, 1)) for key in version_keys)
+
+    @staticmethod
+    def _key(namespace, params, models):
+        params = json.dumps(params, sort_keys=True, default=str)
+        digest = hashlib.sha256(params.encode()).hexdigest()[:32]
+        return f'results:{namespace}:{ResultCache.version_stamp(models)}:{digest}'
+
+    @staticmethod
+    def _bump(labels):
+        for label in labels:
+            key = ResultCache.VERSION_KEY.format(label)
+            cache.add(key, 1, None)
+            try:
+                cache.incr(key)
+            except ValueError:
+                # Key evicted between add and incr; a fresh version is as good
+                cache.set(key, 1, None)
+
+    @staticmethod
+    def _count(namespace, outcome):
+        key = ResultCache.STATS_KEY.format(namespace, outcome)
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            pass
+        return outcome
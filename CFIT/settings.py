@@ -136,12 +136,21 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'users.User'
 
-# DISABLE CACHE FOR NOW
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+# CACHE: Redis when REDIS_URL is set, so invalidations reach every worker;
+# local memory otherwise (single process / development / tests)
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
     }
-}
 
 # DISABLE THROTTLING FOR NOW
 REST_FRAMEWORK = {
@@ -201,6 +210,77 @@ CELERY_TASK_ALWAYS_EAGER = True
 CELERY_TASK_EAGER_PROPAGATES = True
 CELERY_TASK_STORE_EAGER_RESULT = True
 
+# PERIODIC TASKS (synced into django_celery_beat by the DatabaseScheduler)
+CELERY_BEAT_SCHEDULE = {
+    'process-domain-events': {
+        'task': 'apps.notifications.tasks.process_domain_events',
+        'schedule': 30.0,
+    },
+    'drain-email-outbox': {
+        'task': 'apps.notifications.tasks.drain_email_outbox',
+        'schedule': 60.0,
+    },
+    'reconcile-unread-counters': {
+        'task': 'apps.notifications.tasks.reconcile_unread_counters',
+        'schedule': 60.0 * 60,
+    },
+    'purge-read-notifications': {
+        'task': 'apps.notifications.tasks.purge_read_notifications',
+        'schedule': 60.0 * 60 * 24,
+    },
+    'reconcile-daily-stats': {
+        'task': 'apps.reports.tasks.reconcile_daily_stats',
+        'schedule': 60.0 * 60 * 24,
+    },
+    'scan-sla-breaches': {
+        'task': 'apps.issues.tasks.scan_sla_breaches',
+        'schedule': 60.0 * 5,
+    },
+}
+
+# Resolution deadline per priority, from creation; an explicit due_date overrides it
+ISSUE_SLA_POLICY_HOURS = {
+    'critical': 4,
+    'high': 24,
+    'medium': 72,
+    'low': 168,
+}
+ISSUE_SLA_AT_RISK_HOURS = 24  # open issues due within this window count as at risk
+AUDIENCE_CACHE_TIMEOUT = 600  # seconds; role/active changes invalidate immediately
+NOTIFICATION_UNREAD_CACHE_TIMEOUT = 300  # seconds; entries are also invalidated on every change
+ANALYTICS_KPI_WORKERS = int(os.environ.get('ANALYTICS_KPI_WORKERS', 4))  # threads evaluating analytics blocks, 0 runs them in turn
+ANALYTICS_KPI_TIMEOUT = 20  # seconds before a slow analytics block is reported as timed out
+REPORT_RENDER_PROCESSES = int(os.environ.get('REPORT_RENDER_PROCESSES', 2))  # PDF render pool per worker, 0 renders inline
+REPORT_RENDER_TIMEOUT = 120  # seconds before a PDF render falls back to the plain-text version
+REPORT_STATUS_CACHE_TIMEOUT = 60 * 60  # seconds a report status snapshot is kept; misses reload from the DB
+REPORT_STATUS_POLL_INTERVAL = 0.5  # seconds between snapshot checks while long-polling or streaming
+REPORT_STATUS_MAX_WAIT = 10  # longest ?wait= on the status endpoint; each wait holds a worker, long waits belong on the stream
+REPORT_STATUS_STREAM_KEEPALIVE = 15  # seconds between keepalive comments on the status stream
+REPORT_TIMESERIES_MAX_PERIODS = 400  # buckets one timeseries request may return
+REPORT_EXPORT_CHUNK_SIZE = 2000  # rows fetched per round trip by the streaming issue export
+REPORT_DEDUP_IN_FLIGHT_TIMEOUT = 15 * 60  # seconds before an unfinished identical report stops being followed
+REPORT_DEDUP_REUSE_MAX_AGE = 60 * 60  # seconds a generated file may be reused by identical requests
+REPORT_DEDUP_LOCK_TIMEOUT = 10  # seconds identical requests wait for each other's dedupe decision
+RESULT_CACHE_TIMEOUT = 300  # seconds; writes to the underlying models invalidate sooner
+RESULT_CACHE_LOCK_TIMEOUT = 30  # seconds a computation may hold its key's lock
+RESULT_CACHE_LOCK_WAIT = 10  # seconds a concurrent miss waits before computing itself
+NOTIFICATION_COALESCE_WINDOW = int(os.environ.get('NOTIFICATION_COALESCE_WINDOW', 300))  # seconds, 0 disables
+
+# NOTIFICATION RETENTION (read notifications only, see purge_read_notifications)
+NOTIFICATION_RETENTION_DAYS = int(os.environ.get('NOTIFICATION_RETENTION_DAYS', 90))
+NOTIFICATION_RETENTION_ARCHIVE = os.environ.get('NOTIFICATION_RETENTION_ARCHIVE', 'False') == 'True'
+NOTIFICATION_RETENTION_CHUNK_SIZE = 1000
+NOTIFICATION_RETENTION_PAUSE = 0.5  # seconds between chunks
+
+# LIVE NOTIFICATIONS (SSE at /api/v1/notifications/stream/, needs an ASGI server)
+# Use 'apps.notifications.broker.RedisBroker' to share events between workers
+NOTIFICATIONS_BROKER = os.environ.get('NOTIFICATIONS_BROKER', 'apps.notifications.broker.InProcessBroker')
+NOTIFICATIONS_BROKER_OPTIONS = {}
+NOTIFICATIONS_BROKER_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/1')
+NOTIFICATIONS_STREAM_HISTORY = 100  # events kept per user for Last-Event-ID resume
+NOTIFICATIONS_STREAM_USERS = 10000  # users whose history the in-process broker keeps
+NOTIFICATIONS_STREAM_KEEPALIVE = 15  # seconds between keepalive comments
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media/'
 
@@ -212,7 +292,7 @@ MEDIA_DIRS =[
 for dir_path in MEDIA_DIRS:
     dir_path.mkdir(parents=True, exist_ok=True)
 
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
 EMAIL_HOST = os.environ.get('EMAIL_HOST', 'smtp.example.com')
 EMAIL_PORT = os.environ.get('EMAIL_PORT', 587)
 EMAIL_USE_TLS = True
@@ -220,3 +300,13 @@ EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = 'no-reply@example.com'
 
+# DOMAIN EVENTS (side effects of issue/comment/feedback writes, run after commit)
+DOMAIN_EVENTS_BATCH_SIZE = 100
+DOMAIN_EVENTS_MAX_ATTEMPTS = 5
+DOMAIN_EVENTS_RETRY_BACKOFF = 30  # seconds, doubled on every failed attempt
+
+# EMAIL OUTBOX (batched delivery with retry/backoff)
+EMAIL_OUTBOX_BATCH_SIZE = 100
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_BACKOFF = 60  # seconds, doubled on every failed attempt
+
@@ -86,8 +86,8 @@ from apps.issues.views import IssueHistoryViewSet, IssueViewSet
 from apps.comments.views import CommentViewSet
 from apps.feedback.views import FeedbackViewSet
 from apps.attachments.views import AttachmentViewSet
-from apps.notifications.views import NotificationViewSet
-from apps.reports.views import ReportViewSet
+from apps.notifications.views import NotificationViewSet, notification_stream
+from apps.reports.views import ReportViewSet, report_status_stream
 from apps.issues.views import IssueHistoryViewSet
 
 # Router
@@ -121,6 +121,9 @@ urlpatterns = [
     
     # Registration is now handled by /api/v1/users/register/
 
+    # Live notifications (SSE) - must precede the router's notification detail route
+    path('api/v1/notifications/stream/', notification_stream, name='notification-stream'),
+
     # Main API
     path('api/v1/', include(router.urls)),
 
@@ -141,9 +144,11 @@ urlpatterns = [
     path('api/v1/attachments/<uuid:pk>/download/', AttachmentViewSet.as_view({'get': 'download'}), name='attachment-download'),
     # Reports analytics endpoints
     path('api/v1/reports/analytics/', ReportViewSet.as_view({'get': 'analytics'}), name='report-analytics'),
+    path('api/v1/reports/timeseries/', ReportViewSet.as_view({'get': 'timeseries'}), name='report-timeseries'),
     path('api/v1/reports/metrics/', ReportViewSet.as_view({'get': 'metrics'}), name='report-metrics'),
     path('api/v1/reports/export/', ReportViewSet.as_view({'get': 'export'}), name='report-export'),
     path('api/v1/reports/<uuid:pk>/status/', ReportViewSet.as_view({'get': 'status'}), name='report-status'),
+    path('api/v1/reports/<uuid:pk>/stream/', report_status_stream, name='report-status-stream'),
     path('api/v1/reports/<uuid:pk>/download/', ReportViewSet.as_view({'get': 'download'}), name='report-download'),
 
 
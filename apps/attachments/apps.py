@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AttachmentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.attachments'
+
+    def ready(self):
+        import apps.attachments.signals
@@ -0,0 +1,5 @@
+from CFIT.cache import ResultCache
+from .models import Attachment
+
+# Attachment stats are cached until an attachment is saved or deleted
+ResultCache.track(Attachment)
@@ -9,6 +9,7 @@ from drf_spectacular.utils import extend_schema
 from PIL import Image
 import io
 
+from CFIT.cache import ResultCache
 from .models import Attachment
 from .serializers import AttachmentSerializer
 from rest_framework.authentication import TokenAuthentication, SessionAuthentication
@@ -176,7 +177,16 @@ class AttachmentViewSet(viewsets.ModelViewSet):
     # Get attachment stats
     @action(detail=False, methods=['get'], url_path='stats')
     def stats(self, request):
-        user = request.user
+        # Cached per user until an attachment is saved or deleted
+        stats, outcome = ResultCache.get_or_compute(
+            'attachment_stats', {'user': str(request.user.pk)},
+            lambda: self._compute_stats(request.user), models=[Attachment]
+        )
+        response = Response(stats)
+        response['X-Cache'] = outcome.upper()
+        return response
+
+    def _compute_stats(self, user):
         stats = {
             'total': Attachment.objects.count(),
             'total_size': sum(att.size for att in Attachment.objects.all()),
@@ -217,4 +227,4 @@ class AttachmentViewSet(viewsets.ModelViewSet):
         stats['total_size_formatted'] = format_size(stats['total_size'])
         stats['user_stats']['total_size_formatted'] = format_size(stats['user_stats']['total_size'])
         
-        return Response(stats)
\ No newline at end of file
+        return stats
\ No newline at end of file
@@ -1,8 +1,13 @@
 from .models import Comment
 from rest_framework.exceptions import PermissionDenied
-from apps.notifications.services import NotificationService
+from apps.notifications.events import record_event
 from apps.users.models import User
 from apps.attachments.models import Attachment
+from apps.issues.models import Issue
+from CFIT.cache import ResultCache
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Length, Lower
 import re
 
 class CommentService:
@@ -11,55 +16,79 @@ class CommentService:
         # Extract attachments from data if present (now called attachments_ids)
         attachment_ids = data.pop('attachments_ids', []) or data.pop('attachments', [])
         
-        new_comment = Comment.objects.create(
-            author=user,
-            issue=issue,
-            **data
-        )
-        
-        # Link attachments to comment if provided
-        if attachment_ids:
-            Attachment.objects.filter(id__in=attachment_ids).update(comment=new_comment)
-        
-        # Check mentions @username or @email
+        # Check mentions @username or @email; they are resolved after commit
         content = data.get('content', '')
         mentions = re.findall(r'@([\w.-]+@[\w.-]+\.\w+|[\w.-]+)', content)
         
-        for mention in mentions:
-            try:
-                # Try to find user by email or username
-                if '@' in mention:
-                    mentioned_user = User.objects.get(email__iexact=mention)
-                else:
-                    # Try email contains or username
-                    mentioned_user = User.objects.filter(
-                        email__icontains=mention
-                    ).first()
-                
-                if mentioned_user and mentioned_user != user:
-                    NotificationService.create_notification(
-                        recipient=mentioned_user,
-                        message=f'You were mentioned in a comment on issue {issue.title}',
-                        type='mention',
-                        issue=issue,
-                    )
-            except User.DoesNotExist:
-                pass
-            except Exception as e:
-                # Log error but don't fail comment creation
-                print(f"Error processing mention {mention}: {e}")
-        
-        # Notify assignee if different from commenter
-        if issue.assignee and issue.assignee != user:
-            NotificationService.create_notification(
-                recipient=issue.assignee,
-                message=f'New comment on issue {issue.title}',
-                type='comment',
+        with transaction.atomic():
+            new_comment = Comment.objects.create(
+                author=user,
                 issue=issue,
+                **data
+            )
+            
+            # Link attachments to comment if provided
+            if attachment_ids:
+                Attachment.objects.filter(id__in=attachment_ids).update(comment=new_comment)
+            
+            # First reply from anyone but the reporter; conditional so concurrent comments can't overwrite it
+            if user.id != issue.reporter_id:
+                stamped = Issue.objects.filter(pk=issue.pk, first_response_at__isnull=True).update(
+                    first_response_at=new_comment.created_at
+                )
+                if stamped:
+                    # update() skips post_save, so cached analytics would not notice
+                    ResultCache.invalidate(Issue._meta.label_lower)
+            
+            # Mentioned users and the assignee are notified after commit
+            record_event(
+                'comment.created',
+                comment_id=new_comment.id,
+                issue_id=issue.id,
+                author_id=user.id,
+                mentions=mentions
             )
         
         return new_comment
     
+    @staticmethod
+    def resolve_mentions(mentions, memo=None):
+        """
+        Resolve @mentions to users with a single query. Full emails match
+        case-insensitively; bare names match a user's handle exactly, then as
+        a prefix, preferring the shortest handle and then the email so the
+        same text always resolves to the same user.
+        Returns {mention: user or None}. `memo` is an optional dict reused
+        across calls within one request.
+        """
+        memo = {} if memo is None else memo
+        pending = {m.lower() for m in mentions} - memo.keys()
+
+        if pending:
+            emails = [m for m in pending if '@' in m]
+            names = [m for m in pending if '@' not in m]
+
+            lookup = Q(email_lower__in=emails) | Q(handle__in=names)
+            for name in names:
+                lookup |= Q(handle__startswith=name)
+            candidates = list(
+                User.objects.annotate(email_lower=Lower('email'))
+                .filter(lookup)
+                .order_by(Length('handle'), 'email')
+            )
+
+            for mention in pending:
+                if '@' in mention:
+                    matches = [u for u in candidates if u.email_lower == mention]
+                else:
+                    matches = (
+                        [u for u in candidates if u.handle == mention]
+                        or [u for u in candidates if u.handle.startswith(mention)]
+                    )
+                memo[mention] = matches[0] if matches else None
+
+        return {m: memo[m.lower()] for m in mentions}
+
     @staticmethod
     def update_comment(comment, data, user):
         if comment.author != user:
@@ -1,6 +1,11 @@
 from django.test import TestCase
 from apps.issues.models import Issue
 from django.contrib.auth import get_user_model
+from apps.notifications.models import Notification
+from .services import CommentService
+from apps.notifications.tasks import process_domain_events
+from unittest.mock import patch
+from CFIT.cache import ResultCache
 
 User = get_user_model()
 
@@ -28,3 +33,70 @@ class CommentTests(TestCase):
             {'content': 'Test comment'}
         )
         
+
+
+class MentionResolutionTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(email='author@example.com', password='password', role='staff')
+        self.jane = User.objects.create_user(email='Jane@example.com', password='password', role='staff')
+        self.john = User.objects.create_user(email='john.smith@example.com', password='password', role='staff')
+        self.johnny = User.objects.create_user(email='johnny@example.com', password='password', role='staff')
+        self.issue = Issue.objects.create(
+            title='Mention Issue',
+            description='Description',
+            reporter=self.author,
+            created_by=self.author
+        )
+
+    def test_mentions_resolve_in_one_query(self):
+        with self.assertNumQueries(1):
+            resolved = CommentService.resolve_mentions(['jane@EXAMPLE.com', 'johnny', 'john', 'nobody', 'jane'])
+
+        self.assertEqual(resolved['jane@EXAMPLE.com'], self.jane)
+        self.assertEqual(resolved['johnny'], self.johnny)
+        # Partial handles pick the shortest matching handle
+        self.assertEqual(resolved['john'], self.johnny)
+        self.assertEqual(resolved['jane'], self.jane)
+        self.assertIsNone(resolved['nobody'])
+
+    def test_memo_is_reused(self):
+        memo = {}
+        CommentService.resolve_mentions(['jane'], memo=memo)
+        with self.assertNumQueries(0):
+            self.assertEqual(CommentService.resolve_mentions(['JANE'], memo=memo)['JANE'], self.jane)
+
+    def test_comment_notifies_mentioned_users_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            CommentService.create_comment(
+                self.author, self.issue,
+                {'content': '@jane and @john.smith@example.com, also @jane again and @author'}
+            )
+
+        mentions = Notification.objects.filter(type='mention', issue=self.issue)
+        self.assertCountEqual(mentions.values_list('recipient', flat=True), [self.jane.id, self.john.id])
+
+    def test_first_response_is_first_comment_by_someone_else(self):
+        CommentService.create_comment(self.author, self.issue, {'content': 'Reporter bump'})
+        self.issue.refresh_from_db()
+        self.assertIsNone(self.issue.first_response_at)
+
+        version = ResultCache.version_stamp([Issue])
+        reply = CommentService.create_comment(self.jane, self.issue, {'content': 'On it'})
+        # Cached analytics (first response KPIs) see the stamp
+        self.assertNotEqual(ResultCache.version_stamp([Issue]), version)
+        CommentService.create_comment(self.john, self.issue, {'content': 'Me too'})
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.first_response_at, reply.created_at)
+
+    def test_mentions_are_memoised_across_one_event_run(self):
+        # Both comments' events are handled by the same processing run
+        with self.captureOnCommitCallbacks(execute=False):
+            CommentService.create_comment(self.author, self.issue, {'content': 'Ping @jane'})
+            CommentService.create_comment(self.author, self.issue, {'content': 'Again @jane'})
+
+        with patch.object(CommentService, 'resolve_mentions', wraps=CommentService.resolve_mentions) as resolve:
+            process_domain_events()
+        first_memo, second_memo = (call.kwargs['memo'] for call in resolve.call_args_list)
+        self.assertIs(first_memo, second_memo)
+        self.assertEqual(first_memo['jane'], self.jane)
+        self.assertEqual(Notification.objects.filter(type='mention', recipient=self.jane).count(), 2)
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:33
+
+from django.db import migrations, models
+from django.db.models import F, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_lifecycle_timestamps(apps, schema_editor):
+    Issue = apps.get_model('issues', 'Issue')
+    IssueHistory = apps.get_model('issues', 'IssueHistory')
+    Comment = apps.get_model('comments', 'Comment')
+
+    def last_transition(statuses):
+        return Subquery(
+            IssueHistory.objects.filter(issue=OuterRef('pk'), new_status__in=statuses)
+            .order_by('-timestamp').values('timestamp')[:1]
+        )
+
+    # Closing without a separate resolve step counts as resolution; issues
+    # with no history fall back to their last update
+    Issue.objects.filter(status__in=['resolved', 'closed']).update(
+        resolved_at=Coalesce(last_transition(['resolved']), last_transition(['closed']), F('updated_at'))
+    )
+    Issue.objects.filter(status='closed').update(
+        closed_at=Coalesce(last_transition(['closed']), F('updated_at'))
+    )
+
+    # First comment by anyone other than the reporter
+    Issue.objects.update(
+        first_response_at=Subquery(
+            Comment.objects.filter(issue=OuterRef('pk'))
+            .exclude(author=OuterRef('reporter'))
+            .order_by().values('issue').annotate(first=Min('created_at')).values('first')
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0006_remove_comment_visibility'),
+        ('issues', '0005_alter_issue_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issue',
+            name='closed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='issue',
+            name='first_response_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='issue',
+            name='resolved_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_lifecycle_timestamps, migrations.RunPython.noop),
+    ]
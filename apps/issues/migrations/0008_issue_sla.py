@@ -0,0 +1,54 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:05
+
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_sla(apps, schema_editor):
+    # Mirrors Issue.refresh_sla, which historical models do not have
+    Issue = apps.get_model('issues', 'Issue')
+    now = timezone.now()
+    batch = []
+    for issue in Issue.objects.only('priority', 'due_date', 'status', 'created_at', 'resolved_at', 'closed_at').iterator(chunk_size=1000):
+        if issue.due_date:
+            due = timezone.make_aware(datetime.combine(issue.due_date, time.max))
+        else:
+            hours = settings.ISSUE_SLA_POLICY_HOURS.get(issue.priority)
+            due = issue.created_at + timedelta(hours=hours) if hours else None
+        finished = now if issue.status in ('open', 'in_progress') else issue.resolved_at or issue.closed_at
+        issue.sla_due_at = due
+        issue.sla_breached_at = due if due and finished and finished > due else None
+        batch.append(issue)
+        if len(batch) == 1000:
+            Issue.objects.bulk_update(batch, ['sla_due_at', 'sla_breached_at'])
+            batch = []
+    Issue.objects.bulk_update(batch, ['sla_due_at', 'sla_breached_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issues', '0007_issue_created_at_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issue',
+            name='sla_breached_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='issue',
+            name='sla_due_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(condition=models.Q(('status__in', ['open', 'in_progress'])), fields=['sla_due_at'], name='issue_open_sla_due_idx'),
+        ),
+        migrations.RunPython(backfill_sla, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from apps.users.models import User
+from datetime import datetime, time, timedelta
 import uuid
 
 class Issue(models.Model):
@@ -32,9 +34,61 @@ class Issue(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Lifecycle timestamps for reporting, maintained by IssueService and CommentService
+    resolved_at = models.DateTimeField(null=True, blank=True)
+    closed_at = models.DateTimeField(null=True, blank=True)
+    first_response_at = models.DateTimeField(null=True, blank=True)
+    # SLA deadline from ISSUE_SLA_POLICY_HOURS (or the end of due_date) and the
+    # moment it was missed; kept current on save and by the breach scanner
+    sla_due_at = models.DateTimeField(null=True, blank=True)
+    sla_breached_at = models.DateTimeField(null=True, blank=True)
+
+    OPEN_STATUSES = ['open', 'in_progress']
+    SLA_FIELDS = {'priority', 'due_date', 'status', 'resolved_at'}
+
+    class Meta:
+        indexes = [
+            # Date-range scans for the analytics KPIs not served by the daily rollup
+            models.Index(fields=['created_at']),
+            # Breach scanner and at-risk lists only look at open issues
+            models.Index(
+                fields=['sla_due_at'],
+                condition=models.Q(status__in=['open', 'in_progress']),
+                name='issue_open_sla_due_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"Issue: {self.title}"
+
+    def save(self, *args, **kwargs):
+        self.refresh_sla()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and self.SLA_FIELDS & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'sla_due_at', 'sla_breached_at'}
+        super().save(*args, **kwargs)
+
+    def refresh_sla(self):
+        """Recompute sla_due_at and sla_breached_at from priority, due date and status"""
+        if self.due_date:
+            due = timezone.make_aware(datetime.combine(self.due_date, time.max))
+        else:
+            hours = settings.ISSUE_SLA_POLICY_HOURS.get(self.priority)
+            due = (self.created_at or timezone.now()) + timedelta(hours=hours) if hours else None
+        self.sla_due_at = due
+
+        # Breached at the deadline if still open past it, or resolved after it
+        if self.status in self.OPEN_STATUSES:
+            finished = timezone.now()
+        else:
+            finished = self.resolved_at or self.closed_at
+            if finished is None:
+                # Done without a resolution time (legacy rows, direct status
+                # saves): a recorded breach cannot be disproved, so keep it
+                if not (due and self.sla_breached_at):
+                    self.sla_breached_at = None
+                return
+        self.sla_breached_at = due if due and finished > due else None
    
 
 class IssueHistory(models.Model):
@@ -19,7 +19,9 @@ class IssueSerializer(serializers.ModelSerializer):
             'updated_at',
             'reporter',
             'created_by',  'reporter_email',
-            'assignee_email', 'created_by_email'
+            'assignee_email', 'created_by_email',
+            'resolved_at', 'closed_at', 'first_response_at',
+            'sla_due_at', 'sla_breached_at'
         )
 
 
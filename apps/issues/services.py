@@ -174,138 +174,169 @@ class IssueService:
         
         return issue# apps/issues/services.py
 from .models import Issue, IssueHistory
-from apps.notifications.services import NotificationService
+from apps.notifications.events import record_event
+from CFIT.cache import ResultCache
+from datetime import timedelta
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
 
 User = get_user_model()
 
 class IssueService:
     @staticmethod
     def create_issue(user, data):
-        """Create issue and notify managers/admins"""
+        """Create issue; managers/admins and the reporter are notified after commit"""
         data['reporter'] = user
         data['created_by'] = user
-        issue = Issue.objects.create(**data)
-        
-        # Create history
-        IssueHistory.objects.create(
-            issue=issue, 
-            changed_by=user,
-            old_status='',
-            new_status='open'
-        )
-        
-        # NOTIFY MANAGERS AND ADMINS ABOUT NEW ISSUE
-        managers_admins = User.objects.filter(
-            role__in=['manager', 'admin'], 
-            is_active=True
-        ).exclude(id=user.id)  # Don't notify the creator if they're manager/admin
-        
-        for manager_admin in managers_admins:
-            NotificationService.create_notification(
-                recipient=manager_admin,
-                message=f'New issue created: "{issue.title}" by {user.email}',
-                type='new_issue',  
-                issue=issue
+        with transaction.atomic():
+            issue = Issue.objects.create(**data)
+            
+            # Create history
+            IssueHistory.objects.create(
+                issue=issue, 
+                changed_by=user,
+                old_status='',
+                new_status='open'
             )
-        
-        # NOTIFY CLIENT (reporter) that their issue was created
-        NotificationService.create_notification(
-            recipient=user,
-            message=f'Your issue "{issue.title}" has been created successfully',
-            type='status_change',
-            issue=issue
-        )
+            
+            record_event('issue.created', issue_id=issue.id, user_id=user.id)
         
         return issue
     
     @staticmethod
     def assign_issue(issue, assignee, changed_by):
-        """Assign issue and notify assignee"""
+        """Assign issue; the assignee and reporter are notified after commit"""
         old_assignee = issue.assignee
-        issue.assignee = assignee
-        issue.save()
-        
-        # Notify new assignee
-        if old_assignee != assignee:
-            NotificationService.create_notification(
-                recipient=assignee,
-                message=f'You have been assigned to issue: "{issue.title}"',
-                type='new_issue',
-                issue=issue
-            )
+        with transaction.atomic():
+            issue.assignee = assignee
+            issue.save()
             
-            # Also notify reporter that issue was assigned
-            if issue.reporter and issue.reporter != assignee:
-                NotificationService.create_notification(
-                    recipient=issue.reporter,
-                    message=f'Your issue "{issue.title}" has been assigned to {assignee.email}',
-                    type='new_issue',
-                    issue=issue
+            if old_assignee != assignee:
+                record_event(
+                    'issue.assigned',
+                    issue_id=issue.id,
+                    assignee_id=assignee.id,
+                    changed_by_id=changed_by.id
                 )
         
         return issue
     
     @staticmethod
     def transition_status(issue, new_status, changed_by):
-        """Change issue status and notify relevant parties"""
+        """Change issue status; relevant parties are notified after commit"""
         old_status = issue.status
         
         if old_status != new_status:
-            issue.status = new_status
-            issue.save()
-            
-            # Create history
-            IssueHistory.objects.create(
-                issue=issue,
-                changed_by=changed_by,
-                old_status=old_status,
-                new_status=new_status
-            )
-            
-            # IMPORTANT NOTIFICATIONS FOR STATUS CHANGES
-            
-            # 1. Notify assignee (if exists)
-            if issue.assignee and issue.assignee != changed_by:
-                NotificationService.create_notification(
-                    recipient=issue.assignee,
-                    message=f'Issue "{issue.title}" status changed from {old_status} to {new_status}',
-                    type='status_change',
-                    issue=issue
-                )
-            
-            # 2. Notify reporter (client) about status changes
-            if issue.reporter and issue.reporter != changed_by:
-                NotificationService.create_notification(
-                    recipient=issue.reporter,
-                    message=f'Your issue "{issue.title}" status changed from {old_status} to {new_status}',
-                    type='status_change',
-                    issue=issue
+            with transaction.atomic():
+                issue.status = new_status
+                IssueService._stamp_lifecycle(issue, old_status, new_status)
+                issue.save()
+                
+                # Create history
+                IssueHistory.objects.create(
+                    issue=issue,
+                    changed_by=changed_by,
+                    old_status=old_status,
+                    new_status=new_status
                 )
-            
-            # 3. Notify managers/admins for critical status changes
-            if new_status in ['resolved', 'closed']:
-                managers_admins = User.objects.filter(
-                    role__in=['manager', 'admin'], 
-                    is_active=True
-                ).exclude(id=changed_by.id)  # Don't notify the person making change
                 
-                for manager_admin in managers_admins:
-                    NotificationService.create_notification(
-                        recipient=manager_admin,
-                        message=f'Issue "{issue.title}" marked as {new_status} by {changed_by.email}',
-                        type='status_change',
-                        issue=issue
-                    )
-            
-            # 4. Special notification for client when resolved/closed
-            if new_status in ['resolved', 'closed'] and issue.reporter:
-                action = "resolved" if new_status == 'resolved' else "closed"
-                NotificationService.create_notification(
-                    recipient=issue.reporter,
-                    message=f'Great news! Your issue "{issue.title}" has been {action}',
-                    type='status_change',
-                    issue=issue
+                record_event(
+                    'issue.status_changed',
+                    issue_id=issue.id,
+                    old_status=old_status,
+                    new_status=new_status,
+                    changed_by_id=changed_by.id
                 )
         
-        return issue
\ No newline at end of file
+        return issue
+    
+    @staticmethod
+    def _stamp_lifecycle(issue, old_status, new_status):
+        """Keep resolved_at/closed_at in step with a status change"""
+        now = timezone.now()
+        done = ['resolved', 'closed']
+        
+        if new_status in done and old_status not in done:
+            issue.resolved_at = now
+        if new_status == 'closed':
+            issue.closed_at = now
+        elif new_status == 'resolved':
+            issue.closed_at = None
+        else:
+            # Reopened: the next resolution starts a new measurement
+            issue.resolved_at = None
+            issue.closed_at = None
+
+
+class SlaService:
+    """
+    SLA deadlines live on the issue (Issue.refresh_sla keeps them current on
+    save); these helpers scan and summarise them in SQL. Open-issue queries
+    are served by the partial index on sla_due_at
+    """
+    @staticmethod
+    def scan_breaches(now=None):
+        """Mark open issues whose deadline passed since the last scan; returns how many"""
+        now = now or timezone.now()
+        breached = Issue.objects.filter(
+            status__in=Issue.OPEN_STATUSES, sla_due_at__lte=now, sla_breached_at__isnull=True
+        ).update(sla_breached_at=F('sla_due_at'))
+        if breached:
+            # update() skips post_save, so cached analytics would not notice
+            ResultCache.invalidate(Issue._meta.label_lower)
+        return breached
+    
+    @staticmethod
+    def due_soon(now=None):
+        """Issues past their deadline or due within ISSUE_SLA_AT_RISK_HOURS"""
+        now = now or timezone.now()
+        return Q(sla_due_at__lte=now + timedelta(hours=settings.ISSUE_SLA_AT_RISK_HOURS))
+    
+    @staticmethod
+    def summary(issues_qs, now=None):
+        """
+        Compliance, breached and at-risk counts in one aggregate. Open issues
+        past their deadline count as breached even before the scanner runs
+        """
+        now = now or timezone.now()
+        is_open = Q(status__in=Issue.OPEN_STATUSES)
+        breached = Q(sla_breached_at__isnull=False) | (is_open & Q(sla_due_at__lte=now))
+        counts = issues_qs.filter(sla_due_at__isnull=False).order_by().aggregate(
+            total=Count('id'),
+            breached=Count('id', filter=breached),
+            open_breached=Count('id', filter=is_open & breached),
+            at_risk=Count('id', filter=is_open & ~breached & SlaService.due_soon(now)),
+        )
+        compliance = 100.0
+        if counts['total']:
+            compliance = round((counts['total'] - counts['breached']) / counts['total'] * 100, 1)
+        return {
+            'compliance': compliance,
+            'breached': counts['open_breached'],
+            'at_risk': counts['at_risk'],
+        }
+    
+    @staticmethod
+    def attention(issues_qs, limit=10, now=None):
+        """Open issues that are breached or at risk, soonest deadline first"""
+        now = now or timezone.now()
+        rows = (
+            issues_qs.filter(SlaService.due_soon(now), status__in=Issue.OPEN_STATUSES)
+            .order_by('sla_due_at')
+            .values('id', 'title', 'priority', 'status', 'assignee__email', 'sla_due_at')[:limit]
+        )
+        return [
+            {
+                'id': str(row['id']),
+                'title': row['title'],
+                'priority': row['priority'],
+                'status': row['status'],
+                'assignee_email': row['assignee__email'],
+                'sla_due_at': row['sla_due_at'].isoformat(),
+                'breached': row['sla_due_at'] <= now,
+            }
+            for row in rows
+        ]
@@ -0,0 +1,15 @@
+from celery import shared_task
+import logging
+
+from .services import SlaService
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def scan_sla_breaches():
+    """Record SLA breaches for open issues whose deadline has passed"""
+    breached = SlaService.scan_breaches()
+    if breached:
+        logger.info("Marked %s issues as SLA breached", breached)
+    return breached
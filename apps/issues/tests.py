@@ -1,7 +1,11 @@
 from django.test import TestCase
 from rest_framework.test import APIClient
 from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
 from .models import Issue
+from .services import IssueService, SlaService
+from .tasks import scan_sla_breaches
 from apps.users.models import User
 
 
@@ -31,4 +35,98 @@ class IssueTests(TestCase):
 
         # Verify the issue was actually created and linked to the logged-in user
         issue = Issue.objects.get(title='Test Issue')
-        self.assertEqual(issue.reporter, self.user)
\ No newline at end of file
+        self.assertEqual(issue.reporter, self.user)
+
+
+class IssueLifecycleTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='staff@example.com', password='password', role='staff')
+        self.issue = IssueService.create_issue(self.user, {'title': 'Lifecycle', 'description': 'Desc'})
+
+    def test_transitions_stamp_resolved_and_closed(self):
+        IssueService.transition_status(self.issue, 'resolved', self.user)
+        resolved_at = self.issue.resolved_at
+        self.assertIsNotNone(resolved_at)
+        self.assertIsNone(self.issue.closed_at)
+
+        # Closing keeps the original resolution time
+        IssueService.transition_status(self.issue, 'closed', self.user)
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.resolved_at, resolved_at)
+        self.assertIsNotNone(self.issue.closed_at)
+
+    def test_reopening_clears_timestamps(self):
+        IssueService.transition_status(self.issue, 'closed', self.user)
+        self.assertIsNotNone(self.issue.resolved_at)
+
+        IssueService.transition_status(self.issue, 'open', self.user)
+        self.issue.refresh_from_db()
+        self.assertIsNone(self.issue.resolved_at)
+        self.assertIsNone(self.issue.closed_at)
+
+
+class SlaTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='staff@example.com', password='password', role='staff')
+        self.issue = IssueService.create_issue(self.user, {'title': 'SLA', 'description': 'Desc', 'priority': 'critical'})
+
+    def test_deadline_follows_priority_policy_and_due_date(self):
+        # created_at is stamped just after the deadline is computed on insert
+        self.assertAlmostEqual(self.issue.sla_due_at, self.issue.created_at + timedelta(hours=4),
+                               delta=timedelta(seconds=1))
+
+        self.issue.priority = 'low'
+        self.issue.save(update_fields=['priority'])
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.sla_due_at, self.issue.created_at + timedelta(hours=168))
+
+        self.issue.due_date = timezone.localdate()
+        self.issue.save()
+        self.assertEqual(timezone.localtime(self.issue.sla_due_at).date(), timezone.localdate())
+
+    def test_scanner_marks_overdue_open_issues_once(self):
+        Issue.objects.filter(pk=self.issue.pk).update(sla_due_at=timezone.now() - timedelta(hours=1))
+        IssueService.create_issue(self.user, {'title': 'Fine', 'description': 'Desc', 'priority': 'low'})
+
+        with self.assertNumQueries(1):
+            self.assertEqual(scan_sla_breaches.delay().get(), 1)
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.sla_breached_at, self.issue.sla_due_at)
+        self.assertEqual(SlaService.scan_breaches(), 0)
+
+        summary = SlaService.summary(Issue.objects.all())
+        self.assertEqual(summary, {'compliance': 50.0, 'breached': 1, 'at_risk': 0})
+        self.assertEqual([row['title'] for row in SlaService.attention(Issue.objects.all())], ['SLA'])
+
+    def test_resolving_late_keeps_the_breach(self):
+        self.issue.due_date = timezone.localdate() - timedelta(days=1)
+        self.issue.save()
+        IssueService.transition_status(self.issue, 'resolved', self.user)
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.sla_breached_at, self.issue.sla_due_at)
+
+        # Reopened with a later due date: no longer breached
+        self.issue.due_date = timezone.localdate() + timedelta(days=2)
+        IssueService.transition_status(self.issue, 'open', self.user)
+        self.issue.refresh_from_db()
+        self.assertIsNone(self.issue.sla_breached_at)
+
+    def test_breach_survives_closing_without_resolved_at(self):
+        Issue.objects.filter(pk=self.issue.pk).update(sla_due_at=timezone.now() - timedelta(hours=1),
+                                                      created_at=timezone.now() - timedelta(hours=5))
+        SlaService.scan_breaches()
+        self.issue.refresh_from_db()
+        breached_at = self.issue.sla_breached_at
+        self.assertIsNotNone(breached_at)
+
+        # A direct status save stamps neither resolved_at nor closed_at
+        self.issue.status = 'closed'
+        self.issue.save()
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.sla_breached_at, breached_at)
+
+        # With only closed_at, that is the resolution time
+        self.issue.closed_at = timezone.now()
+        self.issue.save()
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.sla_breached_at, self.issue.sla_due_at)
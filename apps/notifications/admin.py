@@ -2,7 +2,8 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
-from .models import Notification
+from .models import Notification, NotificationArchive, EmailOutbox, DomainEvent
+from .services import NotificationService
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
@@ -137,14 +138,21 @@ class NotificationAdmin(admin.ModelAdmin):
     
     @admin.action(description="Mark selected as read")
     def mark_as_read(self, request, queryset):
+        recipient_ids = self._recipient_ids(queryset)
         updated = queryset.update(is_read=True)  
+        NotificationService.reconcile_unread_counts(recipient_ids)
         self.message_user(request, f"{updated} notification(s) marked as read.")
     
     @admin.action(description="Mark selected as unread")
     def mark_as_unread(self, request, queryset):
+        recipient_ids = self._recipient_ids(queryset)
         updated = queryset.update(is_read=False)  
+        NotificationService.reconcile_unread_counts(recipient_ids)
         self.message_user(request, f"{updated} notification(s) marked as unread.")
     
+    def _recipient_ids(self, queryset):
+        return list(queryset.order_by().values_list('recipient_id', flat=True).distinct())
+    
     @admin.action(description="Delete notifications older than 30 days")
     def delete_old_notifications(self, request, queryset):
         from django.utils import timezone
@@ -152,7 +160,58 @@ class NotificationAdmin(admin.ModelAdmin):
         
         cutoff_date = timezone.now() - timedelta(days=30)
         old_notifications = queryset.filter(created_at__lt=cutoff_date)
-        count = old_notifications.count()
-        old_notifications.delete()
+        recipient_ids = self._recipient_ids(old_notifications)
+        count = NotificationService.purge_notifications(old_notifications)
+        NotificationService.reconcile_unread_counts(recipient_ids)
         
-        self.message_user(request, f"Deleted {count} notification(s) older than 30 days.")
\ No newline at end of file
+        self.message_user(request, f"Deleted {count} notification(s) older than 30 days.")
+
+
+@admin.register(NotificationArchive)
+class NotificationArchiveAdmin(admin.ModelAdmin):
+    list_display = ['recipient', 'type', 'message', 'created_at', 'archived_at']
+    list_filter = ['type', 'archived_at']
+    search_fields = ['message', 'recipient__email']
+    list_select_related = ('recipient',)
+    list_per_page = 25
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ['recipient_email', 'subject', 'status', 'attempts', 'next_attempt_at', 'sent_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['recipient_email', 'subject']
+    readonly_fields = ['created_at', 'sent_at', 'last_error']
+    actions = ['retry_now']
+    list_per_page = 25
+
+    @admin.action(description="Retry selected emails now")
+    def retry_now(self, request, queryset):
+        from django.utils import timezone
+        from .tasks import drain_email_outbox
+
+        updated = queryset.exclude(status='sent').update(
+            status='pending', attempts=0, next_attempt_at=timezone.now()
+        )
+        drain_email_outbox.delay()
+        self.message_user(request, f"{updated} email(s) queued for retry.")
+
+
+@admin.register(DomainEvent)
+class DomainEventAdmin(admin.ModelAdmin):
+    list_display = ['name', 'status', 'attempts', 'created_at', 'processed_at']
+    list_filter = ['status', 'name', 'created_at']
+    readonly_fields = ['name', 'payload', 'created_at', 'processed_at', 'last_error']
+    actions = ['retry_now']
+    list_per_page = 25
+
+    @admin.action(description="Retry selected events now")
+    def retry_now(self, request, queryset):
+        from django.utils import timezone
+        from .tasks import process_domain_events
+
+        updated = queryset.exclude(status='processed').update(
+            status='pending', attempts=0, next_attempt_at=timezone.now()
+        )
+        process_domain_events.delay()
+        self.message_user(request, f"{updated} event(s) queued for retry.")
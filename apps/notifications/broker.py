@@ -0,0 +1,258 @@
+"""
+Pub/sub brokers feeding the live notification stream.
+
+NotificationService publishes serialized notifications after commit and the
+SSE view subscribes per user. The broker class comes from
+settings.NOTIFICATIONS_BROKER so several workers can share events (Redis)
+while development and tests use the in-process broker.
+"""
+import asyncio
+import itertools
+import re
+import threading
+from collections import OrderedDict, defaultdict, deque
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Return the configured broker, created once per process."""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                broker_class = import_string(settings.NOTIFICATIONS_BROKER)
+                _broker = broker_class(**settings.NOTIFICATIONS_BROKER_OPTIONS)
+    return _broker
+
+
+class StreamGap(Exception):
+    """Raised when a Last-Event-ID is older than the broker's retained history."""
+
+
+class BaseBroker:
+    """
+    Interface for notification brokers.
+
+    `publish` is called from synchronous code; `subscribe` is used by the
+    async stream view and returns an object exposing `async get(timeout)`
+    (an (event_id, data) tuple or None on timeout) and `close()`.
+    """
+
+    def publish(self, user_id, data):
+        raise NotImplementedError
+
+    def publish_many(self, events):
+        for user_id, data in events:
+            self.publish(user_id, data)
+
+    def subscribe(self, user_id, last_event_id=None):
+        raise NotImplementedError
+
+
+class InProcessBroker(BaseBroker):
+    """
+    Broker for a single process. Keeps the last `history` events for each
+    of the `max_users` most recently notified users in memory so
+    reconnecting clients can resume from Last-Event-ID.
+    """
+
+    def __init__(self, history=None, max_users=None):
+        self.history_size = history or settings.NOTIFICATIONS_STREAM_HISTORY
+        self.max_users = max_users or settings.NOTIFICATIONS_STREAM_USERS
+        # Least recently published first
+        self._history = OrderedDict()
+        # Highest event ID evicted; a user's new history continues past it, so
+        # a Last-Event-ID from before the eviction is reported as a gap
+        self._evicted_id = 0
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, user_id, data):
+        user_id = str(user_id)
+        with self._lock:
+            history = self._history.get(user_id)
+            if history is None:
+                history = self._history[user_id] = deque(maxlen=self.history_size)
+                self._evict()
+            else:
+                self._history.move_to_end(user_id)
+            last = int(history[-1][0]) if history else self._evicted_id
+            event = (str(last + 1), data)
+            history.append(event)
+            subscribers = list(self._subscribers.get(user_id, ()))
+
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+    def _evict(self):
+        # Users with an open stream keep their history
+        idle = (user_id for user_id in self._history if user_id not in self._subscribers)
+        for user_id in list(itertools.islice(idle, max(len(self._history) - self.max_users, 0))):
+            history = self._history.pop(user_id)
+            if history:
+                self._evicted_id = max(self._evicted_id, int(history[-1][0]))
+
+    def subscribe(self, user_id, last_event_id=None):
+        user_id = str(user_id)
+        subscription = _QueueSubscription(self, user_id)
+
+        with self._lock:
+            if last_event_id:
+                subscription.replay(self._replay_after(user_id, last_event_id))
+            self._subscribers[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers[subscription.user_id].discard(subscription)
+            if not self._subscribers[subscription.user_id]:
+                del self._subscribers[subscription.user_id]
+
+    def _replay_after(self, user_id, last_event_id):
+        try:
+            last = int(last_event_id)
+        except (TypeError, ValueError):
+            raise StreamGap(last_event_id)
+
+        # IDs are per user and restart with the process, so an ID outside the
+        # retained window means events may have been missed
+        history = self._history.get(user_id) or ()
+        newest = int(history[-1][0]) if history else self._evicted_id
+        oldest = int(history[0][0]) if history else newest + 1
+        if last < oldest - 1 or last > newest:
+            raise StreamGap(last_event_id)
+        return [event for event in history if int(event[0]) > last]
+
+
+class _QueueSubscription:
+    def __init__(self, broker, user_id):
+        self.broker = broker
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+
+    def replay(self, events):
+        for event in events:
+            self.queue.put_nowait(event)
+
+    def deliver(self, event):
+        # Publishers run on request threads, so hand over to the stream's loop
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, event)
+
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class RedisBroker(BaseBroker):
+    """
+    Broker shared by every worker through Redis streams (one per user).
+    Stream IDs double as SSE event IDs, so resume works across workers.
+    """
+
+    def __init__(self, url=None, history=None, prefix='notifications:stream:'):
+        import redis
+        import redis.asyncio
+
+        self.url = url or settings.NOTIFICATIONS_BROKER_URL
+        self.history_size = history or settings.NOTIFICATIONS_STREAM_HISTORY
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(self.url)
+        self._async_client_class = redis.asyncio.Redis
+
+    def publish(self, user_id, data):
+        self._client.xadd(
+            f'{self.prefix}{user_id}',
+            {'data': data},
+            maxlen=self.history_size,
+            approximate=True
+        )
+
+    def publish_many(self, events):
+        pipe = self._client.pipeline(transaction=False)
+        for user_id, data in events:
+            pipe.xadd(f'{self.prefix}{user_id}', {'data': data}, maxlen=self.history_size, approximate=True)
+        pipe.execute()
+
+    def subscribe(self, user_id, last_event_id=None):
+        key = f'{self.prefix}{user_id}'
+        if last_event_id:
+            self._check_resume(key, last_event_id)
+        client = self._async_client_class.from_url(self.url)
+        return _RedisSubscription(client, key, last_event_id or '$')
+
+    def _check_resume(self, key, last_event_id):
+        """
+        Raise StreamGap unless the stream still holds every entry after
+        last_event_id; XREAD would fail on a malformed ID and silently skip
+        entries already trimmed
+        """
+        from redis.exceptions import ResponseError
+
+        last = _stream_id(last_event_id)
+        try:
+            info = self._client.xinfo_stream(key)
+        except ResponseError:
+            # No such stream: nothing has been published for this user
+            if last != (0, 0):
+                raise StreamGap(last_event_id)
+            return
+
+        if last > _stream_id(info['last-generated-id']):
+            raise StreamGap(last_event_id)
+        # Redis 7 records the highest trimmed ID; older servers only report
+        # the first entry still retained
+        trimmed = info.get('max-deleted-entry-id')
+        if trimmed is not None:
+            if last < _stream_id(trimmed):
+                raise StreamGap(last_event_id)
+        elif info.get('first-entry') and last < _stream_id(info['first-entry'][0]):
+            raise StreamGap(last_event_id)
+
+
+STREAM_ID = re.compile(r'(\d+)(?:-(\d+))?')
+
+
+def _stream_id(value):
+    """(milliseconds, sequence) of a Redis stream ID; StreamGap if malformed"""
+    if isinstance(value, bytes):
+        value = value.decode()
+    match = STREAM_ID.fullmatch(value or '')
+    if match is None:
+        raise StreamGap(value)
+    return int(match[1]), int(match[2] or 0)
+
+
+class _RedisSubscription:
+    def __init__(self, client, key, last_id):
+        self.client = client
+        self.key = key
+        self.last_id = last_id
+        self.pending = deque()
+
+    async def get(self, timeout):
+        if not self.pending:
+            response = await self.client.xread(
+                {self.key: self.last_id},
+                block=int(timeout * 1000),
+                count=100
+            )
+            for _, entries in response or []:
+                for event_id, fields in entries:
+                    event_id = event_id.decode()
+                    self.last_id = event_id
+                    self.pending.append((event_id, fields[b'data'].decode()))
+        return self.pending.popleft() if self.pending else None
+
+    def close(self):
+        asyncio.ensure_future(self.client.aclose())
@@ -0,0 +1,36 @@
+"""
+Transactional outbox for side effects of domain writes.
+
+Services call record_event() inside the transaction that writes the domain
+row. Handlers registered with @handles run after commit (through
+process_domain_events), so a rollback discards the event along with the
+write, and the periodic drain retries anything that failed.
+"""
+from django.db import transaction
+
+from .models import DomainEvent
+
+HANDLERS = {}
+
+
+def handles(name, takes_context=False):
+    """
+    Register the decorated function as the handler for events called `name`.
+    With takes_context, it is called as handler(payload, context), where
+    `context` is a dict shared by every event in one processing run (e.g.
+    lookup memos).
+    """
+    def register(handler):
+        handler.takes_context = takes_context
+        HANDLERS[name] = handler
+        return handler
+    return register
+
+
+def record_event(name, **payload):
+    """Store a domain event in the current transaction and dispatch it after commit."""
+    from .tasks import process_domain_events
+
+    event = DomainEvent.objects.create(name=name, payload=payload)
+    transaction.on_commit(lambda: process_domain_events.delay(event_ids=[str(event.id)]))
+    return event
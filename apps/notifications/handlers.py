@@ -0,0 +1,217 @@
+"""
+Notification handlers for domain events recorded by the issue, comment and
+feedback services. They run after the originating transaction commits.
+"""
+from django.contrib.auth import get_user_model
+
+from apps.issues.models import Issue
+from apps.users.services import AudienceService
+from .events import handles
+from .services import NotificationService
+
+User = get_user_model()
+
+
+def _get(model, pk, *select_related):
+    """Fetch a row the event refers to, or None if it has since been deleted."""
+    if pk is None:
+        return None
+    return model.objects.select_related(*select_related).filter(pk=pk).first()
+
+
+@handles('issue.created')
+def notify_issue_created(payload):
+    issue = _get(Issue, payload['issue_id'])
+    user = _get(User, payload['user_id'])
+    if not issue or not user:
+        return
+
+    # NOTIFY MANAGERS AND ADMINS ABOUT NEW ISSUE
+    # Don't notify the creator if they're manager/admin
+    NotificationService.notify_many(
+        recipients=AudienceService.get_user_ids(['manager', 'admin'], exclude=user),
+        message=f'New issue created: "{issue.title}" by {user.email}',
+        type='new_issue',
+        issue=issue
+    )
+
+    # NOTIFY CLIENT (reporter) that their issue was created
+    NotificationService.create_notification(
+        recipient=user,
+        message=f'Your issue "{issue.title}" has been created successfully',
+        type='status_change',
+        issue=issue
+    )
+
+
+@handles('issue.assigned')
+def notify_issue_assigned(payload):
+    issue = _get(Issue, payload['issue_id'], 'reporter')
+    assignee = _get(User, payload['assignee_id'])
+    if not issue or not assignee:
+        return
+
+    NotificationService.create_notification(
+        recipient=assignee,
+        message=f'You have been assigned to issue: "{issue.title}"',
+        type='new_issue',
+        issue=issue
+    )
+
+    # Also notify reporter that issue was assigned
+    if issue.reporter and issue.reporter != assignee:
+        NotificationService.create_notification(
+            recipient=issue.reporter,
+            message=f'Your issue "{issue.title}" has been assigned to {assignee.email}',
+            type='new_issue',
+            issue=issue
+        )
+
+
+@handles('issue.status_changed')
+def notify_status_changed(payload):
+    issue = _get(Issue, payload['issue_id'], 'reporter', 'assignee')
+    changed_by = _get(User, payload['changed_by_id'])
+    if not issue or not changed_by:
+        return
+    old_status, new_status = payload['old_status'], payload['new_status']
+
+    # Coalesced: rapid transitions update one pending notification per
+    # recipient and send a single email when the window closes
+
+    # 1. Notify assignee (if exists)
+    if issue.assignee and issue.assignee != changed_by:
+        NotificationService.notify_many(
+            recipients=[issue.assignee],
+            message=f'Issue "{issue.title}" status changed from {old_status} to {new_status}',
+            type='status_change',
+            issue=issue,
+            coalesce=True
+        )
+
+    # 2. Notify reporter (client) about status changes
+    if issue.reporter and issue.reporter != changed_by:
+        NotificationService.notify_many(
+            recipients=[issue.reporter],
+            message=f'Your issue "{issue.title}" status changed from {old_status} to {new_status}',
+            type='status_change',
+            issue=issue,
+            coalesce=True
+        )
+
+    if new_status in ['resolved', 'closed']:
+        # 3. Notify managers/admins, except the person making the change
+        NotificationService.notify_many(
+            recipients=AudienceService.get_user_ids(['manager', 'admin'], exclude=changed_by),
+            message=f'Issue "{issue.title}" marked as {new_status} by {changed_by.email}',
+            type='status_change',
+            issue=issue,
+            coalesce=True
+        )
+
+        # 4. Special notification for client when resolved/closed
+        if issue.reporter:
+            action = "resolved" if new_status == 'resolved' else "closed"
+            NotificationService.notify_many(
+                recipients=[issue.reporter],
+                message=f'Great news! Your issue "{issue.title}" has been {action}',
+                type='status_change',
+                issue=issue,
+                coalesce=True
+            )
+
+
+@handles('comment.created', takes_context=True)
+def notify_comment_created(payload, context):
+    from apps.comments.services import CommentService
+
+    issue = _get(Issue, payload['issue_id'], 'assignee')
+    author = _get(User, payload['author_id'])
+    if not issue or not author:
+        return
+
+    # Mentions resolved for earlier comments in this run are not looked up again
+    resolved = CommentService.resolve_mentions(
+        payload.get('mentions', []), memo=context.setdefault('mentions', {})
+    )
+    mentioned_users = [u for u in resolved.values() if u and u != author]
+    if mentioned_users:
+        NotificationService.notify_many(
+            recipients=mentioned_users,
+            message=f'You were mentioned in a comment on issue {issue.title}',
+            type='mention',
+            issue=issue,
+        )
+
+    # Notify assignee if different from commenter
+    if issue.assignee and issue.assignee != author:
+        NotificationService.create_notification(
+            recipient=issue.assignee,
+            message=f'New comment on issue {issue.title}',
+            type='comment',
+            issue=issue,
+        )
+
+
+@handles('feedback.created')
+def notify_feedback_created(payload):
+    # Send notification to staff about new feedback
+    NotificationService.notify_many(
+        recipients=AudienceService.get_user_ids(['staff', 'manager', 'admin']),
+        message=f'New feedback submitted: "{payload["title"]}"',
+        type='new_feedback',
+        issue=None  # No issue yet
+    )
+
+
+@handles('feedback.converted')
+def notify_feedback_converted(payload):
+    from apps.feedback.models import Feedback
+
+    feedback = _get(Feedback, payload['feedback_id'], 'user')
+    issue = _get(Issue, payload['issue_id'])
+    user = _get(User, payload['user_id'])
+    if not feedback or not issue or not user:
+        return
+
+    # 1. Send notification to feedback submitter
+    if feedback.user:
+        NotificationService.create_notification(
+            recipient=feedback.user,
+            message=f'Your feedback "{feedback.title}" has been converted to issue #{issue.id}',
+            type='feedback_converted',
+            issue=issue
+        )
+
+    # 2. Send notification to assignee (if specified in issue_data)
+    assignee = User.objects.filter(email=payload['assignee_email']).first() if payload.get('assignee_email') else None
+    if assignee:
+        NotificationService.create_notification(
+            recipient=assignee,
+            message=f'New issue assigned from feedback: "{issue.title}"',
+            type='assignment',
+            issue=issue
+        )
+
+    # 3. Send notification to all staff, except the person who did the conversion
+    NotificationService.notify_many(
+        recipients=AudienceService.get_user_ids(['staff', 'manager', 'admin'], exclude=user),
+        message=f'Feedback converted to issue: "{issue.title}" by {user.email}',
+        type='feedback_converted',
+        issue=issue
+    )
+
+
+@handles('feedback.acknowledged')
+def notify_feedback_acknowledged(payload):
+    from apps.feedback.models import Feedback
+
+    feedback = _get(Feedback, payload['feedback_id'], 'user')
+    # Notify the feedback submitter
+    if feedback and feedback.user:
+        NotificationService.create_notification(
+            recipient=feedback.user,
+            message=f'Your feedback "{feedback.title}" has been acknowledged by our team',
+            type='status_change',
+            issue=None
+        )
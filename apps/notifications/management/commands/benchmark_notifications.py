@@ -0,0 +1,125 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from apps.issues.services import IssueService
+from apps.notifications.models import Notification
+from apps.notifications.tasks import process_domain_events
+from apps.notifications.views import NotificationPagination
+from apps.users.models import User
+
+
+class Rollback(Exception):
+    """Raised to discard everything a benchmark run wrote."""
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark notifications. "fanout": queries and time per issue creation and its after-commit fan-out as recipients grow. '
+        '"inbox": page-number vs keyset pagination latency over a large inbox.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenario', nargs='?', choices=['fanout', 'inbox'], default='fanout')
+        parser.add_argument(
+            '--recipients', type=int, nargs='+', default=[10, 100, 500],
+            help='Manager/admin audience sizes to measure (fanout)'
+        )
+        parser.add_argument(
+            '--notifications', type=int, default=1_000_000,
+            help='Rows in the benchmark inbox (inbox)'
+        )
+
+    def handle(self, *args, **options):
+        # Emails go to memory so the run measures the request path, not SMTP
+        with override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+            ALLOWED_HOSTS=['*'],
+            SECURE_SSL_REDIRECT=False,
+        ):
+            if options['scenario'] == 'inbox':
+                self._run_rolled_back(self._inbox, options['notifications'])
+            else:
+                self.stdout.write(
+                    f"{'recipients':>12} {'queries':>10} {'time_ms':>10} {'fanout_q':>10} {'fanout_ms':>10}"
+                )
+                for size in options['recipients']:
+                    self._run_rolled_back(self._fanout, size)
+
+    def _run_rolled_back(self, benchmark, *args):
+        try:
+            with transaction.atomic():
+                benchmark(*args)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _fanout(self, size):
+        reporter = User.objects.create(email='bench_reporter@example.com', role='client')
+        User.objects.bulk_create([
+            User(email=f'bench_manager_{i}@example.com', role='manager')
+            for i in range(size)
+        ])
+
+        # Warm-up so first-time unread counters don't skew the numbers
+        IssueService.create_issue(reporter, {'title': 'Warm-up', 'description': 'Warm-up'})
+        process_domain_events()
+
+        # on_commit never fires inside the rollback block, so run the
+        # after-commit fan-out explicitly and report it separately
+        with CaptureQueriesContext(connection) as request_ctx:
+            start = time.perf_counter()
+            IssueService.create_issue(reporter, {
+                'title': 'Benchmark issue',
+                'description': 'Notification fan-out benchmark',
+            })
+            request_ms = (time.perf_counter() - start) * 1000
+        with CaptureQueriesContext(connection) as handler_ctx:
+            start = time.perf_counter()
+            process_domain_events()
+            handler_ms = (time.perf_counter() - start) * 1000
+        self.stdout.write(
+            f"{size:>12} {len(request_ctx.captured_queries):>10} {request_ms:>10.2f}"
+            f" {len(handler_ctx.captured_queries):>10} {handler_ms:>10.2f}"
+        )
+
+    def _inbox(self, total):
+        user = User.objects.create(email='bench_inbox@example.com', role='manager')
+        self.stdout.write(f"Inserting {total} notifications...")
+        batch = 10_000
+        for offset in range(0, total, batch):
+            Notification.objects.bulk_create([
+                Notification(recipient=user, message=f'Benchmark {i}', type='new_issue', is_read=i % 3 != 0)
+                for i in range(offset, min(offset + batch, total))
+            ])
+
+        client = APIClient()
+        client.force_authenticate(user)
+        page_size = 20
+        last_page = max(total // page_size, 1)
+
+        # Cursor positioned just before the last page, as a client paging that far would hold
+        deep_row = Notification.objects.filter(recipient=user).order_by('-created_at', '-id')[
+            max(total - page_size - 1, 0)
+        ]
+        deep_cursor = NotificationPagination.encode_cursor(deep_row.created_at, deep_row.id)
+
+        cases = [
+            ('page-number, first page', f'/api/v1/notifications/?page=1&page_size={page_size}'),
+            ('page-number, last page', f'/api/v1/notifications/?page={last_page}&page_size={page_size}'),
+            ('keyset, first page', f'/api/v1/notifications/?cursor=&page_size={page_size}'),
+            ('keyset, last page', f'/api/v1/notifications/?cursor={deep_cursor}&page_size={page_size}'),
+            ('keyset unread, first page', f'/api/v1/notifications/?cursor=&unread=true&page_size={page_size}'),
+        ]
+
+        self.stdout.write(f"{'case':<28} {'queries':>8} {'time_ms':>10}")
+        for label, url in cases:
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                response = client.get(url)
+                elapsed = (time.perf_counter() - start) * 1000
+            assert response.status_code == 200, response.status_code
+            self.stdout.write(f"{label:<28} {len(ctx.captured_queries):>8} {elapsed:>10.2f}")
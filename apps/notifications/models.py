@@ -1,4 +1,6 @@
 from django.db import models
+from django.utils import timezone
+from django.core.serializers.json import DjangoJSONEncoder
 import uuid
 from apps.users.models import User
 from apps.issues.models import Issue
@@ -20,4 +22,119 @@ class Notification(models.Model):
     message = models.TextField()
     issue = models.ForeignKey(Issue, null=True, blank=True, on_delete=models.SET_NULL, related_name='notification_issues')
     is_read = models.BooleanField(default=False)
-    created_at = models.DateTimeField(auto_now_add=True)
\ No newline at end of file
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Later events for the same (recipient, issue, type) update this row until then
+    coalesce_until = models.DateTimeField(null=True, blank=True)
+    event_count = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            # Inbox listing and keyset pagination on (created_at, id), with and without ?unread=true
+            models.Index(fields=['recipient', '-created_at', '-id']),
+            models.Index(fields=['recipient', 'is_read', '-created_at', '-id']),
+            # Retention job scanning read notifications by age
+            models.Index(
+                fields=['created_at', 'id'],
+                condition=models.Q(is_read=True),
+                name='notification_read_age_idx'
+            ),
+        ]
+
+
+class NotificationArchive(models.Model):
+    """Read notification moved out of the hot table by the retention job."""
+    id = models.UUIDField(primary_key=True, editable=False)
+    type = models.CharField(max_length=20, choices=Notification.TYPE_CHOICES)
+    recipient = models.ForeignKey(User, related_name='archived_notifications', on_delete=models.CASCADE)
+    message = models.TextField()
+    issue = models.ForeignKey(Issue, null=True, blank=True, on_delete=models.SET_NULL, related_name='archived_notifications')
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['recipient', '-created_at']),
+        ]
+
+
+class UnreadCounter(models.Model):
+    """Per-user unread notification count, maintained by NotificationService."""
+    user = models.OneToOneField(
+        User,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='unread_notification_counter'
+    )
+    unread_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread_count} unread"
+
+
+class EmailOutbox(models.Model):
+    """Pending outgoing email, delivered in batches by drain_email_outbox."""
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    notification = models.ForeignKey(
+        Notification,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='emails'
+    )
+    recipient_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.recipient_email} ({self.status})"
+
+
+class DomainEvent(models.Model):
+    """
+    Side effect of a domain write (issue, comment, feedback), recorded in the
+    same transaction and handed to notification handlers after commit.
+    """
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('processed', 'Processed'),
+        ('failed', 'Failed'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
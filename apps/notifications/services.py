@@ -1,6 +1,18 @@
-from .models import Notification
-from .tasks import send_email_notification  # relative import
+from .models import Notification, NotificationArchive, UnreadCounter, EmailOutbox
+from .tasks import queue_emails  # relative import
+from .broker import get_broker
+from .serializers import NotificationSerializer
 from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import QuerySet, F, Value, Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+from datetime import timedelta
+import json
+import time
 
 User = get_user_model()
 
@@ -24,11 +36,14 @@ class NotificationService:
             issue=issue
         )
 
-        # Send email asynchronously
+        NotificationService._adjust_unread([recipient.id], 1)
+        NotificationService._publish([notification])
+
+        # Queue email for batched delivery through the outbox
         if hasattr(recipient, 'email') and recipient.email:
             try:
-                send_email_notification.delay(
-                    recipient.email,
+                queue_emails(
+                    [recipient.email],
                     'New Notification',
                     message
                 )
@@ -39,10 +54,284 @@ class NotificationService:
 
         return notification
 
+    @staticmethod
+    def notify_many(recipients, message, type, issue=None, coalesce=False):
+        """
+        Fan a notification out to many recipients at once.
+        Writes every row with a single bulk insert and queues all emails
+        in the outbox, so the cost stays flat as the recipient list grows.
+        `recipients` may be a User queryset, an iterable of users or user IDs.
+
+        With `coalesce`, a recipient who still has an unread notification for
+        the same issue and type inside NOTIFICATION_COALESCE_WINDOW gets that
+        row updated instead of a new one, and emails are held until the
+        window closes so one email covers the whole burst.
+        """
+        rows = NotificationService._resolve_recipients(recipients)
+        if not rows:
+            return []
+
+        window = settings.NOTIFICATION_COALESCE_WINDOW if issue is not None else 0
+        if not (coalesce and window):
+            return NotificationService._create_many(rows, message, type, issue)
+
+        with transaction.atomic():
+            now = timezone.now()
+            pending = list(
+                Notification.objects.select_for_update()
+                .filter(
+                    recipient_id__in=[user_id for user_id, _ in rows],
+                    issue=issue,
+                    type=type,
+                    is_read=False,
+                    coalesce_until__gt=now
+                )
+            )
+            pending = {n.recipient_id: n for n in pending}
+
+            if pending:
+                Notification.objects.filter(id__in=[n.id for n in pending.values()]).update(
+                    message=message,
+                    event_count=F('event_count') + 1
+                )
+                # The held email goes out once, with the latest message
+                EmailOutbox.objects.filter(
+                    notification_id__in=[n.id for n in pending.values()],
+                    status='pending'
+                ).update(body=message)
+                for n in pending.values():
+                    n.message = message
+                    n.event_count += 1
+                NotificationService._publish(pending.values())
+
+            created = NotificationService._create_many(
+                [(user_id, email) for user_id, email in rows if user_id not in pending],
+                message,
+                type,
+                issue,
+                coalesce_until=now + timedelta(seconds=window)
+            )
+        return list(pending.values()) + created
+
+    @staticmethod
+    def _create_many(rows, message, type, issue=None, coalesce_until=None):
+        """Bulk insert notifications for (user_id, email) rows and queue their emails."""
+        if not rows:
+            return []
+
+        notifications = Notification.objects.bulk_create([
+            Notification(
+                recipient_id=user_id,
+                message=message,
+                type=type,
+                issue=issue,
+                coalesce_until=coalesce_until
+            )
+            for user_id, _ in rows
+        ])
+        NotificationService._adjust_unread([user_id for user_id, _ in rows], 1)
+        NotificationService._publish(notifications)
+
+        emails = [(email, n) for (_, email), n in zip(rows, notifications) if email]
+        if emails:
+            try:
+                queue_emails(
+                    [email for email, _ in emails],
+                    'New Notification',
+                    message,
+                    send_at=coalesce_until,
+                    notifications=[n for _, n in emails]
+                )
+            except Exception as e:
+                print(f"Failed to queue emails for {len(emails)} notifications: {e}")
+
+        return notifications
+
+    @staticmethod
+    def _resolve_recipients(recipients):
+        """Return a de-duplicated list of (user_id, email) pairs."""
+        if recipients is None:
+            return []
+
+        if isinstance(recipients, QuerySet):
+            rows = recipients.order_by().values_list('id', 'email')
+        else:
+            recipients = [r for r in recipients if r]
+            if all(isinstance(r, User) for r in recipients):
+                rows = [(r.id, r.email) for r in recipients]
+            else:
+                ids = [getattr(r, 'pk', r) for r in recipients]
+                rows = User.objects.filter(id__in=ids).order_by().values_list('id', 'email')
+
+        seen = set()
+        resolved = []
+        for user_id, email in rows:
+            if user_id not in seen:
+                seen.add(user_id)
+                resolved.append((user_id, email))
+        return resolved
+
     @staticmethod
     def mark_as_read(notification):
         """Mark a notification as read."""
         if not notification.is_read:
+            # Conditional update so concurrent requests only decrement once
+            updated = Notification.objects.filter(
+                pk=notification.pk, is_read=False
+            ).update(is_read=True)
             notification.is_read = True
-            notification.save(update_fields=['is_read'])
-        return notification
\ No newline at end of file
+            if updated:
+                NotificationService._adjust_unread([notification.recipient_id], -1)
+        return notification
+
+    @staticmethod
+    def mark_all_read(user):
+        """Mark all of a user's notifications as read. Returns the number updated."""
+        updated = Notification.objects.filter(recipient=user, is_read=False).update(is_read=True)
+        if updated:
+            NotificationService._adjust_unread([user.id], -updated)
+        return updated
+
+    @staticmethod
+    def get_unread_count(user):
+        """
+        Return the user's unread count from cache or the counter row.
+        Only falls back to counting notifications the first time a user
+        without a counter row is seen.
+        """
+        key = NotificationService._unread_cache_key(user.id)
+        count = cache.get(key)
+        if count is not None:
+            return count
+
+        count = UnreadCounter.objects.filter(user_id=user.id).values_list('unread_count', flat=True).first()
+        if count is None:
+            count = Notification.objects.filter(recipient=user, is_read=False).count()
+            UnreadCounter.objects.get_or_create(user_id=user.id, defaults={'unread_count': count})
+
+        cache.set(key, count, settings.NOTIFICATION_UNREAD_CACHE_TIMEOUT)
+        return count
+
+    @staticmethod
+    def reconcile_unread_counts(user_ids=None):
+        """
+        Recompute unread counters from the notifications table and fix drift.
+        Limited to `user_ids` when given. Returns the number of corrected counters.
+        """
+        unread = Notification.objects.filter(is_read=False)
+        counters = UnreadCounter.objects.all()
+        if user_ids is not None:
+            unread = unread.filter(recipient_id__in=user_ids)
+            counters = counters.filter(user_id__in=user_ids)
+
+        # Users with unread notifications but no counter row yet
+        missing = unread.filter(
+            recipient__unread_notification_counter__isnull=True
+        ).order_by().values_list('recipient_id', flat=True).distinct()
+        UnreadCounter.objects.bulk_create(
+            [UnreadCounter(user_id=user_id) for user_id in missing],
+            ignore_conflicts=True
+        )
+
+        actual = Coalesce(
+            Subquery(
+                Notification.objects.filter(recipient=OuterRef('user_id'), is_read=False)
+                .order_by().values('recipient').annotate(n=Count('id')).values('n')
+            ),
+            Value(0)
+        )
+        drifted = list(
+            counters.annotate(actual=actual)
+            .exclude(unread_count=F('actual'))
+            .values_list('user_id', flat=True)
+        )
+        if drifted:
+            UnreadCounter.objects.filter(user_id__in=drifted).update(unread_count=actual)
+            cache.delete_many([NotificationService._unread_cache_key(user_id) for user_id in drifted])
+        return len(drifted)
+
+    @staticmethod
+    def purge_notifications(queryset, archive=False, chunk_size=None, pause=0, progress=None):
+        """
+        Delete notifications matching `queryset` in primary-key chunks, each in
+        its own short transaction. With `archive`, rows are copied into
+        NotificationArchive first. Rows locked by a concurrent run are skipped.
+        `progress` is called with the running total after every chunk.
+        Returns the number of notifications removed.
+        """
+        chunk_size = chunk_size or settings.NOTIFICATION_RETENTION_CHUNK_SIZE
+        queryset = queryset.select_related(None).order_by('created_at', 'id')
+        removed = 0
+
+        while True:
+            with transaction.atomic():
+                ids = list(
+                    queryset.select_for_update(skip_locked=True)
+                    .values_list('id', flat=True)[:chunk_size]
+                )
+                if not ids:
+                    break
+
+                chunk = Notification.objects.filter(id__in=ids)
+                if archive:
+                    NotificationArchive.objects.bulk_create(
+                        [
+                            NotificationArchive(**row)
+                            for row in chunk.values('id', 'type', 'recipient_id', 'message', 'issue_id', 'created_at')
+                        ],
+                        ignore_conflicts=True
+                    )
+                chunk.delete()
+
+            removed += len(ids)
+            if progress:
+                progress(removed)
+            if len(ids) < chunk_size:
+                break
+            if pause:
+                # Give replicas and other writers room between chunks
+                time.sleep(pause)
+
+        return removed
+
+    @staticmethod
+    def _adjust_unread(user_ids, delta):
+        """Apply `delta` to the unread counters of `user_ids` and drop their cache entries."""
+        user_ids = list(user_ids)
+        if not user_ids:
+            return
+
+        updated = UnreadCounter.objects.filter(user_id__in=user_ids).update(
+            unread_count=Greatest(F('unread_count') + delta, Value(0))
+        )
+        if updated < len(user_ids):
+            existing = set(UnreadCounter.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True))
+            UnreadCounter.objects.bulk_create(
+                [
+                    UnreadCounter(user_id=user_id, unread_count=max(delta, 0))
+                    for user_id in user_ids if user_id not in existing
+                ],
+                ignore_conflicts=True
+            )
+
+        cache.delete_many([NotificationService._unread_cache_key(user_id) for user_id in user_ids])
+
+    @staticmethod
+    def _publish(notifications):
+        """Push notifications to live streams once the transaction commits."""
+        events = [
+            (n.recipient_id, json.dumps(NotificationSerializer(n).data, cls=DjangoJSONEncoder))
+            for n in notifications
+        ]
+
+        def publish():
+            try:
+                get_broker().publish_many(events)
+            except Exception as e:
+                print(f"Failed to publish {len(events)} notification(s) to live streams: {e}")
+
+        transaction.on_commit(publish)
+
+    @staticmethod
+    def _unread_cache_key(user_id):
+        return f'notifications:unread:{user_id}'
@@ -1,21 +1,250 @@
 from celery import shared_task
-from django.core.mail import send_mail 
+from django.core.mail import get_connection, EmailMessage
 from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from datetime import timedelta
+import logging
+
+from .models import EmailOutbox, DomainEvent
+
+logger = logging.getLogger(__name__)
+
+
+def queue_emails(recipient_emails, subject, message, send_at=None, notifications=None):
+    """
+    Write one outbox row per recipient and kick the drain task once the
+    surrounding transaction commits. `send_at` defers delivery (used by
+    notification coalescing) and `notifications`, parallel to
+    `recipient_emails`, links each row to its notification.
+    Returns the created outbox rows.
+    """
+    notifications = notifications or [None] * len(recipient_emails)
+    entries = EmailOutbox.objects.bulk_create([
+        EmailOutbox(
+            recipient_email=email,
+            subject=subject,
+            body=message,
+            notification=notification,
+            next_attempt_at=send_at or timezone.now()
+        )
+        for email, notification in zip(recipient_emails, notifications)
+    ])
+    if entries and send_at is None:
+        transaction.on_commit(lambda: drain_email_outbox.delay())
+    return entries
+
 
 @shared_task
 def send_email_notification(recipient_email, subject, message):
     """
-    Sends an email notification to the specified recipient.
-    
+    Queues an email notification for the specified recipient.
+    Delivery happens in batches through drain_email_outbox.
+
     Args:
         recipient_email (str): The email address of the recipient.
         subject (str): The subject of the email.
         message (str): The body of the email.
     """
-    send_mail(
-        subject,
-        message,
-        settings.DEFAULT_FROM_EMAIL,
-        [recipient_email],
-        fail_silently=False,
-    )
\ No newline at end of file
+    queue_emails([recipient_email], subject, message)
+
+
+@shared_task
+def drain_email_outbox(batch_size=None):
+    """
+    Deliver pending outbox emails in chunks, one mail connection per chunk.
+
+    Rows are locked with SKIP LOCKED so concurrent drains never pick the same
+    message. Failed messages are retried with exponential backoff until
+    EMAIL_OUTBOX_MAX_ATTEMPTS is reached, then marked as failed.
+    """
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    sent = failed = 0
+
+    while True:
+        with transaction.atomic():
+            batch = list(
+                EmailOutbox.objects.select_for_update(skip_locked=True)
+                .filter(status='pending', next_attempt_at__lte=timezone.now())
+                .order_by('next_attempt_at')[:batch_size]
+            )
+            if not batch:
+                break
+
+            batch_sent, batch_failed = _deliver_batch(batch)
+            sent += batch_sent
+            failed += batch_failed
+
+            EmailOutbox.objects.bulk_update(
+                batch,
+                ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at']
+            )
+
+        if len(batch) < batch_size:
+            break
+
+    if sent or failed:
+        logger.info(f"Email outbox drained: {sent} sent, {failed} failed")
+    return {'sent': sent, 'failed': failed}
+
+
+@shared_task
+def process_domain_events(event_ids=None, batch_size=None):
+    """
+    Run handlers for pending domain events in batches.
+
+    Called after commit for freshly recorded events (`event_ids`) and
+    periodically without arguments to pick up anything left behind. Rows are
+    locked with SKIP LOCKED so both paths never handle the same event twice;
+    each handler runs in a savepoint and failures are retried with backoff
+    until DOMAIN_EVENTS_MAX_ATTEMPTS is reached.
+    """
+    from .events import HANDLERS
+
+    batch_size = batch_size or settings.DOMAIN_EVENTS_BATCH_SIZE
+    processed = failed = 0
+    context = {}  # shared by the handlers of this run, see events.handles
+
+    while True:
+        with transaction.atomic():
+            events = DomainEvent.objects.select_for_update(skip_locked=True).filter(
+                status='pending', next_attempt_at__lte=timezone.now()
+            )
+            if event_ids is not None:
+                events = events.filter(id__in=event_ids)
+            batch = list(events.order_by('created_at')[:batch_size])
+            if not batch:
+                break
+
+            for event in batch:
+                try:
+                    handler = HANDLERS[event.name]
+                    with transaction.atomic():
+                        if getattr(handler, 'takes_context', False):
+                            handler(event.payload, context)
+                        else:
+                            handler(event.payload)
+                except Exception as e:
+                    _record_event_failure(event, e)
+                    failed += 1
+                else:
+                    event.status = 'processed'
+                    event.attempts += 1
+                    event.processed_at = timezone.now()
+                    event.last_error = ''
+                    processed += 1
+
+            DomainEvent.objects.bulk_update(
+                batch,
+                ['status', 'attempts', 'next_attempt_at', 'last_error', 'processed_at']
+            )
+
+        if len(batch) < batch_size:
+            break
+
+    if failed:
+        logger.warning(f"Domain events: {processed} processed, {failed} failed")
+    return {'processed': processed, 'failed': failed}
+
+
+@shared_task
+def reconcile_unread_counters():
+    """Periodic job correcting drift between unread counters and notifications."""
+    from .services import NotificationService
+
+    corrected = NotificationService.reconcile_unread_counts()
+    if corrected:
+        logger.warning(f"Corrected {corrected} drifted unread notification counters")
+    return corrected
+
+
+@shared_task(bind=True)
+def purge_read_notifications(self, older_than_days=None, archive=None, chunk_size=None):
+    """
+    Periodic retention job: remove read notifications older than
+    NOTIFICATION_RETENTION_DAYS in bounded chunks, archiving them first when
+    NOTIFICATION_RETENTION_ARCHIVE is set. Safe to run concurrently.
+    """
+    from .models import Notification
+    from .services import NotificationService
+
+    days = older_than_days if older_than_days is not None else settings.NOTIFICATION_RETENTION_DAYS
+    archive = settings.NOTIFICATION_RETENTION_ARCHIVE if archive is None else archive
+    cutoff = timezone.now() - timedelta(days=days)
+
+    def progress(removed):
+        if self.request.id:
+            self.update_state(state='PROGRESS', meta={'removed': removed, 'cutoff': cutoff.isoformat()})
+        logger.info(f"Notification retention: {removed} removed so far (cutoff {cutoff:%Y-%m-%d})")
+
+    removed = NotificationService.purge_notifications(
+        Notification.objects.filter(is_read=True, created_at__lt=cutoff),
+        archive=archive,
+        chunk_size=chunk_size,
+        pause=settings.NOTIFICATION_RETENTION_PAUSE,
+        progress=progress
+    )
+    if removed:
+        logger.info(f"Notification retention finished: {removed} {'archived' if archive else 'deleted'}")
+    return {'removed': removed, 'archived': bool(archive), 'cutoff': cutoff.isoformat()}
+
+
+def _deliver_batch(batch):
+    """Send a chunk of outbox rows over a single connection, updating them in place."""
+    sent = failed = 0
+    connection = get_connection(fail_silently=False)
+
+    try:
+        connection.open()
+    except Exception as e:
+        # Connection-level failure counts as an attempt for every message
+        for entry in batch:
+            _record_failure(entry, e)
+        return 0, len(batch)
+
+    try:
+        for entry in batch:
+            message = EmailMessage(
+                entry.subject,
+                entry.body,
+                settings.DEFAULT_FROM_EMAIL,
+                [entry.recipient_email],
+                connection=connection,
+            )
+            try:
+                connection.send_messages([message])
+            except Exception as e:
+                _record_failure(entry, e)
+                failed += 1
+            else:
+                entry.status = 'sent'
+                entry.attempts += 1
+                entry.sent_at = timezone.now()
+                entry.last_error = ''
+                sent += 1
+    finally:
+        connection.close()
+
+    return sent, failed
+
+
+def _record_failure(entry, error):
+    entry.attempts += 1
+    entry.last_error = str(error)[:500]
+    if entry.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        entry.status = 'failed'
+        logger.error(f"Giving up on email {entry.id} to {entry.recipient_email}: {error}")
+    else:
+        backoff = settings.EMAIL_OUTBOX_RETRY_BACKOFF * (2 ** (entry.attempts - 1))
+        entry.next_attempt_at = timezone.now() + timedelta(seconds=backoff)
+
+
+def _record_event_failure(event, error):
+    event.attempts += 1
+    event.last_error = f"{type(error).__name__}: {error}"[:500]
+    if event.attempts >= settings.DOMAIN_EVENTS_MAX_ATTEMPTS:
+        event.status = 'failed'
+        logger.error(f"Giving up on domain event {event.id} ({event.name}): {error}")
+    else:
+        backoff = settings.DOMAIN_EVENTS_RETRY_BACKOFF * (2 ** (event.attempts - 1))
+        event.next_attempt_at = timezone.now() + timedelta(seconds=backoff)
@@ -1,6 +1,20 @@
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, AsyncClient, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection, transaction
+from django.core import mail
+from django.core.cache import cache
+from django.utils import timezone
+from datetime import timedelta
 from rest_framework.test import APIClient
-from .models import Notification
+from rest_framework_simplejwt.tokens import AccessToken
+from django.core.mail.backends.locmem import EmailBackend as LocMemEmailBackend
+from unittest.mock import Mock, patch
+from .models import Notification, NotificationArchive, EmailOutbox, UnreadCounter, DomainEvent
+from .services import NotificationService
+from .tasks import drain_email_outbox, purge_read_notifications, process_domain_events, get_connection
+from .events import HANDLERS
+from .broker import InProcessBroker, RedisBroker, StreamGap
+from apps.issues.services import IssueService
 from apps.users.models import User
 
 class NotificationTests(TestCase):
@@ -18,3 +32,441 @@ class NotificationTests(TestCase):
             self.assertEqual(len(response.data["results"]), 1)
         else:
             self.assertEqual(len(response.data), 1)
+
+
+class NotificationInboxPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(email='inbox@example.com', password='password', role='client')
+        self.client.force_authenticate(self.user)
+        # Same timestamp for several rows to exercise the id tie-breaker
+        Notification.objects.bulk_create([
+            Notification(recipient=self.user, message=f'N{i}', type='new_comment', is_read=i % 2 == 0)
+            for i in range(7)
+        ])
+        Notification.objects.filter(recipient=self.user).update(created_at=timezone.now())
+
+    def test_cursor_pages_cover_inbox_without_count_query(self):
+        seen = []
+        url = '/api/v1/notifications/?cursor=&page_size=3'
+        with CaptureQueriesContext(connection) as ctx:
+            while url:
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIn('count', response.data)
+                seen.extend(item['id'] for item in response.data['results'])
+                url = response.data['next']
+
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(len(set(seen)), 7)
+        self.assertFalse(any('COUNT(' in q['sql'].upper() for q in ctx.captured_queries))
+
+    def test_unread_filter_and_page_number_mode(self):
+        response = self.client.get('/api/v1/notifications/?unread=true&cursor=')
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertTrue(all(not item['is_read'] for item in response.data['results']))
+
+        response = self.client.get('/api/v1/notifications/?page=1')
+        self.assertEqual(response.data['count'], 7)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get('/api/v1/notifications/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+)
+class UnreadCounterTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(email='badge@example.com', password='password', role='client')
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_counter_follows_read_state(self):
+        first = NotificationService.create_notification(self.user, 'One', 'new_comment')
+        NotificationService.notify_many([self.user.id], 'Two', 'mention')
+        NotificationService.create_notification(self.user, 'Three', 'new_comment')
+        self.assertEqual(NotificationService.get_unread_count(self.user), 3)
+
+        NotificationService.mark_as_read(first)
+        NotificationService.mark_as_read(first)
+        self.assertEqual(NotificationService.get_unread_count(self.user), 2)
+
+        self.client.post('/api/v1/notifications/mark-all-read/')
+        self.assertEqual(NotificationService.get_unread_count(self.user), 0)
+
+    def test_unread_count_endpoint_is_served_from_cache(self):
+        NotificationService.create_notification(self.user, 'One', 'new_comment')
+
+        response = self.client.get('/api/v1/notifications/unread-count/')
+        self.assertEqual(response.data, {'unread_count': 1})
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/v1/notifications/unread-count/')
+        self.assertEqual(response.data, {'unread_count': 1})
+
+    def test_reconcile_corrects_drift(self):
+        # Rows written behind the service's back leave the counter stale
+        Notification.objects.create(recipient=self.user, message='Raw', type='new_comment')
+        Notification.objects.create(recipient=self.user, message='Raw', type='new_comment')
+        self.assertEqual(NotificationService.reconcile_unread_counts(), 1)
+        self.assertEqual(UnreadCounter.objects.get(user=self.user).unread_count, 2)
+
+        UnreadCounter.objects.filter(user=self.user).update(unread_count=7)
+        self.assertEqual(NotificationService.reconcile_unread_counts([self.user.id]), 1)
+        self.assertEqual(NotificationService.get_unread_count(self.user), 2)
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class NotificationFanOutTests(TestCase):
+    def setUp(self):
+        self.reporter = User.objects.create_user(email='reporter@example.com', password='password', role='client')
+
+    def _create_managers(self, count):
+        for i in range(count):
+            User.objects.create_user(email=f'manager{i}_{count}@example.com', password='password', role='manager')
+
+    def _queries_for_issue_creation(self):
+        # Warm-up run creates unread counters for first-time recipients
+        with self.captureOnCommitCallbacks(execute=True):
+            IssueService.create_issue(self.reporter, {'title': 'Warm-up', 'description': 'Desc'})
+        # Includes the after-commit event handlers doing the fan-out
+        with CaptureQueriesContext(connection) as ctx:
+            with self.captureOnCommitCallbacks(execute=True):
+                IssueService.create_issue(self.reporter, {'title': 'Printer on fire', 'description': 'Desc'})
+        return len(ctx.captured_queries)
+
+    def test_notify_many_creates_one_row_and_email_per_recipient(self):
+        self._create_managers(3)
+        managers = User.objects.filter(role='manager')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(6):
+                notifications = NotificationService.notify_many(managers, 'Hello', 'new_issue')
+
+        self.assertEqual(len(notifications), 3)
+        self.assertEqual(Notification.objects.filter(type='new_issue').count(), 3)
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_issue_creation_query_count_is_flat(self):
+        self._create_managers(2)
+        small = self._queries_for_issue_creation()
+
+        self._create_managers(20)
+        large = self._queries_for_issue_creation()
+
+        self.assertEqual(small, large)
+
+
+
+@override_settings(
+    NOTIFICATION_COALESCE_WINDOW=300,
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+)
+class NotificationCoalescingTests(TestCase):
+    def setUp(self):
+        self.reporter = User.objects.create_user(email='reporter@example.com', password='password', role='client')
+        self.assignee = User.objects.create_user(email='assignee@example.com', password='password', role='staff')
+        self.manager = User.objects.create_user(email='manager@example.com', password='password', role='manager')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.issue = IssueService.create_issue(self.reporter, {'title': 'Sink leaking', 'description': 'Desc'})
+        self.issue.assignee = self.assignee
+        self.issue.save()
+
+    def _triage(self):
+        for new_status in ['in_progress', 'resolved', 'closed']:
+            with self.captureOnCommitCallbacks(execute=True):
+                IssueService.transition_status(self.issue, new_status, self.manager)
+
+    def test_rapid_transitions_update_one_notification_per_recipient(self):
+        self._triage()
+
+        updates = Notification.objects.filter(issue=self.issue, type='status_change').exclude(
+            message__contains='created successfully'
+        )
+        reporter_note = updates.get(recipient=self.reporter)
+        self.assertEqual(reporter_note.event_count, 5)
+        self.assertIn('has been closed', reporter_note.message)
+        self.assertEqual(updates.get(recipient=self.assignee).event_count, 3)
+        self.assertEqual(UnreadCounter.objects.get(user=self.assignee).unread_count, 1)
+
+    def test_emails_are_held_until_window_closes(self):
+        drain_email_outbox()
+        mail.outbox = []
+        self._triage()
+        drain_email_outbox()
+        self.assertEqual(mail.outbox, [])
+
+        held = EmailOutbox.objects.filter(notification__issue=self.issue, notification__type='status_change')
+        self.assertEqual(held.count(), 2)
+        held.update(next_attempt_at=timezone.now())
+        mail.outbox = []
+        drain_email_outbox()
+
+        self.assertCountEqual([m.to[0] for m in mail.outbox], ['reporter@example.com', 'assignee@example.com'])
+        self.assertIn('has been closed', next(m.body for m in mail.outbox if m.to == ['reporter@example.com']))
+
+    @override_settings(NOTIFICATION_COALESCE_WINDOW=0)
+    def test_zero_window_disables_coalescing(self):
+        self._triage()
+        self.assertEqual(
+            Notification.objects.filter(issue=self.issue, type='status_change', recipient=self.assignee).count(),
+            3
+        )
+
+
+class DomainEventTests(TestCase):
+    def setUp(self):
+        self.reporter = User.objects.create_user(email='reporter@example.com', password='password', role='client')
+        self.manager = User.objects.create_user(email='manager@example.com', password='password', role='manager')
+
+    def test_rolled_back_write_has_no_side_effects(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    IssueService.create_issue(self.reporter, {'title': 'Doomed', 'description': 'Desc'})
+                    raise RuntimeError('rollback')
+
+        self.assertEqual(callbacks, [])
+        self.assertFalse(DomainEvent.objects.exists())
+        self.assertFalse(Notification.objects.exists())
+        self.assertFalse(EmailOutbox.objects.exists())
+
+    def test_side_effects_run_after_commit(self):
+        IssueService.create_issue(self.reporter, {'title': 'Queued', 'description': 'Desc'})
+        event = DomainEvent.objects.get()
+        self.assertEqual(event.name, 'issue.created')
+        self.assertFalse(Notification.objects.exists())
+
+        # The periodic drain picks up events whose dispatch never ran
+        self.assertEqual(process_domain_events(), {'processed': 1, 'failed': 0})
+        event.refresh_from_db()
+        self.assertEqual(event.status, 'processed')
+        self.assertCountEqual(
+            Notification.objects.values_list('recipient', flat=True),
+            [self.reporter.id, self.manager.id]
+        )
+
+    @override_settings(DOMAIN_EVENTS_MAX_ATTEMPTS=2)
+    def test_failing_handler_is_retried_then_given_up(self):
+        def broken(payload):
+            Notification.objects.create(recipient=self.manager, message='Partial', type='new_issue')
+            raise ValueError('boom')
+
+        with patch.dict(HANDLERS, {'issue.created': broken}):
+            IssueService.create_issue(self.reporter, {'title': 'Flaky', 'description': 'Desc'})
+            process_domain_events()
+            event = DomainEvent.objects.get()
+            self.assertEqual((event.status, event.attempts), ('pending', 1))
+            self.assertGreater(event.next_attempt_at, timezone.now())
+            # The handler's partial writes are rolled back with its savepoint
+            self.assertFalse(Notification.objects.exists())
+
+            DomainEvent.objects.update(next_attempt_at=timezone.now())
+            process_domain_events()
+
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts), ('failed', 2))
+        self.assertIn('boom', event.last_error)
+
+
+class FlakyEmailBackend(LocMemEmailBackend):
+    """Locmem backend that rejects any address containing 'bounce'."""
+    def send_messages(self, messages):
+        for message in messages:
+            if any('bounce' in address for address in message.to):
+                raise ConnectionError('Mailbox unavailable')
+        return super().send_messages(messages)
+
+
+@override_settings(
+    EMAIL_BACKEND='apps.notifications.tests.FlakyEmailBackend',
+    EMAIL_OUTBOX_BATCH_SIZE=2,
+    EMAIL_OUTBOX_MAX_ATTEMPTS=2,
+)
+class EmailOutboxTests(TestCase):
+    def _queue(self, *addresses):
+        EmailOutbox.objects.bulk_create([
+            EmailOutbox(recipient_email=address, subject='Subject', body='Body')
+            for address in addresses
+        ])
+
+    def test_drain_opens_one_connection_per_batch(self):
+        self._queue('a@example.com', 'b@example.com', 'c@example.com', 'd@example.com', 'e@example.com')
+
+        with patch('apps.notifications.tasks.get_connection', wraps=get_connection) as mock_connection:
+            result = drain_email_outbox()
+
+        self.assertEqual(result, {'sent': 5, 'failed': 0})
+        self.assertEqual(mock_connection.call_count, 3)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertFalse(EmailOutbox.objects.filter(status='pending').exists())
+
+    def test_failed_message_is_retried_with_backoff_then_given_up(self):
+        self._queue('ok@example.com', 'bounce@example.com')
+
+        drain_email_outbox()
+        entry = EmailOutbox.objects.get(recipient_email='bounce@example.com')
+        self.assertEqual(entry.status, 'pending')
+        self.assertEqual(entry.attempts, 1)
+        self.assertGreater(entry.next_attempt_at, entry.created_at)
+        self.assertEqual(EmailOutbox.objects.get(recipient_email='ok@example.com').status, 'sent')
+
+        # Not due yet, so a second drain leaves it alone
+        drain_email_outbox()
+        self.assertEqual(EmailOutbox.objects.get(pk=entry.pk).attempts, 1)
+
+        EmailOutbox.objects.filter(pk=entry.pk).update(next_attempt_at=entry.created_at)
+        drain_email_outbox()
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, 'failed')
+        self.assertEqual(entry.attempts, 2)
+        self.assertIn('Mailbox unavailable', entry.last_error)
+
+
+@override_settings(NOTIFICATION_RETENTION_DAYS=30, NOTIFICATION_RETENTION_PAUSE=0)
+class NotificationRetentionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='retention@example.com', password='password', role='client')
+        Notification.objects.bulk_create([
+            Notification(recipient=self.user, message=f'Old read {i}', type='new_comment', is_read=True)
+            for i in range(5)
+        ] + [
+            Notification(recipient=self.user, message='Old unread', type='new_comment'),
+            Notification(recipient=self.user, message='Recent read', type='new_comment', is_read=True),
+        ])
+        Notification.objects.exclude(message='Recent read').update(created_at=timezone.now() - timedelta(days=60))
+
+    def test_purge_deletes_old_read_notifications_in_chunks(self):
+        result = purge_read_notifications(chunk_size=2)
+
+        self.assertEqual(result['removed'], 5)
+        self.assertFalse(result['archived'])
+        self.assertEqual(
+            sorted(Notification.objects.values_list('message', flat=True)),
+            ['Old unread', 'Recent read']
+        )
+        self.assertFalse(NotificationArchive.objects.exists())
+
+    def test_progress_is_reported_per_chunk(self):
+        progress = []
+        removed = NotificationService.purge_notifications(
+            Notification.objects.filter(is_read=True, created_at__lt=timezone.now() - timedelta(days=30)),
+            chunk_size=2,
+            progress=progress.append
+        )
+        self.assertEqual(removed, 5)
+        self.assertEqual(progress, [2, 4, 5])
+
+    def test_archive_mode_moves_rows(self):
+        result = purge_read_notifications(archive=True)
+
+        self.assertEqual(result['removed'], 5)
+        self.assertEqual(NotificationArchive.objects.filter(recipient=self.user).count(), 5)
+        self.assertEqual(Notification.objects.filter(recipient=self.user).count(), 2)
+
+
+@override_settings(NOTIFICATIONS_STREAM_KEEPALIVE=0.05)
+class NotificationStreamTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='stream@example.com', password='password', role='client')
+        self.token = str(AccessToken.for_user(self.user))
+        self.broker = InProcessBroker(history=2)
+        patcher = patch('apps.notifications.views.get_broker', return_value=self.broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def _read(self, response, chunks):
+        stream = aiter(response.streaming_content)
+        return [
+            (chunk.decode() if isinstance(chunk, bytes) else chunk)
+            for chunk in [await anext(stream) for _ in range(chunks)]
+        ]
+
+    async def test_stream_requires_token(self):
+        response = await AsyncClient().get('/api/v1/notifications/stream/')
+        self.assertEqual(response.status_code, 401)
+
+    async def test_stream_pushes_published_notifications(self):
+        response = await AsyncClient().get(
+            '/api/v1/notifications/stream/', headers={'Authorization': f'Bearer {self.token}'}
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        stream = aiter(response.streaming_content)
+        self.assertIn(b'retry:', await anext(stream))
+        self.assertEqual(await anext(stream), b': keepalive\n\n')
+
+        self.broker.publish(self.user.id, '{"message": "hi"}')
+        event = await anext(stream)
+        self.assertEqual(event, b'id: 1\nevent: notification\ndata: {"message": "hi"}\n\n')
+
+    async def test_stream_resumes_from_last_event_id(self):
+        for i in range(3):
+            self.broker.publish(self.user.id, f'"event {i + 1}"')
+
+        response = await AsyncClient().get(
+            f'/api/v1/notifications/stream/?token={self.token}', headers={'Last-Event-ID': '2'}
+        )
+        retry, replayed = await self._read(response, 2)
+        self.assertEqual(replayed, 'id: 3\nevent: notification\ndata: "event 3"\n\n')
+
+        # Event 1 fell out of the two-event history, so the client must resync
+        response = await AsyncClient().get(
+            f'/api/v1/notifications/stream/?token={self.token}', headers={'Last-Event-ID': '0'}
+        )
+        retry, resync = await self._read(response, 2)
+        self.assertEqual(resync, 'event: resync\ndata: {}\n\n')
+
+
+class BrokerResumeTests(SimpleTestCase):
+    async def test_in_process_history_is_kept_for_recent_users(self):
+        broker = InProcessBroker(history=2, max_users=2)
+        subscription = broker.subscribe('watched')
+        for user_id in ('watched', 'a', 'b', 'c'):
+            broker.publish(user_id, f'"{user_id}"')
+
+        # 'a' was the least recently notified user without an open stream
+        self.assertEqual(list(broker._history), ['watched', 'c'])
+        self.assertEqual(await subscription.get(timeout=1), ('1', '"watched"'))
+        subscription.close()
+
+        # New histories continue past every evicted ID, so resuming from
+        # before the eviction resyncs instead of replaying the wrong events
+        broker.publish('a', '"again"')
+        for user_id in ('a', 'b'):
+            with self.assertRaises(StreamGap):
+                broker.subscribe(user_id, '1')
+        resumed = broker.subscribe('a', broker._history['a'][-1][0])
+        broker.publish('a', '"later"')
+        self.assertEqual((await resumed.get(timeout=1))[1], '"later"')
+        resumed.close()
+
+    async def test_redis_resume_ids_are_checked_before_reading(self):
+        from redis.exceptions import ResponseError
+
+        broker = RedisBroker(url='redis://localhost:6379/15')
+        broker._client = Mock()
+        broker._client.xinfo_stream.return_value = {
+            'last-generated-id': b'1700-5', 'max-deleted-entry-id': b'1600-0', 'first-entry': (b'1600-1', {}),
+        }
+        for last_event_id in ('abc', '1-2-3', '1500-0', '1800-0'):
+            with self.assertRaises(StreamGap, msg=last_event_id):
+                broker.subscribe(1, last_event_id)
+        subscription = broker.subscribe(1, '1600-0')
+        self.assertEqual(subscription.last_id, '1600-0')
+        subscription.close()
+
+        # Servers before Redis 7 only report the first retained entry
+        del broker._client.xinfo_stream.return_value['max-deleted-entry-id']
+        with self.assertRaises(StreamGap):
+            broker.subscribe(1, '1600-0')
+
+        broker._client.xinfo_stream.side_effect = ResponseError('no such key')
+        with self.assertRaises(StreamGap):
+            broker.subscribe(1, '5-0')
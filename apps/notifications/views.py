@@ -5,13 +5,91 @@ from .serializers import NotificationSerializer
 from .models import Notification
 from .services import NotificationService
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import NotFound
+from rest_framework.utils.urls import replace_query_param
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError, AuthenticationFailed
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from asgiref.sync import sync_to_async
+from .broker import get_broker, StreamGap
+from django.db.models import Q
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+from datetime import datetime
+import uuid
+
+class NotificationPagination(PageNumberPagination):
+    """
+    Page-number pagination by default, for existing clients.
+    Passing `cursor` (empty for the first page) switches to keyset pagination
+    on (created_at, id): no COUNT(*) and no OFFSET scan, so deep pages cost
+    the same as the first one.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.cursor_query_param in request.query_params
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        position = self.decode_cursor(request.query_params[self.cursor_query_param])
+        if position:
+            created_at, pk = position
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+        results = list(queryset.order_by('-created_at', '-id')[:page_size + 1])
+        self.has_next = len(results) > page_size
+        self.page = results[:page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(last.created_at, last.id))
+
+    @staticmethod
+    def encode_cursor(created_at, pk):
+        return urlsafe_b64encode(f'{created_at.isoformat()}|{pk}'.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        if not cursor:
+            return None
+        try:
+            created_at, pk = urlsafe_b64decode(cursor.encode()).decode().split('|')
+            return datetime.fromisoformat(created_at), uuid.UUID(pk)
+        except (ValueError, UnicodeDecodeError):
+            raise NotFound('Invalid cursor')
+
 
 class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = NotificationPagination
 
     def get_queryset(self):
-        return Notification.objects.filter(recipient=self.request.user).order_by('-created_at')
+        queryset = Notification.objects.filter(recipient=self.request.user)
+        if self.request.query_params.get('unread', '').lower() == 'true':
+            queryset = queryset.filter(is_read=False)
+        return queryset.order_by('-created_at', '-id')
 
     @action(detail=True, methods=['post'], url_path='mark-read')
     def mark_read(self, request, pk=None):
@@ -22,10 +100,80 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=False, methods=['post'], url_path='mark-all-read')
     def mark_all_read(self, request):
         """Mark all user's notifications as read."""
-        notifications = self.get_queryset().filter(is_read=False)
-        updated_count = notifications.update(is_read=True)
+        updated_count = NotificationService.mark_all_read(request.user)
         
         return Response({
             "status": "success",
             "message": f"{updated_count} notifications marked as read"
-        })
\ No newline at end of file
+        })
+
+    @action(detail=False, methods=['get'], url_path='unread-count')
+    def unread_count(self, request):
+        """Unread badge count, served from the per-user counter."""
+        return Response({
+            "unread_count": NotificationService.get_unread_count(request.user)
+        })
+
+
+async def notification_stream(request):
+    """
+    Server-sent events stream of the current user's new notifications.
+
+    Authenticates with the SimpleJWT access token from the Authorization
+    header, or `?token=` for EventSource clients that cannot set headers.
+    Reconnecting clients resume from the Last-Event-ID header; if those
+    events are no longer retained a `resync` event tells them to refetch.
+    Waiting for events never touches the database.
+    """
+    user = await authenticate_stream_request(request)
+    if user is None:
+        return JsonResponse({"detail": "Authentication credentials were not provided or are invalid."}, status=401)
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    broker = get_broker()
+    resync = False
+    try:
+        subscription = broker.subscribe(user.id, last_event_id)
+    except StreamGap:
+        subscription = broker.subscribe(user.id)
+        resync = True
+
+    response = StreamingHttpResponse(
+        _stream_events(subscription, resync),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Disable proxy buffering (nginx)
+    return response
+
+
+async def _stream_events(subscription, resync=False):
+    keepalive = settings.NOTIFICATIONS_STREAM_KEEPALIVE
+    try:
+        yield 'retry: 5000\n\n'
+        if resync:
+            yield 'event: resync\ndata: {}\n\n'
+        while True:
+            event = await subscription.get(timeout=keepalive)
+            if event is None:
+                yield ': keepalive\n\n'
+                continue
+            event_id, data = event
+            yield f'id: {event_id}\nevent: notification\ndata: {data}\n\n'
+    finally:
+        subscription.close()
+
+
+async def authenticate_stream_request(request):
+    """SimpleJWT user from the Authorization header or ?token=, for SSE views; None if invalid"""
+    authenticator = JWTAuthentication()
+    header = authenticator.get_header(request)
+    raw_token = authenticator.get_raw_token(header) if header else request.GET.get('token')
+    if not raw_token:
+        return None
+
+    try:
+        validated_token = authenticator.get_validated_token(raw_token)
+        return await sync_to_async(authenticator.get_user)(validated_token)
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return None
@@ -0,0 +1,110 @@
+"""
+Concurrent evaluation of independent analytics KPI blocks.
+
+get_analytics_data splits its work into blocks that each make their own
+queries. Outside a transaction they run on a small thread pool, each
+thread on its own database connection, so a dashboard takes as long as
+its slowest block rather than the sum of them. Inside a transaction (a
+test case, or a caller's atomic block) other connections cannot see the
+caller's uncommitted rows, so the blocks run one after another instead,
+each in a savepoint.
+
+The pool is shared by every request and sized by the first caller. A
+block's timeout counts from when it starts running, not from when it was
+queued behind other requests' blocks. A running block cannot be stopped:
+one that times out keeps its thread and database connection until it
+finishes, and the blocks queued behind it wait longer.
+"""
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def run_blocks(blocks, workers, timeout):
+    """
+    Evaluate `blocks` ({name: callable}) and return (results, report).
+    `results` holds the value of every block that finished in time; `report`
+    has {'status': 'ok'|'error'|'timeout', 'seconds': ...} per block, plus
+    'error' for failures. A block still running `timeout` seconds after it
+    started, or still queued `timeout` seconds after it was submitted
+    ('queued': True), is reported as timed out and its result is discarded
+    """
+    if workers <= 1 or len(blocks) <= 1 or connection.in_atomic_block:
+        return _run_inline(blocks)
+
+    pool = _get_pool(workers)
+    tz = timezone.get_current_timezone()
+    submitted = time.monotonic()
+    started = {}
+    pending = {name: pool.submit(_run_block, name, block, tz, started) for name, block in blocks.items()}
+
+    results, report = {}, {}
+    while pending:
+        now = time.monotonic()
+        for name, future in list(pending.items()):
+            if future.done():
+                del pending[name]
+                try:
+                    results[name], seconds = future.result()
+                    report[name] = {'status': 'ok', 'seconds': seconds}
+                except Exception as e:
+                    seconds = round(now - started.get(name, submitted), 3)
+                    report[name] = {'status': 'error', 'error': str(e), 'seconds': seconds}
+            elif name not in started and now >= submitted + timeout:
+                if future.cancel():
+                    del pending[name]
+                    report[name] = {'status': 'timeout', 'queued': True, 'seconds': round(now - submitted, 3)}
+                else:
+                    # Started between the check and the cancel
+                    started.setdefault(name, now)
+            elif name in started and now >= started[name] + timeout:
+                del pending[name]
+                report[name] = {'status': 'timeout', 'seconds': round(now - started[name], 3)}
+        if pending:
+            deadline = min(started.get(name, submitted) + timeout for name in pending)
+            wait(pending.values(), timeout=max(deadline - time.monotonic(), 0), return_when=FIRST_COMPLETED)
+    return results, report
+
+
+def _run_inline(blocks):
+    # In a transaction, a database error in one block (which aborts the whole
+    # transaction on PostgreSQL) is rolled back to the block's savepoint
+    # rather than failing every block after it
+    contain = transaction.atomic if connection.in_atomic_block else nullcontext
+    results, report = {}, {}
+    for name, block in blocks.items():
+        started = time.monotonic()
+        try:
+            with contain():
+                results[name] = block()
+            report[name] = {'status': 'ok', 'seconds': round(time.monotonic() - started, 3)}
+        except Exception as e:
+            report[name] = {'status': 'error', 'error': str(e), 'seconds': round(time.monotonic() - started, 3)}
+    return results, report
+
+
+def _run_block(name, block, tz, started):
+    started[name] = time.monotonic()
+    # Pool threads keep their own connections; drop any that are broken or
+    # past CONN_MAX_AGE, as Django does around each request
+    close_old_connections()
+    try:
+        with timezone.override(tz):
+            return block(), round(time.monotonic() - started[name], 3)
+    finally:
+        close_old_connections()
+
+
+def _get_pool(workers):
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='analytics-kpi')
+        return _pool
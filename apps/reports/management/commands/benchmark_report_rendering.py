@@ -0,0 +1,100 @@
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from apps.issues.models import Issue
+from apps.reports import rendering
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark PDF report rendering: reports per second, peak traced memory per render and '
+        'pool process RSS as the team table grows, for styles rebuilt per report, prebuilt styles '
+        'inline, and the process pool.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--team-sizes', type=int, nargs='+', default=[10, 1000, 10000],
+            help='Team performance rows in each synthetic report'
+        )
+        parser.add_argument('--reports', type=int, default=20, help='Reports rendered per measurement')
+        parser.add_argument('--processes', type=int, default=2, help='Render pool size for the pool mode')
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'mode':>14} {'team':>8} {'reports/s':>10} {'peak_mb':>9} {'pool_rss_mb':>13}"
+        )
+        for size in options['team_sizes']:
+            data = self._analytics(size)
+            for mode in ('rebuild-styles', 'inline', 'pool'):
+                self._measure(mode, data, options['reports'], options['processes'])
+
+    def _measure(self, mode, data, reports, processes):
+        render = {
+            'rebuild-styles': self._render_rebuilding_styles,
+            'inline': rendering.render_pdf,
+            'pool': lambda data: rendering.render_pdf_pooled(data, processes, timeout=600),
+        }[mode]
+        render(data)  # warm-up: imports, styles, pool start-up
+
+        start = time.perf_counter()
+        if mode == 'pool':
+            # Concurrent submissions, as from several Celery worker threads
+            with ThreadPoolExecutor(max_workers=processes * 2) as threads:
+                list(threads.map(render, [data] * reports))
+        else:
+            for _ in range(reports):
+                render(data)
+        elapsed = time.perf_counter() - start
+
+        # Memory in a separate pass; tracemalloc would skew the timing
+        tracemalloc.start()
+        render(data)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        self.stdout.write(
+            f"{mode:>14} {len(data['team_performance']):>8} {reports / elapsed:>10.1f} "
+            f"{peak / 1024 / 1024:>9.1f} {self._pool_rss_mb():>13}"
+        )
+
+    def _pool_rss_mb(self):
+        """Peak RSS of each live pool process (Linux /proc), or n/a"""
+        pool = rendering._pool
+        if pool is None or not pool._processes:
+            return 'n/a'
+        peaks = []
+        for pid in pool._processes:
+            try:
+                with open(f'/proc/{pid}/status') as status:
+                    line = next(line for line in status if line.startswith('VmHWM:'))
+            except (OSError, StopIteration):
+                return 'n/a'
+            peaks.append(f"{int(line.split()[1]) / 1024:.0f}")
+        return '/'.join(peaks)
+
+    def _render_rebuilding_styles(self, data):
+        # Previous behaviour: styles built from scratch for every report
+        rendering._styles = None
+        return rendering.render_pdf(data)
+
+    def _analytics(self, team_size):
+        return {
+            'period_display': 'Jan 01, 2026 - Jan 31, 2026',
+            'summary': {metric: '42' for metric in rendering.SUMMARY_METRICS},
+            'issues_by_status': [
+                {'status': value, 'status_display': label, 'count': 10, 'percentage': 25.0}
+                for value, label in Issue.STATUS_CHOICES
+            ],
+            'issues_by_priority': [
+                {'priority': value, 'priority_display': label, 'count': 10, 'percentage': 25.0}
+                for value, label in Issue.PRIORITY_CHOICES
+            ],
+            'team_performance': [
+                {'name': f'Member {i}', 'total_assigned': 20, 'resolved': 15, 'pending': 5, 'efficiency': 75.0}
+                for i in range(team_size)
+            ],
+        }
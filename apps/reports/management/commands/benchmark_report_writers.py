@@ -0,0 +1,122 @@
+import argparse
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.management.base import BaseCommand
+
+from apps.reports import tasks
+from apps.reports.management.commands.benchmark_report_rendering import Command as RenderingBenchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark peak RSS per generated report file as the team table grows, for the previous '
+        'in-memory writers (string, encoded copy, ContentFile) and the writers that stream into a '
+        'temporary file which storage moves into place. Each measurement runs in a fresh process.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--team-sizes', type=int, nargs='+', default=[1000, 100000, 500000],
+            help='Team performance rows in each synthetic report'
+        )
+        parser.add_argument('--formats', nargs='+', default=['csv', 'json'], choices=['csv', 'json', 'pdf'])
+        parser.add_argument('--measure', nargs=3, metavar=('MODE', 'FORMAT', 'TEAM_SIZE'), help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options['measure']:
+            mode, report_format, team_size = options['measure']
+            self.stdout.write(json.dumps(self._measure(mode, report_format, int(team_size))))
+            return
+
+        self.stdout.write(
+            f"{'format':>6} {'team':>8} {'mode':>9} {'seconds':>8} {'file_mb':>8} {'peak_rss_mb':>12}"
+        )
+        for report_format in options['formats']:
+            for size in options['team_sizes']:
+                for mode in ('memory', 'tempfile'):
+                    result = self._run_child(mode, report_format, size)
+                    self.stdout.write(
+                        f"{report_format:>6} {size:>8} {mode:>9} {result['seconds']:>8.2f} "
+                        f"{result['file_mb']:>8.1f} {result['peak_rss_mb']:>12.1f}"
+                    )
+
+    def _run_child(self, mode, report_format, team_size):
+        completed = subprocess.run(
+            [sys.executable, sys.argv[0], 'benchmark_report_writers',
+             '--measure', mode, report_format, str(team_size)],
+            capture_output=True, text=True, check=True,
+            # PDFs render inline, so the child's RSS includes the render
+            env={**os.environ, 'REPORT_RENDER_PROCESSES': '0'},
+        )
+        # The task module prints progress; the result is the last line
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+
+    def _measure(self, mode, report_format, team_size):
+        """Peak RSS above the baseline while writing and storing one report"""
+        data = RenderingBenchmark()._analytics(team_size)
+        for member in data['team_performance']:
+            member.update(email='member@example.com', role='staff', avg_resolution_time_hours=12.5)
+
+        with tempfile.TemporaryDirectory() as storage_dir, tempfile.TemporaryDirectory() as work_dir:
+            storage = FileSystemStorage(location=storage_dir)
+            baseline = self._reset_peak()
+            start = time.perf_counter()
+            if mode == 'memory':
+                name = self._store_in_memory(storage, report_format, data)
+            else:
+                path = os.path.join(work_dir, f'report.{report_format}')
+                tasks.write_report(report_format, data, None, path)
+                with open(path, 'rb') as rendered:
+                    name = storage.save(f'report.{report_format}', tasks.ReportTempFile(rendered))
+            elapsed = time.perf_counter() - start
+            size = storage.size(name)
+
+        return {
+            'seconds': elapsed,
+            'file_mb': size / 1024 / 1024,
+            'peak_rss_mb': max(self._peak_kb() - baseline, 0) / 1024,
+        }
+
+    def _store_in_memory(self, storage, report_format, data):
+        # Previous behaviour: whole file as a str, encoded, wrapped and copied
+        if report_format == 'json':
+            content = json.dumps(data, indent=2, default=str)
+        elif report_format == 'pdf':
+            content = tasks.render_pdf_pooled(data, processes=0, timeout=600)
+        else:
+            output = io.StringIO()
+            tasks.generate_csv(data, None, output)
+            content = output.getvalue()
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        return storage.save(f'report.{report_format}', ContentFile(content))
+
+    def _reset_peak(self):
+        """Reset the RSS high-water mark where Linux allows it; returns the current RSS in kB"""
+        try:
+            with open('/proc/self/clear_refs', 'w') as clear_refs:
+                clear_refs.write('5')
+        except OSError:
+            pass
+        return self._status_kb('VmRSS:') or resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    def _peak_kb(self):
+        return self._status_kb('VmHWM:') or resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    def _status_kb(self, field):
+        try:
+            with open('/proc/self/status') as status:
+                line = next(line for line in status if line.startswith(field))
+        except (OSError, StopIteration):
+            return None
+        return int(line.split()[1])
+
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_daily_stats(apps, schema_editor):
+    """Populate the rollups from existing rows (RollupService.rebuild on historical models)"""
+    Issue = apps.get_model('issues', 'Issue')
+    Feedback = apps.get_model('feedback', 'Feedback')
+    IssueDailyStats = apps.get_model('reports', 'IssueDailyStats')
+    FeedbackDailyStats = apps.get_model('reports', 'FeedbackDailyStats')
+
+    done = Q(status__in=['resolved', 'closed'], resolved_at__isnull=False)
+    resolution = ExpressionWrapper(F('resolved_at') - F('created_at'), output_field=DurationField())
+    rows = (
+        Issue.objects.annotate(day=TruncDate('created_at')).order_by()
+        .values('day', 'status', 'priority', 'assignee_id')
+        .annotate(total=Count('id'), resolved=Count('id', filter=done), resolution=Sum(resolution, filter=done))
+    )
+    IssueDailyStats.objects.bulk_create([
+        IssueDailyStats(
+            day=row['day'], status=row['status'], priority=row['priority'], assignee_id=row['assignee_id'],
+            issue_count=row['total'], resolved_count=row['resolved'],
+            resolution_seconds=row['resolution'].total_seconds() if row['resolution'] else 0,
+        )
+        for row in rows
+    ], batch_size=1000)
+    FeedbackDailyStats.objects.bulk_create([
+        FeedbackDailyStats(day=row['day'], feedback_count=row['total'])
+        for row in Feedback.objects.annotate(day=TruncDate('created_at')).order_by().values('day').annotate(total=Count('id'))
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0005_report_task_id'),
+        ('issues', '0006_issue_lifecycle_timestamps'),
+        ('feedback', '0004_remove_feedback_converted_to_issue_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedbackDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('feedback_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='IssueDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(max_length=50)),
+                ('priority', models.CharField(max_length=50)),
+                ('issue_count', models.IntegerField(default=0)),
+                ('resolved_count', models.IntegerField(default=0)),
+                ('resolution_seconds', models.FloatField(default=0)),
+                ('assignee', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(condition=models.Q(('assignee__isnull', False)), fields=('day', 'status', 'priority', 'assignee'), name='issue_daily_stats_assigned_key'), models.UniqueConstraint(condition=models.Q(('assignee__isnull', True)), fields=('day', 'status', 'priority'), name='issue_daily_stats_unassigned_key')],
+            },
+        ),
+        migrations.RunPython(backfill_daily_stats, migrations.RunPython.noop),
+    ]
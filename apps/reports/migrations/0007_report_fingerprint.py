@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0006_daily_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='fingerprint',
+            field=models.CharField(blank=True, default='', help_text='Hash of type, format, normalized parameters and data version; identical requests share one file', max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(fields=['fingerprint', 'status'], name='reports_rep_fingerp_97f332_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:53
+
+from django.db import migrations, models
+
+
+def backfill_progress(apps, schema_editor):
+    Report = apps.get_model('reports', 'Report')
+    Report.objects.filter(status='generated').update(progress_stage='done', progress=100)
+    Report.objects.filter(status='failed').update(progress_stage='failed')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0007_report_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='progress',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Percent complete'),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='progress_stage',
+            field=models.CharField(choices=[('queued', 'Queued'), ('querying', 'Querying data'), ('rendering', 'Rendering'), ('storing', 'Storing file'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=20),
+        ),
+        migrations.RunPython(backfill_progress, migrations.RunPython.noop),
+    ]
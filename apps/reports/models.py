@@ -25,6 +25,15 @@ class Report(models.Model):
         ('csv', 'CSV'),
         ('pdf', 'PDF'),
     )
+    
+    STAGE_CHOICES = (
+        ('queued', 'Queued'),
+        ('querying', 'Querying data'),
+        ('rendering', 'Rendering'),
+        ('storing', 'Storing file'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     type = models.CharField(max_length=50, choices=TYPE_CHOICES)
@@ -34,7 +43,13 @@ class Report(models.Model):
     parameters = models.JSONField(default=dict, blank=True)
     result_path = models.FileField(upload_to='reports/', null=True, blank=True)
     error_message = models.TextField(blank=True)
+    progress_stage = models.CharField(max_length=20, choices=STAGE_CHOICES, default='queued')
+    progress = models.PositiveSmallIntegerField(default=0, help_text="Percent complete")
     task_id = models.CharField(max_length=255, blank=True, null=True, help_text="Celery task ID")
+    fingerprint = models.CharField(
+        max_length=64, blank=True, default='',
+        help_text="Hash of type, format, normalized parameters and data version; identical requests share one file"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -42,6 +57,7 @@ class Report(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['user', 'status', 'created_at']),
+            models.Index(fields=['fingerprint', 'status']),
         ]
     
     def __str__(self):
@@ -54,4 +70,51 @@ class Report(models.Model):
     
     def is_ready(self):
         """Check if report is ready for download"""
-        return self.status == 'generated' and bool(self.result_path)
\ No newline at end of file
+        return self.status == 'generated' and bool(self.result_path)
+
+class IssueDailyStats(models.Model):
+    """
+    Issue counts per creation day, status, priority and assignee, kept in step
+    with Issue writes by apps.reports.signals and rebuilt nightly by
+    reconcile_daily_stats. Analytics range sums read from here.
+    """
+    day = models.DateField()
+    status = models.CharField(max_length=50)
+    priority = models.CharField(max_length=50)
+    # Derived data: deleting a user leaves their rows behind (zeroed as their
+    # issues are deleted) for reconcile_daily_stats to drop, rather than
+    # cascading ahead of the issue signals that still update them
+    assignee = models.ForeignKey(
+        User, null=True, blank=True, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+'
+    )
+    issue_count = models.IntegerField(default=0)
+    # Issues in this bucket that are resolved/closed with a resolved_at, and
+    # the sum of their resolved_at - created_at for average resolution time
+    resolved_count = models.IntegerField(default=0)
+    resolution_seconds = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'status', 'priority', 'assignee'],
+                condition=models.Q(assignee__isnull=False),
+                name='issue_daily_stats_assigned_key',
+            ),
+            models.UniqueConstraint(
+                fields=['day', 'status', 'priority'],
+                condition=models.Q(assignee__isnull=True),
+                name='issue_daily_stats_unassigned_key',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.status}/{self.priority}: {self.issue_count}"
+
+
+class FeedbackDailyStats(models.Model):
+    """Feedback count per creation day, maintained like IssueDailyStats"""
+    day = models.DateField(unique=True)
+    feedback_count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.day}: {self.feedback_count}"
@@ -0,0 +1,104 @@
+"""
+Report status snapshots for polling clients.
+
+Every Report save stores a snapshot of its status and progress in the
+cache (see apps.reports.signals). The status endpoint, its long-poll mode
+and the SSE stream read snapshots only, so waiting for a report costs no
+database queries. Workers and web processes must share the cache (Redis)
+for progress to reach clients; the eager/local-memory setup shares one
+process anyway.
+"""
+import asyncio
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Percent complete when each stage starts
+STAGE_PROGRESS = {
+    'queued': 0,
+    'querying': 10,
+    'rendering': 50,
+    'storing': 90,
+    'done': 100,
+}
+TERMINAL_STATUSES = ('generated', 'failed')
+TASK_STATUSES = {
+    'pending': 'PENDING',
+    'processing': 'STARTED',
+    'generated': 'SUCCESS',
+    'failed': 'FAILURE',
+}
+
+
+class ReportProgress:
+    KEY = 'reports:progress:{}'
+
+    @staticmethod
+    def snapshot(report):
+        """The status payload for a report; `version` changes on every save"""
+        return {
+            'id': str(report.id),
+            'user_id': str(report.user_id),
+            'type': report.type,
+            'type_display': report.get_type_display(),
+            'format': report.format,
+            'status': report.status,
+            'status_display': report.get_status_display(),
+            'progress_stage': report.progress_stage,
+            'progress_stage_display': report.get_progress_stage_display(),
+            'progress': report.progress,
+            'created_at': report.created_at.isoformat() if report.created_at else None,
+            'updated_at': report.updated_at.isoformat() if report.updated_at else None,
+            'result_available': report.status == 'generated' and bool(report.result_path),
+            'result_path': report.result_path.url if report.result_path else None,
+            'task_status': TASK_STATUSES.get(report.status, 'UNKNOWN'),
+            'error_message': report.error_message,
+            'version': report.updated_at.isoformat() if report.updated_at else '',
+        }
+
+    @staticmethod
+    def public(snapshot):
+        """The snapshot as returned to clients"""
+        return {key: value for key, value in snapshot.items() if key != 'user_id'}
+
+    @staticmethod
+    def publish(report):
+        cache.set(ReportProgress.KEY.format(report.id), ReportProgress.snapshot(report),
+                  settings.REPORT_STATUS_CACHE_TIMEOUT)
+
+    @staticmethod
+    def get(report_id):
+        """The cached snapshot, or None if it expired or was never published"""
+        return cache.get(ReportProgress.KEY.format(report_id))
+
+    @staticmethod
+    def wait(report_id, version, timeout):
+        """
+        Block until the snapshot's version differs from `version`, the report
+        finishes, or `timeout` seconds pass. Returns the latest snapshot
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            snapshot = ReportProgress.get(report_id)
+            if ReportProgress._changed(snapshot, version) or time.monotonic() >= deadline:
+                return snapshot
+            time.sleep(settings.REPORT_STATUS_POLL_INTERVAL)
+
+    @staticmethod
+    async def await_change(report_id, version, timeout):
+        """Async wait(), for the SSE stream"""
+        deadline = time.monotonic() + timeout
+        while True:
+            snapshot = await cache.aget(ReportProgress.KEY.format(report_id))
+            if ReportProgress._changed(snapshot, version) or time.monotonic() >= deadline:
+                return snapshot
+            await asyncio.sleep(settings.REPORT_STATUS_POLL_INTERVAL)
+
+    @staticmethod
+    def _changed(snapshot, version):
+        return (
+            snapshot is None
+            or snapshot['version'] != version
+            or snapshot['status'] in TERMINAL_STATUSES
+        )
@@ -0,0 +1,236 @@
+"""
+PDF rendering for generated reports.
+
+ReportLab styles are built once per process and reused for every report.
+Rendering runs in a small process pool owned by the worker, so PDF layout
+does not hold up the Celery thread that gathered the data. render_pdf is
+a pure function of the analytics dict, so it can be pickled to the pool;
+keep Django imports out of module level so pool processes start quickly.
+Given an output path, the pool process writes the PDF there itself and
+the bytes never travel back through the pool's pipe.
+"""
+import atexit
+import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from io import BytesIO
+import multiprocessing
+
+SUMMARY_METRICS = [
+    'total_issues', 'open_issues', 'in_progress_issues',
+    'resolved_issues', 'closed_issues', 'team_efficiency',
+    'avg_resolution_time', 'first_response_time',
+    'first_response_time_p90', 'sla_compliance', 'reopen_rate',
+]
+TEAM_ROWS = 10  # top performers shown in the PDF
+
+_styles = None
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_styles():
+    """Paragraph and table styles, built on first use in each process"""
+    global _styles
+    if _styles is None:
+        _styles = _build_styles()
+    return _styles
+
+
+def _build_styles():
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import TableStyle
+
+    sample = getSampleStyleSheet()
+
+    def table_style(header, body):
+        return TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), header),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('BACKGROUND', (0, 1), (-1, -1), body),
+            ('GRID', (0, 0), (-1, -1), 1, colors.lightgrey),
+            ('ALIGN', (1, 1), (-1, -1), 'CENTER'),
+        ])
+
+    return {
+        'normal': sample['Normal'],
+        'title': ParagraphStyle(
+            'CustomTitle', parent=sample['Title'], fontSize=18, spaceAfter=20,
+            alignment=TA_CENTER, textColor=colors.HexColor('#0EA5A4')
+        ),
+        'heading': ParagraphStyle(
+            'CustomHeading', parent=sample['Heading2'], fontSize=14, spaceAfter=10,
+            spaceBefore=15, textColor=colors.HexColor('#334155')
+        ),
+        'footer': ParagraphStyle(
+            'Footer', parent=sample['Italic'], fontSize=9, textColor=colors.gray, alignment=TA_CENTER
+        ),
+        'summary_table': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0EA5A4')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 11),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#F8FAFC')),
+            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#E2E8F0')),
+            ('ALIGN', (1, 1), (1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ]),
+        'status_table': table_style(colors.HexColor('#3B82F6'), colors.beige),
+        'priority_table': table_style(colors.HexColor('#F59E0B'), colors.lavenderblush),
+        'team_table': table_style(colors.HexColor('#10B981'), colors.HexColor('#F0FDF4')),
+    }
+
+
+def render_pdf(data, generated_at=None, output=None):
+    """Render the analytics dict as PDF bytes, or into the file at `output`"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import cm, inch
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, PageBreak
+
+    styles = get_styles()
+    generated_at = generated_at or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    buffer = None if output else BytesIO()
+    doc = SimpleDocTemplate(
+        output or buffer, pagesize=A4, rightMargin=2*cm, leftMargin=2*cm, topMargin=2*cm, bottomMargin=2*cm
+    )
+
+    elements = [
+        Paragraph("CFITP Analytics Dashboard Report", styles['title']),
+        Paragraph(f"<b>Period:</b> {data.get('period_display', 'N/A')}", styles['normal']),
+        Paragraph(f"<b>Generated:</b> {generated_at}", styles['normal']),
+        Spacer(1, 0.5*inch),
+        Paragraph("Summary Metrics", styles['heading']),
+    ]
+
+    summary = data.get('summary', {})
+    summary_data = [['Metric', 'Value']] + [
+        [metric.replace('_', ' ').title(), str(summary[metric])]
+        for metric in SUMMARY_METRICS if metric in summary
+    ]
+    summary_table = Table(summary_data, colWidths=[3*inch, 2*inch], hAlign='LEFT')
+    summary_table.setStyle(styles['summary_table'])
+    elements += [summary_table, Spacer(1, 0.25*inch), PageBreak()]
+
+    for key, label, display_key, value_key in (
+        ('issues_by_status', 'Status', 'status_display', 'status'),
+        ('issues_by_priority', 'Priority', 'priority_display', 'priority'),
+    ):
+        rows = data.get(key, [])
+        if not rows:
+            continue
+        table_data = [[label, 'Count', 'Percentage']] + [
+            [item.get(display_key, item.get(value_key, 'Unknown')), str(item.get('count', 0)),
+             f"{item.get('percentage', 0)}%"]
+            for item in rows
+        ]
+        table = Table(table_data, colWidths=[2*inch, 1.5*inch, 1.5*inch], hAlign='LEFT')
+        table.setStyle(styles[f'{value_key}_table'])
+        elements += [Paragraph(f"Issues by {label}", styles['heading']), table, Spacer(1, 0.25*inch)]
+
+    team_performance = data.get('team_performance', [])
+    if team_performance:
+        team_data = [['Name', 'Assigned', 'Resolved', 'Pending', 'Efficiency %']] + [
+            [member.get('name', 'N/A'), str(member.get('total_assigned', 0)), str(member.get('resolved', 0)),
+             str(member.get('pending', 0)), f"{member.get('efficiency', 0)}%"]
+            for member in team_performance[:TEAM_ROWS]
+        ]
+        team_table = Table(team_data, colWidths=[2.5*inch, 1*inch, 1*inch, 1*inch, 1*inch], hAlign='LEFT')
+        team_table.setStyle(styles['team_table'])
+        elements += [Paragraph("Team Performance", styles['heading']), team_table]
+
+    elements += [
+        Spacer(1, 0.5*inch),
+        Paragraph(
+            "<i>Note: This report was generated automatically by the CFITP system. "
+            "All data is based on real-time database records.</i>",
+            styles['footer']
+        ),
+    ]
+    doc.build(elements)
+    return buffer.getvalue() if buffer else None
+
+
+def render_pdf_pooled(data, processes, timeout, output=None):
+    """
+    Render in the process pool (created on first use, `processes` workers).
+    With processes=0, in a daemonic process (a Celery prefork child cannot
+    start children of its own), or if the pool cannot be started or has
+    died, render in this process instead
+    """
+    if not processes or multiprocessing.current_process().daemon:
+        return render_pdf(data, output=output)
+    # Only the top team rows are drawn; don't pickle the rest to the pool
+    data = {**data, 'team_performance': data.get('team_performance', [])[:TEAM_ROWS]}
+    # The pool writes its own file, moved to `output` only once complete: a
+    # render that outlives the timeout keeps running and must not race
+    # whatever the caller writes to `output` instead
+    partial = f'{output}.{uuid.uuid4().hex}.part' if output else None
+    pool = None
+    try:
+        pool = _get_pool(processes)
+        future = pool.submit(render_pdf, data, None, partial)
+    except Exception:
+        if pool is not None:
+            _reset_pool(pool)
+        return render_pdf(data, output=output)
+    try:
+        pdf = future.result(timeout=timeout)
+    except BrokenProcessPool:
+        _reset_pool(pool)
+        _discard_when_done(future, partial)
+        return render_pdf(data, output=output)
+    except BaseException:
+        # A running render cannot be cancelled; its file goes when it finishes
+        future.cancel()
+        _discard_when_done(future, partial)
+        raise
+    if partial:
+        os.replace(partial, output)
+    return pdf
+
+
+def _discard_when_done(future, path):
+    """Remove the file an abandoned render writes, once the render is over"""
+    def discard(_future):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    if path:
+        future.add_done_callback(discard)
+
+
+def _get_pool(processes):
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a worker that holds DB connections and threads is unsafe
+            _pool = ProcessPoolExecutor(
+                max_workers=processes,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=get_styles,
+            )
+        return _pool
+
+
+def _reset_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+@atexit.register
+def _shutdown_pool():
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
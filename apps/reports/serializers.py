@@ -15,12 +15,12 @@ class ReportSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'type', 'type_display', 'format', 'format_display',
             'user', 'user_email', 'user_name', 'status', 'status_display',
-            'parameters', 'result_path', 'error_message',
-            'created_at', 'updated_at'
+            'parameters', 'result_path', 'error_message', 'fingerprint',
+            'progress_stage', 'progress', 'created_at', 'updated_at'
         ]
         read_only_fields = [
             'id', 'status', 'status_display', 'result_path', 
-            'error_message', 'created_at', 'updated_at','user',
+            'error_message', 'fingerprint', 'progress_stage', 'progress', 'created_at', 'updated_at','user',
             'user_email', 'user_name', 'type_display', 'format_display'
         ]
     
@@ -1,9 +1,26 @@
-from django.db.models import Count, Q, Avg
-from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q, Avg, Max, Sum, F, DateField, DurationField, ExpressionWrapper
+from django.db.models.functions import Coalesce, TruncDate, TruncMonth, TruncWeek
+from datetime import datetime, time, timedelta
+import csv
+import hashlib
+import io
+import json
+import math
+import time as time_module
+import zlib
 from apps.issues.models import Issue
+from apps.issues.services import SlaService
 from apps.feedback.models import Feedback
 from apps.users.models import User
 from django.utils import timezone
+from CFIT.cache import ResultCache
+from .executor import run_blocks
+from .models import Report, IssueDailyStats, FeedbackDailyStats
+
+DONE_STATUSES = ['resolved', 'closed']
 
 class ReportService:
     """
@@ -20,11 +37,11 @@ class ReportService:
         Returns structured data with all KPIs, charts, and performance metrics
         """
         
-        # Set default date range if not provided
+        # Set default date range if not provided (whole days, so the rollup applies)
         if not start_date:
-            start_date = timezone.now() - timedelta(days=30)
+            start_date = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=30)
         if not end_date:
-            end_date = timezone.now()
+            end_date = timezone.localtime().replace(hour=23, minute=59, second=59, microsecond=999999)
         
         # Ensure timezone awareness
         if timezone.is_naive(start_date):
@@ -34,42 +51,74 @@ class ReportService:
         
         # Base date filter for all queries
         base_filter = Q(created_at__gte=start_date) & Q(created_at__lte=end_date)
-        issues_qs = Issue.objects.filter(base_filter)
-        
-        # Apply optional filters
-        if priority_filter and priority_filter != ['']:
-            issues_qs = issues_qs.filter(priority__in=priority_filter)
-        
-        if status_filter and status_filter != ['']:
-            issues_qs = issues_qs.filter(status__in=status_filter)
+        issues_qs = ReportService._apply_issue_filters(
+            Issue.objects.filter(base_filter), priority_filter, status_filter, high_priority_only
+        )
         
         if sla_only:
-            issues_qs = issues_qs.filter(
-                Q(due_date__lt=timezone.now()) |
-                Q(due_date__lt=timezone.now() + timedelta(hours=24))
-            )
-        
-        if high_priority_only:
-            issues_qs = issues_qs.filter(priority__in=['high', 'critical'])
-        
-        # Basic issue counts by status
-        total_issues = issues_qs.count()
-        open_issues = issues_qs.filter(status='open').count()
-        in_progress = issues_qs.filter(status='in_progress').count()
-        resolved = issues_qs.filter(status='resolved').count()
-        closed = issues_qs.filter(status='closed').count()
+            issues_qs = ReportService._apply_sla_filter(issues_qs)
+        
+        # Counts come from the daily rollup when the range is whole days and
+        # every filter is a rollup column; otherwise from the raw rows
+        days = None if sla_only else RollupService.day_range(start_date, end_date)
+        
+        def issue_counts():
+            if days:
+                stats_qs = ReportService._apply_issue_filters(
+                    IssueDailyStats.objects.filter(day__range=days), priority_filter, status_filter, high_priority_only
+                )
+                return (ReportService._get_issue_breakdown(stats_qs, tally=RollupService.tally),
+                        RollupService.avg_resolution_hours(stats_qs))
+            # Every status/priority/KPI count over issues_qs in a single query
+            return (ReportService._get_issue_breakdown(issues_qs),
+                    ReportService._calculate_avg_resolution_time(issues_qs))
+        
+        def feedback_stats():
+            feedback_qs = Feedback.objects.filter(base_filter)
+            if days:
+                total_feedback = FeedbackDailyStats.objects.filter(day__range=days).aggregate(
+                    total=Coalesce(Sum('feedback_count'), 0)
+                )['total']
+            else:
+                total_feedback = feedback_qs.count()
+            return total_feedback, ReportService._calculate_avg_satisfaction(feedback_qs)
+        
+        # Independent blocks run concurrently; a block that fails or times out
+        # leaves its KPIs empty and is listed under 'partial'
+        results, kpi_report = run_blocks({
+            'issue_counts': issue_counts,
+            'first_response': lambda: ReportService._calculate_first_response_stats(issues_qs),
+            'sla': lambda: (SlaService.summary(issues_qs), SlaService.attention(issues_qs)),
+            'team_performance': lambda: ReportService._get_team_performance_data(start_date, end_date, days=days),
+            'feedback': feedback_stats,
+            'active_users': lambda: User.objects.filter(is_active=True).count(),
+        }, workers=settings.ANALYTICS_KPI_WORKERS, timeout=settings.ANALYTICS_KPI_TIMEOUT)
+        
+        breakdown, avg_resolution_time = results.get('issue_counts') or (ReportService._empty_breakdown(), 0.0)
+        first_response = results.get('first_response') or {'avg': 0.0, 'p50': 0.0, 'p90': 0.0}
+        sla, sla_attention = results.get('sla') or ({'compliance': 100.0, 'breached': 0, 'at_risk': 0}, [])
+        team_performance = results.get('team_performance') or []
+        total_feedback, avg_satisfaction = results.get('feedback') or (0, "N/A")
+        active_users = results.get('active_users', 0)
+        
+        total_issues = breakdown['total']
+        open_issues = breakdown['status']['open']
+        in_progress = breakdown['status']['in_progress']
+        resolved = breakdown['status']['resolved']
+        closed = breakdown['status']['closed']
         
         # Calculate KPIs
-        team_efficiency = ReportService._calculate_team_efficiency(issues_qs)
-        first_response_time = ReportService._calculate_first_response_time(issues_qs)
-        reopen_rate = ReportService._calculate_reopen_rate(issues_qs, resolved, closed)
-        sla_compliance = ReportService._calculate_sla_compliance(issues_qs)
-        avg_resolution_time = ReportService._calculate_avg_resolution_time(issues_qs)
+        team_efficiency = ReportService._calculate_team_efficiency(
+            breakdown['assigned'], breakdown['resolved_assigned']
+        )
+        first_response_time = first_response['avg']
+        reopen_rate = ReportService._calculate_reopen_rate(breakdown['reopened'], resolved, closed)
+        sla_compliance = sla['compliance']
         
         # Generate issues by status breakdown
         issues_by_status = []
         for status_val, display_name in Issue.STATUS_CHOICES:
-            count = issues_qs.filter(status=status_val).count()
+            count = breakdown['status'][status_val]
             if count > 0 or total_issues == 0:
                 percentage = round((count / total_issues * 100), 1) if total_issues > 0 else 0
                 issues_by_status.append({
@@ -82,7 +131,7 @@ class ReportService:
         # Generate issues by priority breakdown
         issues_by_priority = []
         for pri, display_name in Issue.PRIORITY_CHOICES:
-            count = issues_qs.filter(priority=pri).count()
+            count = breakdown['priority'][pri]
             percentage = round((count / total_issues * 100), 1) if total_issues > 0 else 0
             issues_by_priority.append({
                 'priority': pri,
@@ -91,14 +140,6 @@ class ReportService:
                 'percentage': percentage
             })
         
-        # Generate team performance data
-        team_performance = ReportService._get_team_performance_data(start_date, end_date)
-        
-        # Feedback analysis
-        feedback_qs = Feedback.objects.filter(base_filter)
-        total_feedback = feedback_qs.count()
-        avg_satisfaction = ReportService._calculate_avg_satisfaction(feedback_qs)
-        
         # Compile final response
         return {
             'summary': {
@@ -108,12 +149,16 @@ class ReportService:
                 'resolved_issues': resolved,
                 'closed_issues': closed,
                 'total_feedback': total_feedback,
-                'active_users': User.objects.filter(is_active=True).count(),
+                'active_users': active_users,
                 
                 'avg_resolution_time': f"{avg_resolution_time:.1f}h",
                 'avg_resolution_time_hours': avg_resolution_time,
                 'first_response_time': f"{first_response_time:.1f}h",
                 'first_response_time_hours': first_response_time,
+                'first_response_time_p50': f"{first_response['p50']:.1f}h",
+                'first_response_time_p50_hours': first_response['p50'],
+                'first_response_time_p90': f"{first_response['p90']:.1f}h",
+                'first_response_time_p90_hours': first_response['p90'],
                 'team_efficiency': f"{team_efficiency:.1f}%",
                 'team_efficiency_percentage': team_efficiency,
                 'reopen_rate': f"{reopen_rate:.1f}%",
@@ -125,49 +170,176 @@ class ReportService:
             'issues_by_status': issues_by_status,
             'issues_by_priority': issues_by_priority,
             'team_performance': team_performance,
+            'sla': {
+                'breached_open_issues': sla['breached'],
+                'at_risk_issues': sla['at_risk'],
+                'attention': sla_attention,
+            },
             'period_display': f"{start_date.strftime('%b %d, %Y')} - {end_date.strftime('%b %d, %Y')}",
             'generated_at': timezone.now().isoformat(),
+            'partial': sorted(name for name, block in kpi_report.items() if block['status'] != 'ok'),
+            'kpi_timings': kpi_report,
         }
     
     @staticmethod
-    def _get_team_performance_data(start_date, end_date):
+    def _apply_issue_filters(qs, priority_filter, status_filter, high_priority_only):
+        """Apply the optional priority/status filters to issues or rollup rows"""
+        if priority_filter and priority_filter != ['']:
+            qs = qs.filter(priority__in=priority_filter)
+        
+        if status_filter and status_filter != ['']:
+            qs = qs.filter(status__in=status_filter)
+        
+        if high_priority_only:
+            qs = qs.filter(priority__in=['high', 'critical'])
+        return qs
+    
+    @staticmethod
+    def _apply_sla_filter(qs):
+        """Issues past their SLA deadline or due within ISSUE_SLA_AT_RISK_HOURS"""
+        return qs.filter(SlaService.due_soon())
+    
+    @staticmethod
+    def fingerprint(report_type, report_format, parameters):
+        """
+        Hash of everything a generated report depends on: type, format,
+        normalized parameters and the current version of the data it reads
+        """
+        normalized = {}
+        for key, value in sorted((parameters or {}).items()):
+            if isinstance(value, str) and key in ('priority', 'status'):
+                value = value.split(',')
+            if isinstance(value, (list, tuple)):
+                value = sorted(str(item).strip() for item in value if str(item).strip())
+            if value in ('', None, [], False):
+                continue
+            normalized[key] = value
+        if not normalized.get('start_date') or not normalized.get('end_date'):
+            # Default ranges are relative to today
+            normalized['as_of'] = timezone.localdate().isoformat()
+        
+        payload = json.dumps({
+            'type': report_type,
+            'format': report_format,
+            'parameters': normalized,
+            'data_version': ReportService._data_version(),
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    @staticmethod
+    def _data_version():
+        """
+        Latest update and row count of every model reports read, from the
+        database itself, so it survives cache flushes and differs per write
+        (saves bump updated_at, deletes change the count)
+        """
+        version = {}
+        for model in (Issue, Feedback, User):
+            stats = model.objects.order_by().aggregate(latest=Max('updated_at'), rows=Count('pk'))
+            version[model._meta.label_lower] = [stats['latest'], stats['rows']]
+        return version
+    
+    @staticmethod
+    def deduplicate(report):
+        """
+        Fingerprint a new report and, if an identical one exists, reuse its
+        file ('reused') or follow its running task ('attached'). Returns None
+        when this report should be generated
+        """
+        fingerprint = ReportService.fingerprint(report.type, report.format, report.parameters)
+        report.fingerprint = fingerprint
+        lock_key = f'reports:fingerprint:{fingerprint}'
+        # Serialize concurrent identical requests for the moment it takes to
+        # decide. If the holder outlives its lock timeout, generate this one
+        # independently rather than deciding without the lock
+        deadline = time_module.monotonic() + settings.REPORT_DEDUP_LOCK_TIMEOUT
+        locked = cache.add(lock_key, 1, settings.REPORT_DEDUP_LOCK_TIMEOUT)
+        while not locked and time_module.monotonic() < deadline:
+            time_module.sleep(0.1)
+            locked = cache.add(lock_key, 1, settings.REPORT_DEDUP_LOCK_TIMEOUT)
+        if not locked:
+            report.save(update_fields=['fingerprint', 'updated_at'])
+            return None
+        try:
+            outcome = None
+            now = timezone.now()
+            in_flight_since = now - timedelta(seconds=settings.REPORT_DEDUP_IN_FLIGHT_TIMEOUT)
+            # Writes that bypass updated_at (queryset.update) are not in the
+            # data version, so old files are not reused however they match
+            fresh_since = now - timedelta(seconds=settings.REPORT_DEDUP_REUSE_MAX_AGE)
+            candidates = Report.objects.filter(fingerprint=fingerprint).exclude(pk=report.pk).filter(
+                Q(status='generated', updated_at__gte=fresh_since) |
+                Q(status__in=['pending', 'processing'], updated_at__gte=in_flight_since)
+            ).order_by('-created_at')
+            for existing in candidates:
+                if existing.status == 'generated':
+                    if existing.result_path and existing.result_path.storage.exists(existing.result_path.name):
+                        report.result_path.name = existing.result_path.name
+                        report.status = 'generated'
+                        report.progress_stage, report.progress = 'done', 100
+                        outcome = 'reused'
+                        break
+                else:
+                    report.task_id = existing.task_id
+                    report.status = existing.status
+                    report.progress_stage, report.progress = existing.progress_stage, existing.progress
+                    outcome = 'attached'
+                    break
+            report.save(update_fields=[
+                'fingerprint', 'result_path', 'status', 'task_id', 'progress_stage', 'progress', 'updated_at'
+            ])
+            return outcome
+        finally:
+            # Only reached holding the lock, which no other request can hold
+            cache.delete(lock_key)
+    
+    @staticmethod
+    def _get_team_performance_data(start_date, end_date, days=None):
         """
         Generate performance data for all staff and manager users
-        Includes assigned, resolved, pending counts and efficiency metrics
+        Includes assigned, resolved, pending counts and efficiency metrics.
+        One GROUP BY assignee query plus one for the users, whatever the team size;
+        the grouped query reads the daily rollup when `days` is given
         """
         team_performance = []
         
+        if days:
+            stats = RollupService.team_stats(days)
+        else:
+            stats = (
+                Issue.objects.filter(
+                    assignee__isnull=False,
+                    created_at__gte=start_date,
+                    created_at__lte=end_date
+                )
+                .order_by()
+                .values('assignee_id')
+                .annotate(
+                    assigned_count=Count('id'),
+                    resolved_count=Count('id', filter=Q(status__in=DONE_STATUSES)),
+                    pending_count=Count('id', filter=Q(status__in=['open', 'in_progress'])),
+                    avg_resolution=Avg(
+                        ReportService._resolution_time(),
+                        filter=Q(status__in=DONE_STATUSES, resolved_at__isnull=False)
+                    ),
+                )
+            )
+        stats = {row['assignee_id']: row for row in stats}
+        
         staff_users = User.objects.filter(
             role__in=['staff', 'manager'],
             is_active=True
-        )
+        ).only('id', 'email', 'first_name', 'last_name', 'role')
         
         for staff in staff_users:
-            assigned_count = Issue.objects.filter(
-                assignee=staff,
-                created_at__gte=start_date,
-                created_at__lte=end_date
-            ).count()
-            
-            resolved_count = Issue.objects.filter(
-                assignee=staff,
-                status__in=['resolved', 'closed'],
-                created_at__gte=start_date,
-                created_at__lte=end_date
-            ).count()
-            
-            pending_count = Issue.objects.filter(
-                assignee=staff,
-                status__in=['open', 'in_progress'],
-                created_at__gte=start_date,
-                created_at__lte=end_date
-            ).count()
+            row = stats.get(staff.id, {})
+            assigned_count = row.get('assigned_count', 0)
+            resolved_count = row.get('resolved_count', 0)
+            pending_count = row.get('pending_count', 0)
             
             efficiency = round((resolved_count / assigned_count * 100), 1) if assigned_count > 0 else 0
             
-            avg_resolution = ReportService._calculate_staff_avg_resolution(
-                staff, start_date, end_date
-            )
+            avg_resolution = ReportService._duration_hours(row.get('avg_resolution'))
             
             team_performance.append({
                 'id': str(staff.id),
@@ -187,88 +359,88 @@ class ReportService:
         return team_performance
     
     @staticmethod
-    def _calculate_staff_avg_resolution(staff, start_date, end_date):
+    def _duration_hours(duration):
+        """Convert an aggregated duration (timedelta or None) to hours, rounded to 0.1"""
+        if not duration:
+            return 0.0
+        return round(duration.total_seconds() / 3600, 1)
+    
+    @staticmethod
+    def _get_issue_breakdown(issues_qs, tally=None):
         """
-        Calculate average resolution time for a specific staff member
+        Count issues per status and priority, plus the assigned/reopened
+        counts the KPIs need, with conditional aggregates in one query.
+        `tally(filter)` builds each count; IssueDailyStats rows pass RollupService.tally
         """
-        avg_resolution = 0
-        resolved_issues = Issue.objects.filter(
-            assignee=staff,
-            status__in=['resolved', 'closed'],
-            created_at__gte=start_date,
-            created_at__lte=end_date
-        )
-        
-        if resolved_issues.exists():
-            total_hours = 0
-            count = 0
-            
-            for issue in resolved_issues:
-                if hasattr(issue, 'resolved_at') and issue.resolved_at:
-                    resolution_time = issue.resolved_at - issue.created_at
-                elif issue.updated_at and issue.created_at:
-                    resolution_time = issue.updated_at - issue.created_at
-                else:
-                    continue
-                
-                hours = resolution_time.total_seconds() / 3600
-                total_hours += hours
-                count += 1
-            
-            if count > 0:
-                avg_resolution = round(total_hours / count, 1)
-        
-        return avg_resolution
+        tally = tally or (lambda condition=None: Count('id', filter=condition))
+        aggregates = {
+            'total': tally(),
+            'assigned': tally(Q(assignee__isnull=False)),
+            'resolved_assigned': tally(Q(assignee__isnull=False, status__in=DONE_STATUSES)),
+            'reopened': tally(Q(status='reopened')),
+        }
+        for status_val, _ in Issue.STATUS_CHOICES:
+            aggregates[f'status__{status_val}'] = tally(Q(status=status_val))
+        for pri, _ in Issue.PRIORITY_CHOICES:
+            aggregates[f'priority__{pri}'] = tally(Q(priority=pri))
+        
+        counts = issues_qs.order_by().aggregate(**aggregates)
+        breakdown = {'status': {}, 'priority': {}}
+        for key, value in counts.items():
+            group, _, name = key.partition('__')
+            if name:
+                breakdown[group][name] = value
+            else:
+                breakdown[key] = value
+        return breakdown
+    
+    @staticmethod
+    def _empty_breakdown():
+        """_get_issue_breakdown's shape with every count zero"""
+        return {
+            'total': 0, 'assigned': 0, 'resolved_assigned': 0, 'reopened': 0,
+            'status': {status_val: 0 for status_val, _ in Issue.STATUS_CHOICES},
+            'priority': {pri: 0 for pri, _ in Issue.PRIORITY_CHOICES},
+        }
     
     @staticmethod
-    def _calculate_team_efficiency(issues_qs):
+    def _calculate_team_efficiency(assigned_count, resolved_assigned):
         """
         Calculate team efficiency percentage
         Efficiency = (resolved assigned issues / total assigned issues) * 100
         """
-        assigned_issues = issues_qs.filter(assignee__isnull=False)
-        assigned_count = assigned_issues.count()
-        resolved_assigned = assigned_issues.filter(
-            status__in=['resolved', 'closed']
-        ).count()
-        
         if assigned_count > 0:
             return round((resolved_assigned / assigned_count) * 100, 1)
         return 0.0
     
     @staticmethod
-    def _calculate_first_response_time(issues_qs):
+    def _calculate_first_response_stats(issues_qs):
         """
-        Calculate average first response time in hours
+        Mean, median (p50) and p90 first response time in hours.
+        first_response_at is the earliest non-reporter comment, so this is one
+        aggregate plus one single-row lookup per percentile
         """
-        issues_with_comments = issues_qs.filter(
-            comments__isnull=False
-        ).distinct()
-        
-        if not issues_with_comments.exists():
-            return 0.0
-        
-        total_hours = 0
-        count = 0
-        
-        for issue in issues_with_comments:
-            first_comment = issue.comments.order_by('created_at').first()
-            if first_comment and issue.created_at:
-                response_time = first_comment.created_at - issue.created_at
-                hours = response_time.total_seconds() / 3600
-                total_hours += hours
-                count += 1
-        
-        return round(total_hours / count, 1) if count > 0 else 0.0
+        responded = issues_qs.filter(first_response_at__isnull=False).annotate(
+            response_time=ExpressionWrapper(F('first_response_at') - F('created_at'), output_field=DurationField())
+        ).order_by()
+        stats = responded.aggregate(avg=Avg('response_time'), count=Count('id'))
+        
+        result = {'avg': ReportService._duration_hours(stats['avg']), 'p50': 0.0, 'p90': 0.0}
+        if stats['count']:
+            ordered = responded.order_by('response_time').values_list('response_time', flat=True)
+            for key, percentile in (('p50', 0.5), ('p90', 0.9)):
+                # Nearest-rank percentile
+                rank = max(math.ceil(percentile * stats['count']) - 1, 0)
+                result[key] = ReportService._duration_hours(ordered[rank])
+        return result
     
     @staticmethod
-    def _calculate_reopen_rate(issues_qs, resolved_count, closed_count):
+    def _calculate_reopen_rate(reopened_count, resolved_count, closed_count):
         """
         Calculate issue reopen rate percentage
         Reopen rate = (reopened issues / total resolved issues) * 100
         """
         total_resolved = resolved_count + closed_count
-        reopened_count = issues_qs.filter(status='reopened').count()
         
         if total_resolved > 0:
             return round((reopened_count / total_resolved) * 100, 1)
@@ -277,54 +449,27 @@ class ReportService:
     @staticmethod
     def _calculate_sla_compliance(issues_qs):
         """
-        Calculate SLA compliance percentage
+        Calculate SLA compliance percentage: issues with a deadline that were
+        neither resolved after it nor are still open past it
         """
-        issues_with_due_date = issues_qs.exclude(due_date__isnull=True)
-        
-        if not issues_with_due_date.exists():
-            return 100.0
-        
-        compliant_count = 0
-        current_time = timezone.now()
-        
-        for issue in issues_with_due_date:
-            if issue.status in ['resolved', 'closed'] and issue.resolved_at:
-                if issue.resolved_at <= issue.due_date:
-                    compliant_count += 1
-            elif issue.status in ['open', 'in_progress']:
-                if current_time <= issue.due_date:
-                    compliant_count += 1
-        
-        return round((compliant_count / issues_with_due_date.count()) * 100, 1)
+        return SlaService.summary(issues_qs)['compliance']
     
     @staticmethod
     def _calculate_avg_resolution_time(issues_qs):
         """
         Calculate average resolution time in hours for resolved issues
         """
-        resolved_issues = issues_qs.filter(
-            status__in=['resolved', 'closed']
-        )
-        
-        if not resolved_issues.exists():
-            return 0.0
-        
-        total_hours = 0
-        count = 0
-        
-        for issue in resolved_issues:
-            if hasattr(issue, 'resolved_at') and issue.resolved_at:
-                resolution_time = issue.resolved_at - issue.created_at
-            elif issue.updated_at and issue.created_at:
-                resolution_time = issue.updated_at - issue.created_at
-            else:
-                continue
-            
-            hours = resolution_time.total_seconds() / 3600
-            total_hours += hours
-            count += 1
+        avg = issues_qs.filter(
+            status__in=['resolved', 'closed'],
+            resolved_at__isnull=False
+        ).order_by().aggregate(avg=Avg(ReportService._resolution_time()))['avg']
         
-        return round(total_hours / count, 1) if count > 0 else 0.0
+        return ReportService._duration_hours(avg)
+    
+    @staticmethod
+    def _resolution_time():
+        """resolved_at - created_at as a database-side duration"""
+        return ExpressionWrapper(F('resolved_at') - F('created_at'), output_field=DurationField())
     
     @staticmethod
     def _calculate_avg_satisfaction(feedback_qs):
@@ -340,4 +485,347 @@ class ReportService:
                 return round(avg_rating, 1)
             return "N/A"
         except:
-            return "N/A"
\ No newline at end of file
+            return "N/A"
+
+
+class RollupService:
+    """
+    Maintains IssueDailyStats and FeedbackDailyStats. Rows are bucketed by the
+    local date of created_at, the same day TruncDate gives in the current time zone
+    """
+
+    @staticmethod
+    def issue_bucket(issue):
+        """
+        (day, status, priority, assignee_id, resolution seconds or None) that
+        an issue counts towards, or None before it has been saved
+        """
+        if issue.created_at is None:
+            return None
+        seconds = None
+        if issue.status in DONE_STATUSES and issue.resolved_at:
+            seconds = (issue.resolved_at - issue.created_at).total_seconds()
+        return (
+            timezone.localdate(issue.created_at), issue.status, issue.priority,
+            issue.assignee_id, seconds
+        )
+
+    @staticmethod
+    def move_issue(old_bucket, new_bucket):
+        """Move one issue between buckets; either side may be None (create/delete)"""
+        if old_bucket == new_bucket:
+            return
+        if old_bucket:
+            RollupService._add_issue(old_bucket, -1)
+        if new_bucket:
+            RollupService._add_issue(new_bucket, 1)
+
+    @staticmethod
+    def _add_issue(bucket, sign):
+        day, status, priority, assignee_id, seconds = bucket
+        RollupService._upsert(
+            IssueDailyStats,
+            {'day': day, 'status': status, 'priority': priority, 'assignee_id': assignee_id},
+            issue_count=sign,
+            resolved_count=sign if seconds is not None else 0,
+            resolution_seconds=sign * (seconds or 0),
+        )
+
+    @staticmethod
+    def add_feedback(created_at, sign=1):
+        """Count a created (+1) or deleted (-1) feedback"""
+        RollupService._upsert(FeedbackDailyStats, {'day': timezone.localdate(created_at)}, feedback_count=sign)
+
+    @staticmethod
+    def _upsert(model, key, **deltas):
+        """Add deltas to the row for key with an UPDATE, creating the row if it does not exist and the deltas are positive"""
+        updates = {field: F(field) + value for field, value in deltas.items()}
+        if model.objects.filter(**key).update(**updates):
+            return
+        if any(value < 0 for value in deltas.values()):
+            # Nothing to take away from: the rollup has already drifted, and
+            # a negative row would only add to it. reconcile_daily_stats repairs it
+            return
+        try:
+            with transaction.atomic():
+                model.objects.create(**key, **deltas)
+        except IntegrityError:
+            # Another transaction created the row first
+            model.objects.filter(**key).update(**updates)
+
+    @staticmethod
+    def rebuild(since=None):
+        """
+        Recompute rollup rows from the raw issues and feedback, for days from
+        `since` on or for all history. Corrects drift from writes that skip
+        model signals (queryset.update(), raw SQL). Returns the rows written
+        """
+        issues, feedback = Issue.objects.all(), Feedback.objects.all()
+        issue_rows, feedback_rows = IssueDailyStats.objects.all(), FeedbackDailyStats.objects.all()
+        if since:
+            start = timezone.make_aware(datetime.combine(since, time.min))
+            issues, feedback = issues.filter(created_at__gte=start), feedback.filter(created_at__gte=start)
+            issue_rows, feedback_rows = issue_rows.filter(day__gte=since), feedback_rows.filter(day__gte=since)
+
+        done = Q(status__in=DONE_STATUSES, resolved_at__isnull=False)
+        with transaction.atomic():
+            issue_stats = [
+                IssueDailyStats(
+                    day=row['day'], status=row['status'], priority=row['priority'],
+                    assignee_id=row['assignee_id'], issue_count=row['total'],
+                    resolved_count=row['resolved'],
+                    resolution_seconds=row['resolution'].total_seconds() if row['resolution'] else 0,
+                )
+                for row in issues.annotate(day=TruncDate('created_at')).order_by()
+                .values('day', 'status', 'priority', 'assignee_id')
+                .annotate(
+                    total=Count('id'),
+                    resolved=Count('id', filter=done),
+                    resolution=Sum(ReportService._resolution_time(), filter=done),
+                )
+            ]
+            feedback_stats = [
+                FeedbackDailyStats(day=row['day'], feedback_count=row['total'])
+                for row in feedback.annotate(day=TruncDate('created_at')).order_by()
+                .values('day').annotate(total=Count('id'))
+            ]
+            issue_rows.delete()
+            feedback_rows.delete()
+            IssueDailyStats.objects.bulk_create(issue_stats, batch_size=1000)
+            FeedbackDailyStats.objects.bulk_create(feedback_stats, batch_size=1000)
+            ResultCache.invalidate(Issue._meta.label_lower, Feedback._meta.label_lower)
+        return len(issue_stats) + len(feedback_stats)
+
+    @staticmethod
+    def day_range(start_date, end_date):
+        """
+        (first_day, last_day) when [start_date, end_date] covers whole local
+        days, so rollup sums equal the raw range counts; otherwise None.
+        An end at 23:59:59 or in the future counts as the end of its day
+        """
+        start, end = timezone.localtime(start_date), timezone.localtime(end_date)
+        if start.time() != time.min:
+            return None
+        if end.time() < time(23, 59, 59) and end < timezone.now():
+            return None
+        return start.date(), end.date()
+
+    @staticmethod
+    def tally(condition=None):
+        """Issue count over IssueDailyStats rows, for ReportService._get_issue_breakdown"""
+        return Coalesce(Sum('issue_count', filter=condition), 0)
+
+    @staticmethod
+    def avg_resolution_hours(stats_qs):
+        """Average resolution time in hours over IssueDailyStats rows"""
+        totals = stats_qs.order_by().aggregate(seconds=Sum('resolution_seconds'), count=Sum('resolved_count'))
+        if not totals['count']:
+            return 0.0
+        return ReportService._duration_hours(timedelta(seconds=totals['seconds'] / totals['count']))
+
+    @staticmethod
+    def team_stats(days):
+        """Per-assignee counts over the rollup, shaped like the raw team performance query"""
+        rows = (
+            IssueDailyStats.objects.filter(day__range=days, assignee__isnull=False)
+            .order_by()
+            .values('assignee_id')
+            .annotate(
+                assigned_count=Sum('issue_count'),
+                done_count=Coalesce(Sum('issue_count', filter=Q(status__in=DONE_STATUSES)), 0),
+                pending_count=Coalesce(Sum('issue_count', filter=Q(status__in=['open', 'in_progress'])), 0),
+                seconds=Sum('resolution_seconds'),
+                timed=Sum('resolved_count'),
+            )
+        )
+        for row in rows:
+            # resolved_count is a model field, so it cannot be the annotation's alias
+            row['resolved_count'] = row.pop('done_count')
+            if row['timed']:
+                row['avg_resolution'] = timedelta(seconds=row['seconds'] / row['timed'])
+            yield row
+
+
+
+class TimeSeriesService:
+    """
+    Created/resolved/closed issue counts per day, week or month. Each metric
+    is one grouped query on its own timestamp; empty periods are filled in
+    when the rows are laid out, so a whole chart is a single request
+    """
+    METRICS = {
+        'created': 'created_at',
+        'resolved': 'resolved_at',
+        'closed': 'closed_at',
+    }
+    GRANULARITIES = {
+        'day': TruncDate,
+        'week': TruncWeek,
+        'month': TruncMonth,
+    }
+
+    @staticmethod
+    def get_series(start_date=None, end_date=None, granularity='day', priority_filter=None,
+                   status_filter=None, sla_only=False, high_priority_only=False):
+        """
+        {'granularity', 'start_date', 'end_date', 'series': [{'period', 'created',
+        'resolved', 'closed'}, ...], 'totals'}. Raises ValueError for an unknown
+        granularity or a range with more than REPORT_TIMESERIES_MAX_PERIODS periods
+        """
+        if granularity not in TimeSeriesService.GRANULARITIES:
+            raise ValueError(f"granularity must be one of {', '.join(TimeSeriesService.GRANULARITIES)}")
+
+        # Same default range as get_analytics_data
+        if not start_date:
+            start_date = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=30)
+        if not end_date:
+            end_date = timezone.localtime().replace(hour=23, minute=59, second=59, microsecond=999999)
+        if timezone.is_naive(start_date):
+            start_date = timezone.make_aware(start_date)
+        if timezone.is_naive(end_date):
+            end_date = timezone.make_aware(end_date)
+
+        periods = TimeSeriesService.periods(
+            timezone.localtime(start_date).date(), timezone.localtime(end_date).date(), granularity
+        )
+        if len(periods) > settings.REPORT_TIMESERIES_MAX_PERIODS:
+            raise ValueError(
+                f"{len(periods)} {granularity} periods requested; the limit is "
+                f"{settings.REPORT_TIMESERIES_MAX_PERIODS}, use a coarser granularity"
+            )
+
+        issues_qs = ReportService._apply_issue_filters(
+            Issue.objects.all(), priority_filter, status_filter, high_priority_only
+        )
+        if sla_only:
+            issues_qs = ReportService._apply_sla_filter(issues_qs)
+
+        trunc = TimeSeriesService.GRANULARITIES[granularity]
+        counts = {}
+        for metric, field in TimeSeriesService.METRICS.items():
+            rows = (
+                issues_qs.filter(**{f'{field}__range': (start_date, end_date)})
+                .order_by()
+                .annotate(period=trunc(field, output_field=DateField()))
+                .values('period')
+                .annotate(count=Count('id'))
+            )
+            counts[metric] = {row['period']: row['count'] for row in rows}
+
+        # One pass over the periods, zero where a metric has no rows
+        series = [
+            {'period': period.isoformat(), **{metric: counts[metric].get(period, 0) for metric in counts}}
+            for period in periods
+        ]
+        return {
+            'granularity': granularity,
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat(),
+            'series': series,
+            'totals': {metric: sum(by_period.values()) for metric, by_period in counts.items()},
+        }
+
+    @staticmethod
+    def periods(first_day, last_day, granularity):
+        """Start date of every period from the one containing first_day to the one containing last_day"""
+        if granularity == 'month':
+            period = first_day.replace(day=1)
+        elif granularity == 'week':
+            period = first_day - timedelta(days=first_day.weekday())  # weeks start on Monday, as TruncWeek
+        else:
+            period = first_day
+
+        periods = []
+        while period <= last_day:
+            periods.append(period)
+            if granularity == 'month':
+                period = (period + timedelta(days=32)).replace(day=1)
+            else:
+                period += timedelta(days=7 if granularity == 'week' else 1)
+        return periods
+
+
+class IssueExportService:
+    """
+    Row-level issue export for BI tools. Rows are read with a server-side
+    cursor (.iterator) over values_list and encoded in batches, so memory
+    stays flat however many issues there are
+    """
+    FIELDS = [
+        'id', 'title', 'status', 'priority', 'reporter__email', 'assignee__email',
+        'created_at', 'updated_at', 'first_response_at', 'resolved_at', 'closed_at', 'due_date',
+    ]
+    COLUMNS = [
+        'id', 'title', 'status', 'priority', 'reporter_email', 'assignee_email',
+        'created_at', 'updated_at', 'first_response_at', 'resolved_at', 'closed_at', 'due_date',
+        'first_response_hours', 'resolution_hours',
+    ]
+
+    @staticmethod
+    def rows(start_date=None, end_date=None, priority_filter=None, status_filter=None, chunk_size=2000):
+        """Yield one tuple per issue, in COLUMNS order, oldest first; missing values are None"""
+        issues_qs = Issue.objects.all()
+        if start_date:
+            issues_qs = issues_qs.filter(created_at__gte=start_date)
+        if end_date:
+            issues_qs = issues_qs.filter(created_at__lte=end_date)
+        issues_qs = ReportService._apply_issue_filters(issues_qs, priority_filter, status_filter, False)
+
+        for (issue_id, title, status, priority, reporter, assignee, created_at, updated_at,
+             first_response_at, resolved_at, closed_at, due_date) in (
+            issues_qs.order_by('created_at', 'id').values_list(*IssueExportService.FIELDS).iterator(chunk_size=chunk_size)
+        ):
+            yield (
+                str(issue_id), title, status, priority, reporter, assignee,
+                created_at.isoformat(), updated_at.isoformat(),
+                IssueExportService._isoformat(first_response_at), IssueExportService._isoformat(resolved_at),
+                IssueExportService._isoformat(closed_at), IssueExportService._isoformat(due_date),
+                IssueExportService._hours_between(created_at, first_response_at),
+                IssueExportService._hours_between(created_at, resolved_at),
+            )
+
+    @staticmethod
+    def csv_chunks(rows, batch_size=500):
+        """Encode rows as CSV with a header line, batch_size rows per chunk"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(IssueExportService.COLUMNS)
+        for count, row in enumerate(rows, 1):
+            writer.writerow(row)
+            if count % batch_size == 0:
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue().encode()
+
+    @staticmethod
+    def ndjson_chunks(rows, batch_size=500):
+        """Encode rows as newline-delimited JSON objects, batch_size rows per chunk"""
+        lines = []
+        for row in rows:
+            lines.append(json.dumps(dict(zip(IssueExportService.COLUMNS, row))))
+            if len(lines) == batch_size:
+                yield ('\n'.join(lines) + '\n').encode()
+                lines = []
+        if lines:
+            yield ('\n'.join(lines) + '\n').encode()
+
+    @staticmethod
+    def gzip_chunks(chunks):
+        """Gzip a stream of byte chunks incrementally"""
+        compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+    @staticmethod
+    def _isoformat(value):
+        return value.isoformat() if value else None
+
+    @staticmethod
+    def _hours_between(start, end):
+        if not end:
+            return None
+        return round((end - start).total_seconds() / 3600, 2)
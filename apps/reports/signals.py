@@ -1,13 +1,35 @@
 
-from django.db.models.signals import post_delete, post_save
+from django.db.models.signals import post_delete, post_init, post_save
 from django.dispatch import receiver
 import os
+from CFIT.cache import ResultCache
+from apps.feedback.models import Feedback
+from apps.issues.models import Issue
+from apps.users.models import User
+from django.core.cache import cache
+from django.db import transaction
 from .models import Report
+from .progress import ReportProgress
+from .services import RollupService
+
+# Cached analytics and metrics are invalidated by writes to the models they read.
+# User saves only matter when they change what team performance shows.
+ResultCache.track(Issue)
+ResultCache.track(Feedback)
+ResultCache.track(Report)
+ResultCache.track(User, fields={'email', 'first_name', 'last_name', 'role', 'is_active'})
+
+# Fields RollupService.issue_bucket reads
+ROLLUP_FIELDS = {'created_at', 'status', 'priority', 'assignee_id', 'resolved_at'}
+
+def _file_shared(instance):
+    """Whether another report (same fingerprint) still uses this report's file"""
+    return Report.objects.filter(result_path=instance.result_path.name).exclude(pk=instance.pk).exists()
 
 @receiver(post_delete, sender=Report)
 def auto_delete_file_on_delete(sender, instance, **kwargs):
     """Delete report file when report record is deleted"""
-    if instance.result_path and hasattr(instance.result_path, 'path'):
+    if instance.result_path and hasattr(instance.result_path, 'path') and not _file_shared(instance):
         try:
             if os.path.isfile(instance.result_path.path):
                 os.remove(instance.result_path.path)
@@ -23,9 +45,68 @@ def cleanup_failed_reports(sender, instance, **kwargs):
     
     if (instance.status == 'failed' and 
         instance.created_at < timezone.now() - timedelta(days=7) and
-        instance.result_path):
+        instance.result_path and not _file_shared(instance)):
         try:
             if os.path.isfile(instance.result_path.path):
                 os.remove(instance.result_path.path)
         except (OSError, ValueError):
-            pass
\ No newline at end of file
+            pass
+
+
+# Daily rollups. Each Issue remembers the bucket it was loaded in, so a save
+# moves it from that bucket to its new one in the same transaction.
+# Writes that bypass signals (queryset.update(), partially loaded instances)
+# are corrected by the nightly reconcile_daily_stats task.
+
+@receiver(post_init, sender=Issue)
+def remember_issue_bucket(sender, instance, **kwargs):
+    if ROLLUP_FIELDS & instance.get_deferred_fields():
+        instance._rollup_bucket = False  # unknown
+    else:
+        instance._rollup_bucket = RollupService.issue_bucket(instance)
+
+@receiver(post_save, sender=Issue)
+def update_issue_rollup(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_bucket = None if created else instance._rollup_bucket
+    new_bucket = RollupService.issue_bucket(instance)
+    if old_bucket is not False:
+        RollupService.move_issue(old_bucket, new_bucket)
+    instance._rollup_bucket = new_bucket
+
+@receiver(post_delete, sender=Issue)
+def remove_issue_from_rollup(sender, instance, **kwargs):
+    bucket = instance._rollup_bucket
+    if bucket is False:
+        bucket = RollupService.issue_bucket(instance)
+    RollupService.move_issue(bucket, None)
+
+@receiver(post_save, sender=Feedback)
+def add_feedback_to_rollup(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        RollupService.add_feedback(instance.created_at)
+
+@receiver(post_delete, sender=Feedback)
+def remove_feedback_from_rollup(sender, instance, **kwargs):
+    RollupService.add_feedback(instance.created_at, -1)
+
+
+# Status snapshots for the status endpoint, long-poll and SSE stream
+
+SNAPSHOT_FIELDS = {'status', 'progress_stage', 'progress', 'result_path', 'error_message'}
+
+
+@receiver(post_save, sender=Report)
+def publish_report_progress(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Saves that only touch other fields (e.g. task_id) would publish a
+    # possibly stale in-memory status over the worker's newer one
+    if update_fields is not None and not set(update_fields) & SNAPSHOT_FIELDS:
+        return
+    if not raw:
+        snapshot_of = instance
+        transaction.on_commit(lambda: ReportProgress.publish(snapshot_of))
+
+@receiver(post_delete, sender=Report)
+def drop_report_progress(sender, instance, **kwargs):
+    cache.delete(ReportProgress.KEY.format(instance.id))
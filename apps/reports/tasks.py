@@ -1,22 +1,49 @@
 from celery import shared_task
 from .models import Report
-from .services import ReportService
+from .services import ReportService, RollupService
+from .rendering import render_pdf_pooled
+from .progress import STAGE_PROGRESS
 from django.utils import timezone
-from django.core.files.base import ContentFile
+from django.core.files import File
 import json
 import csv
-import io
-from datetime import datetime
+import tempfile
+from datetime import datetime, timedelta
 import logging
 import os
+from django.conf import settings
 from django.db import transaction
+from django.db.models import Q
 
 logger = logging.getLogger(__name__)
 
+REPORT_EXTENSIONS = {'csv': '.csv', 'json': '.json', 'pdf': '.pdf'}
+
+@shared_task
+def reconcile_daily_stats(days=None):
+    """Rebuild the analytics rollups from raw rows (the last `days` days, or all history)"""
+    since = timezone.localdate() - timedelta(days=days) if days else None
+    rows = RollupService.rebuild(since)
+    logger.info("Rebuilt %s daily stats rows", rows)
+    return rows
+
+def advance_report(report, stage):
+    """Record a progress stage on the report and on every request attached to it"""
+    reports = Report.objects.filter(pk=report.pk)
+    if report.fingerprint:
+        reports = Report.objects.filter(
+            Q(pk=report.pk) | Q(fingerprint=report.fingerprint, status__in=['pending', 'processing'])
+        )
+    for current in reports:
+        current.progress_stage = stage
+        current.progress = STAGE_PROGRESS[stage]
+        current.save(update_fields=['progress_stage', 'progress', 'updated_at'])
+
 @shared_task(bind=True, max_retries=3)
 def generate_report_task(self, report_id):
     """Background task to generate report files - FIXED FOR IN-MEMORY CELERY"""
     print(f"🎯 [CELERY TASK STARTED] Report ID: {report_id}")
+    workdir = None
     
     try:
         # Get report from database
@@ -29,6 +56,8 @@ def generate_report_task(self, report_id):
             report.save(update_fields=['status', 'updated_at'])
             print(f"📊 [CELERY] Report status set to 'processing'")
         
+        advance_report(report, 'querying')
+        
         # Get parameters
         params = report.parameters
         print(f"📋 [CELERY] Report parameters: {params}")
@@ -73,48 +102,58 @@ def generate_report_task(self, report_id):
         )
         print(f"✅ [CELERY] Got analytics data with {data.get('summary', {}).get('total_issues', 0)} issues")
         
-        # Generate file based on format
+        # Render straight into a temporary file, which storage then moves
+        # into place, so the report is never held in memory as a whole
+        advance_report(report, 'rendering')
         filename = f"report_{report.id}_{timezone.now().strftime('%Y%m%d_%H%M%S')}"
         print(f"📄 [CELERY] Creating file: {filename}, Format: {report.format}")
         
-        if report.format == 'csv':
-            content = generate_csv(data, report.user)
-            file_extension = '.csv'
-        elif report.format == 'json':
-            content = json.dumps(data, indent=2, default=str)
-            file_extension = '.json'
-        elif report.format == 'pdf':
-            content = generate_pdf(data, report.user)
-            file_extension = '.pdf'
-        else:
-            # Default to CSV
-            content = generate_csv(data, report.user)
-            file_extension = '.csv'
+        file_extension = REPORT_EXTENSIONS.get(report.format, '.csv')  # Default to CSV
+        workdir = tempfile.TemporaryDirectory(prefix='report-', dir=settings.FILE_UPLOAD_TEMP_DIR)
+        temp_path = os.path.join(workdir.name, f"report{file_extension}")
+        write_report(report.format, data, report.user, temp_path)
         
         # Save file to report model
         filename_with_ext = f"{filename}{file_extension}"
         print(f"💾 [CELERY] Saving file: {filename_with_ext}")
         
-        # Create content file
-        if isinstance(content, str):
-            file_content = ContentFile(content.encode('utf-8'))
-        else:
-            file_content = ContentFile(content)
-        
         # Save the file and update status
+        advance_report(report, 'storing')
         with transaction.atomic():
             # Get fresh report instance
             fresh_report = Report.objects.get(id=report_id)
             
-            # Save the file
-            fresh_report.result_path.save(
-                filename_with_ext,
-                file_content
-            )
+            # Save the file; fingerprinted reports are named after their
+            # fingerprint. An existing file of that name may predate writes
+            # the fingerprint cannot see, so storage picks a fresh name then
+            if fresh_report.fingerprint:
+                filename_with_ext = f"{fresh_report.fingerprint}{file_extension}"
+            with open(temp_path, 'rb') as rendered:
+                fresh_report.result_path.save(
+                    filename_with_ext,
+                    ReportTempFile(rendered),
+                    save=False
+                )
             
             # Update status to generated
             fresh_report.status = 'generated'
-            fresh_report.save(update_fields=['status', 'result_path', 'updated_at'])
+            fresh_report.progress_stage = 'done'
+            fresh_report.progress = STAGE_PROGRESS['done']
+            fresh_report.save(update_fields=['status', 'result_path', 'progress_stage', 'progress', 'updated_at'])
+            
+            # Requests that attached to this one share the file
+            if fresh_report.fingerprint:
+                for attached in Report.objects.filter(fingerprint=fresh_report.fingerprint).exclude(
+                    pk=fresh_report.pk
+                ).exclude(status='generated'):
+                    attached.status = 'generated'
+                    attached.result_path.name = fresh_report.result_path.name
+                    attached.error_message = ''
+                    attached.progress_stage = 'done'
+                    attached.progress = STAGE_PROGRESS['done']
+                    attached.save(update_fields=[
+                        'status', 'result_path', 'error_message', 'progress_stage', 'progress', 'updated_at'
+                    ])
             
             print(f"✅ [CELERY] File saved to: {fresh_report.result_path}")
         
@@ -146,7 +185,16 @@ def generate_report_task(self, report_id):
                 failed_report = Report.objects.get(id=report_id)
                 failed_report.status = 'failed'
                 failed_report.error_message = str(e)[:500]  # Limit error message length
-                failed_report.save(update_fields=['status', 'error_message', 'updated_at'])
+                failed_report.progress_stage = 'failed'
+                failed_report.save(update_fields=['status', 'error_message', 'progress_stage', 'updated_at'])
+                if failed_report.fingerprint:
+                    for attached in Report.objects.filter(
+                        fingerprint=failed_report.fingerprint, status__in=['pending', 'processing']
+                    ):
+                        attached.status = 'failed'
+                        attached.error_message = failed_report.error_message
+                        attached.progress_stage = 'failed'
+                        attached.save(update_fields=['status', 'error_message', 'progress_stage', 'updated_at'])
                 
                 print(f"⚠️ [CELERY] Report marked as failed: {failed_report.error_message}")
         except Exception as save_error:
@@ -155,17 +203,40 @@ def generate_report_task(self, report_id):
         # Retry the task
         print(f"🔄 [CELERY] Retrying task...")
         raise self.retry(exc=e, countdown=30)  # Retry after 30 seconds
+    
+    finally:
+        # Whatever storage did not move into place
+        if workdir is not None:
+            workdir.cleanup()
+
+class ReportTempFile(File):
+    """
+    A rendered report on local disk. Like an upload's temporary file,
+    FileSystemStorage moves it into place instead of copying it; other
+    storages read it in chunks
+    """
+    def temporary_file_path(self):
+        return self.file.name
+
+def write_report(report_format, data, user, path):
+    """Render the report for `report_format` straight into the file at `path`"""
+    if report_format == 'json':
+        with open(path, 'w', encoding='utf-8') as output:
+            json.dump(data, output, indent=2, default=str)
+    elif report_format == 'pdf':
+        generate_pdf(data, user, path)
+    else:
+        with open(path, 'w', encoding='utf-8', newline='') as output:
+            generate_csv(data, user, output)
 
-def generate_csv(data, user):
-    """Generate CSV content from REAL database data"""
-    output = io.StringIO()
+def generate_csv(data, user, output):
+    """Write CSV content from REAL database data to the text stream `output`"""
     writer = csv.writer(output)
     
     # Write header
     writer.writerow(['CFITP ANALYTICS DASHBOARD REPORT'])
     writer.writerow([f"Period: {data.get('period_display', 'N/A')}"])
     writer.writerow([f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"])
-    writer.writerow([f"Generated by: {user.email}"])
     writer.writerow([])
     
     # Write summary metrics
@@ -220,244 +291,28 @@ def generate_csv(data, user):
                 member.get('efficiency', 0),
                 member.get('avg_resolution_time_hours', 'N/A')
             ])
-    
-    return output.getvalue()
 
-def generate_pdf(data, user):
-    """Generate PDF content from data using ReportLab (REAL DATA)"""
+def generate_pdf(data, user, path):
+    """Render a PDF from data using ReportLab (REAL DATA) into `path`, in the process pool"""
     print(f"📄 [CELERY] Generating PDF...")
     try:
-        # Check if ReportLab is installed
-        from reportlab.lib.pagesizes import letter, A4
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.lib.units import inch, cm
-        from reportlab.lib import colors
-        from reportlab.pdfgen import canvas
-        from reportlab.lib.enums import TA_CENTER, TA_LEFT
-        from io import BytesIO
-        
-        # Create PDF buffer
-        buffer = BytesIO()
-        
-        # Custom styles
-        styles = getSampleStyleSheet()
-        
-        # Title style
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Title'],
-            fontSize=18,
-            spaceAfter=20,
-            alignment=TA_CENTER,
-            textColor=colors.HexColor('#0EA5A4')  # Your teal color
-        )
-        
-        # Heading style
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=14,
-            spaceAfter=10,
-            spaceBefore=15,
-            textColor=colors.HexColor('#334155')  # Your text color
-        )
-        
-        # Create document
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=A4,
-            rightMargin=2*cm,
-            leftMargin=2*cm,
-            topMargin=2*cm,
-            bottomMargin=2*cm
+        render_pdf_pooled(
+            data,
+            processes=settings.REPORT_RENDER_PROCESSES,
+            timeout=settings.REPORT_RENDER_TIMEOUT,
+            output=path
         )
-        
-        # Container for elements
-        elements = []
-        
-        # Title
-        title = Paragraph("CFITP Analytics Dashboard Report", title_style)
-        elements.append(title)
-        
-        # Metadata
-        elements.append(Paragraph(f"<b>Period:</b> {data.get('period_display', 'N/A')}", styles['Normal']))
-        elements.append(Paragraph(f"<b>Generated:</b> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", styles['Normal']))
-        elements.append(Paragraph(f"<b>Generated by:</b> {user.email}", styles['Normal']))
-        elements.append(Spacer(1, 0.5*inch))
-        
-        # Summary Metrics
-        elements.append(Paragraph("Summary Metrics", heading_style))
-        
-        summary = data.get('summary', {})
-        summary_data = [['Metric', 'Value']]
-        
-        # Add key metrics
-        key_metrics = ['total_issues', 'open_issues', 'in_progress_issues', 
-                      'resolved_issues', 'closed_issues', 'team_efficiency',
-                      'avg_resolution_time', 'first_response_time', 
-                      'sla_compliance', 'reopen_rate']
-        
-        for metric in key_metrics:
-            if metric in summary:
-                display_name = metric.replace('_', ' ').title()
-                summary_data.append([display_name, str(summary[metric])])
-        
-        # Create summary table
-        summary_table = Table(
-            summary_data, 
-            colWidths=[3*inch, 2*inch],
-            hAlign='LEFT'
-        )
-        
-        summary_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0EA5A4')),  # Teal header
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 11),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#F8FAFC')),  # Your bg color
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#E2E8F0')),
-            ('ALIGN', (1, 1), (1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ]))
-        
-        elements.append(summary_table)
-        elements.append(Spacer(1, 0.25*inch))
-        
-        # Page break for detailed data
-        elements.append(PageBreak())
-        
-        # Issues by Status
-        issues_by_status = data.get('issues_by_status', [])
-        if issues_by_status:
-            elements.append(Paragraph("Issues by Status", heading_style))
-            
-            status_data = [['Status', 'Count', 'Percentage']]
-            for item in issues_by_status:
-                status_data.append([
-                    item.get('status_display', item.get('status', 'Unknown')),
-                    str(item.get('count', 0)),
-                    f"{item.get('percentage', 0)}%"
-                ])
-            
-            status_table = Table(
-                status_data,
-                colWidths=[2*inch, 1.5*inch, 1.5*inch],
-                hAlign='LEFT'
-            )
-            
-            status_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3B82F6')),  # Blue header
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.lightgrey),
-                ('ALIGN', (1, 1), (-1, -1), 'CENTER'),
-            ]))
-            
-            elements.append(status_table)
-            elements.append(Spacer(1, 0.25*inch))
-        
-        # Issues by Priority
-        issues_by_priority = data.get('issues_by_priority', [])
-        if issues_by_priority:
-            elements.append(Paragraph("Issues by Priority", heading_style))
-            
-            priority_data = [['Priority', 'Count', 'Percentage']]
-            for item in issues_by_priority:
-                priority_data.append([
-                    item.get('priority_display', item.get('priority', 'Unknown')),
-                    str(item.get('count', 0)),
-                    f"{item.get('percentage', 0)}%"
-                ])
-            
-            priority_table = Table(
-                priority_data,
-                colWidths=[2*inch, 1.5*inch, 1.5*inch],
-                hAlign='LEFT'
-            )
-            
-            priority_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#F59E0B')),  # Orange header
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.lavenderblush),
-                ('GRID', (0, 0), (-1, -1), 1, colors.lightgrey),
-                ('ALIGN', (1, 1), (-1, -1), 'CENTER'),
-            ]))
-            
-            elements.append(priority_table)
-            elements.append(Spacer(1, 0.25*inch))
-        
-        # Team Performance
-        team_performance = data.get('team_performance', [])
-        if team_performance:
-            elements.append(Paragraph("Team Performance", heading_style))
-            
-            team_data = [['Name', 'Assigned', 'Resolved', 'Pending', 'Efficiency %']]
-            for member in team_performance[:10]:  # Limit to top 10
-                team_data.append([
-                    member.get('name', 'N/A'),
-                    str(member.get('total_assigned', 0)),
-                    str(member.get('resolved', 0)),
-                    str(member.get('pending', 0)),
-                    f"{member.get('efficiency', 0)}%"
-                ])
-            
-            team_table = Table(
-                team_data,
-                colWidths=[2.5*inch, 1*inch, 1*inch, 1*inch, 1*inch],
-                hAlign='LEFT'
-            )
-            
-            team_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#10B981')),  # Green header
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#F0FDF4')),  # Light green
-                ('GRID', (0, 0), (-1, -1), 1, colors.lightgrey),
-                ('ALIGN', (1, 1), (-1, -1), 'CENTER'),
-            ]))
-            
-            elements.append(team_table)
-        
-        # Footer note
-        elements.append(Spacer(1, 0.5*inch))
-        elements.append(Paragraph(
-            "<i>Note: This report was generated automatically by the CFITP system. "
-            "All data is based on real-time database records.</i>",
-            ParagraphStyle(
-                'Footer',
-                parent=styles['Italic'],
-                fontSize=9,
-                textColor=colors.gray,
-                alignment=TA_CENTER
-            )
-        ))
-        
-        # Build PDF
-        doc.build(elements)
-        
-        # Get PDF content
-        pdf = buffer.getvalue()
-        buffer.close()
-        
         print(f"✅ [CELERY] PDF generated successfully")
-        return pdf
+        return
         
     except ImportError as e:
         logger.warning(f"ReportLab not installed: {e}. Using simple PDF fallback.")
         print(f"⚠️ [CELERY] ReportLab not installed, using fallback")
-        return generate_simple_pdf(data, user)
     except Exception as e:
         logger.error(f"PDF generation error: {e}. Using simple fallback.")
         print(f"⚠️ [CELERY] PDF generation error: {e}, using fallback")
-        return generate_simple_pdf(data, user)
+    with open(path, 'w', encoding='utf-8') as output:
+        output.write(generate_simple_pdf(data, user))
 
 def generate_simple_pdf(data, user):
     """Fallback PDF generation without ReportLab"""
@@ -468,7 +323,6 @@ def generate_simple_pdf(data, user):
     
     Period: {data.get('period_display', 'N/A')}
     Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-    Generated by: {user.email}
     
     SUMMARY METRICS
     ---------------
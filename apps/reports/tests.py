@@ -1,8 +1,35 @@
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase, AsyncClient, override_settings
 from rest_framework.test import APIClient
-from .models import Report
+from .models import Report, IssueDailyStats, FeedbackDailyStats
+from .services import ReportService, RollupService
+from .tasks import reconcile_daily_stats, generate_report_task
+from . import rendering
+from . import executor
+from .executor import run_blocks
+from .progress import ReportProgress
+from rest_framework_simplejwt.tokens import AccessToken
+from apps.issues.models import Issue
+from apps.issues.services import IssueService
+from apps.feedback.models import Feedback
 from apps.users.models import User
-from unittest.mock import patch
+from unittest.mock import Mock, patch
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+from django.test.utils import CaptureQueriesContext
+from django.core.files.move import file_move_safe
+from CFIT.cache import ResultCache
+import billiard
+import csv
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from django.utils import timezone
+from datetime import datetime, timedelta
 
 class ReportTests(TestCase):
     def setUp(self):
@@ -18,4 +45,683 @@ class ReportTests(TestCase):
                 format='json'
             )
             mock_delay.assert_called_once()
-            self.assertEqual(response.status_code, 201, f"Response: {response.status_code} {response.data}")
\ No newline at end of file
+            self.assertEqual(response.status_code, 201, f"Response: {response.status_code} {response.data}")
+
+
+class AnalyticsQueryTests(TestCase):
+    def setUp(self):
+        self.manager = User.objects.create_user(email='manager@example.com', password='password', role='manager')
+        self.client_user = User.objects.create_user(email='client@example.com', password='password', role='client')
+        for status, priority, assignee in [
+            ('open', 'low', None),
+            ('open', 'high', self.manager),
+            ('in_progress', 'critical', self.manager),
+            ('resolved', 'medium', self.manager),
+            ('closed', 'medium', None),
+        ]:
+            Issue.objects.create(
+                title=f'{status} {priority}', description='Desc', status=status, priority=priority,
+                reporter=self.client_user, created_by=self.client_user, assignee=assignee
+            )
+
+    def test_issue_breakdown_is_one_query(self):
+        with self.assertNumQueries(1):
+            breakdown = ReportService._get_issue_breakdown(Issue.objects.all())
+
+        self.assertEqual(breakdown['total'], 5)
+        self.assertEqual(breakdown['status'], {'open': 2, 'in_progress': 1, 'resolved': 1, 'closed': 1})
+        self.assertEqual(breakdown['priority'], {'low': 1, 'medium': 2, 'high': 1, 'critical': 1})
+        self.assertEqual((breakdown['assigned'], breakdown['resolved_assigned']), (3, 1))
+
+    def test_analytics_query_count(self):
+        # 1 breakdown, 1 first response, 1 SLA summary, 1 SLA attention list,
+        # 1 resolution time, 2 team performance, 1 feedback, 1 active users
+        with CaptureQueriesContext(connection) as queries:
+            data = ReportService.get_analytics_data()
+        # Not counting the savepoint around each block
+        self.assertEqual(len([q for q in queries if 'SAVEPOINT' not in q['sql']]), 9)
+
+        self.assertEqual(data['summary']['total_issues'], 5)
+        self.assertEqual(data['summary']['open_issues'], 2)
+        self.assertEqual(data['summary']['team_efficiency_percentage'], 33.3)
+        self.assertEqual(
+            [(row['status'], row['count'], row['percentage']) for row in data['issues_by_status']],
+            [('open', 2, 40.0), ('in_progress', 1, 20.0), ('resolved', 1, 20.0), ('closed', 1, 20.0)]
+        )
+        self.assertEqual([row['count'] for row in data['issues_by_priority']], [1, 2, 1, 1])
+
+    def test_team_performance_query_count_is_flat(self):
+        for i in range(5):
+            User.objects.create_user(email=f'staff{i}@example.com', password='password', role='staff')
+        resolved = Issue.objects.get(status='resolved')
+        Issue.objects.filter(pk=resolved.pk).update(resolved_at=resolved.created_at + timedelta(hours=3))
+        start, end = timezone.now() - timedelta(days=1), timezone.now() + timedelta(days=1)
+
+        with self.assertNumQueries(2):
+            team = ReportService._get_team_performance_data(start, end)
+
+        self.assertEqual(len(team), 6)
+        manager_row = team[0]
+        self.assertEqual(manager_row['email'], 'manager@example.com')
+        self.assertEqual(
+            (manager_row['total_assigned'], manager_row['resolved'], manager_row['pending']),
+            (3, 1, 2)
+        )
+        self.assertEqual(manager_row['efficiency'], 33.3)
+        self.assertEqual(manager_row['avg_resolution_time_hours'], 3.0)
+        self.assertEqual(team[1]['total_assigned'], 0)
+
+    def test_resolution_time_and_sla_use_resolved_at(self):
+        today = timezone.localdate()
+        # Saved through the model so the SLA deadline follows the due date
+        for issue, resolved_after, due_date in [
+            (Issue.objects.get(status='resolved'), timedelta(hours=6), today),
+            (Issue.objects.get(status='closed'), timedelta(days=3), today - timedelta(days=1)),
+            (Issue.objects.get(status='open', priority='low'), None, today + timedelta(days=1)),
+            (Issue.objects.get(status='open', priority='high'), None, today - timedelta(days=1)),
+        ]:
+            if resolved_after:
+                issue.resolved_at = issue.created_at + resolved_after
+            issue.due_date = due_date
+            issue.save()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(ReportService._calculate_avg_resolution_time(Issue.objects.all()), 39.0)
+        # The critical issue without a due date is within its 4h policy deadline
+        with self.assertNumQueries(1):
+            self.assertEqual(ReportService._calculate_sla_compliance(Issue.objects.all()), 60.0)
+
+    def test_first_response_mean_and_percentiles(self):
+        for issue, hours in zip(Issue.objects.order_by('title')[:3], [1, 2, 10]):
+            Issue.objects.filter(pk=issue.pk).update(first_response_at=issue.created_at + timedelta(hours=hours))
+
+        with self.assertNumQueries(3):
+            stats = ReportService._calculate_first_response_stats(Issue.objects.all())
+
+        self.assertEqual(stats, {'avg': 4.3, 'p50': 2.0, 'p90': 10.0})
+        self.assertEqual(
+            ReportService._calculate_first_response_stats(Issue.objects.none()),
+            {'avg': 0.0, 'p50': 0.0, 'p90': 0.0}
+        )
+
+
+class DailyStatsTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(email='staff@example.com', password='password', role='staff')
+        self.client_user = User.objects.create_user(email='client@example.com', password='password', role='client')
+
+    def rollup(self):
+        return sorted(
+            (row.day, row.status, row.priority, row.assignee_id, row.issue_count, row.resolved_count,
+             round(row.resolution_seconds))
+            for row in IssueDailyStats.objects.exclude(issue_count=0)
+        )
+
+    def assertRollupMatchesRebuild(self):
+        incremental = self.rollup()
+        RollupService.rebuild()
+        self.assertEqual(incremental, self.rollup())
+
+    def test_service_transitions_keep_rollup_in_step(self):
+        issue = IssueService.create_issue(self.client_user, {'title': 'Broken', 'description': 'Desc', 'priority': 'high'})
+        self.assertRollupMatchesRebuild()
+
+        issue = Issue.objects.get(pk=issue.pk)
+        IssueService.assign_issue(issue, self.staff, self.staff)
+        IssueService.transition_status(issue, 'resolved', self.staff)
+        self.assertEqual(IssueDailyStats.objects.get(issue_count=1).resolved_count, 1)
+        self.assertRollupMatchesRebuild()
+
+        IssueService.transition_status(Issue.objects.get(pk=issue.pk), 'open', self.staff)
+        self.assertRollupMatchesRebuild()
+
+        Issue.objects.get(pk=issue.pk).delete()
+        Feedback.objects.create(title='Idea', description='Desc')
+        self.assertEqual(self.rollup(), [])
+        self.assertEqual(FeedbackDailyStats.objects.get().feedback_count, 1)
+
+    def test_analytics_from_rollup_match_raw_rows(self):
+        for status, priority, assignee in [('open', 'low', None), ('resolved', 'high', self.staff),
+                                           ('closed', 'critical', self.staff), ('in_progress', 'low', self.staff)]:
+            issue = Issue.objects.create(title=status, description='Desc', status=status, priority=priority,
+                                         reporter=self.client_user, created_by=self.client_user, assignee=assignee)
+            if status in ('resolved', 'closed'):
+                issue.resolved_at = issue.created_at + timedelta(hours=5)
+                issue.save()
+        Feedback.objects.create(title='Idea', description='Desc')
+
+        with patch.object(RollupService, 'team_stats', wraps=RollupService.team_stats) as team_stats:
+            whole_days = ReportService.get_analytics_data()
+        team_stats.assert_called_once()
+        # An unaligned start falls back to the raw rows
+        raw = ReportService.get_analytics_data(start_date=timezone.now() - timedelta(days=30))
+        for key in ('summary', 'issues_by_status', 'issues_by_priority', 'team_performance'):
+            self.assertEqual(whole_days[key], raw[key])
+        self.assertEqual(whole_days['summary']['avg_resolution_time_hours'], 5.0)
+        self.assertEqual(whole_days['summary']['total_feedback'], 1)
+
+    def test_reconcile_repairs_bulk_updates(self):
+        Issue.objects.create(title='Bulk', description='Desc', reporter=self.client_user, created_by=self.client_user)
+        Issue.objects.update(status='closed', resolved_at=timezone.now() + timedelta(hours=2))
+        self.assertEqual(IssueDailyStats.objects.get(issue_count=1).status, 'open')
+
+        reconcile_daily_stats.delay(days=1)
+        row = IssueDailyStats.objects.get()
+        self.assertEqual((row.status, row.issue_count, row.resolved_count), ('closed', 1, 1))
+
+
+    def test_deleting_an_assignee_with_issues(self):
+        for priority in ('low', 'high'):
+            Issue.objects.create(title=priority, description='Desc', priority=priority, assignee=self.staff,
+                                 reporter=self.client_user, created_by=self.client_user)
+        self.staff.delete()
+        connection.check_constraints()
+        self.assertFalse(User.objects.filter(email='staff@example.com').exists())
+        self.assertEqual(self.rollup(), [])
+        self.assertFalse(IssueDailyStats.objects.filter(issue_count__lt=0).exists())
+
+        # A decrement with no row to apply to is dropped rather than stored
+        RollupService.add_feedback(timezone.now(), -1)
+        self.assertFalse(FeedbackDailyStats.objects.exists())
+
+
+class ResultCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.manager = User.objects.create_user(email='manager@example.com', password='password', role='manager')
+        self.client.force_authenticate(user=self.manager)
+
+    def test_analytics_cached_until_issue_write(self):
+        url = '/api/v1/reports/analytics/'
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        # Different filters are a different entry
+        self.assertEqual(self.client.get(url, {'priority': 'high'})['X-Cache'], 'MISS')
+
+        Issue.objects.create(title='New', description='Desc', reporter=self.manager, created_by=self.manager)
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['data']['summary']['total_issues'], 1)
+
+        stats = self.client.get('/api/v1/reports/cache-stats/').data['data']
+        self.assertEqual(stats['analytics'], {'hit': 1, 'miss': 3, 'wait': 0})
+
+    def test_metrics_grouped_in_two_queries(self):
+        for status_, type_, format_ in [
+            ('generated', 'performance_dashboard', 'pdf'), ('generated', 'performance_dashboard', 'pdf'),
+            ('failed', 'issues_by_status', 'csv'), ('pending', 'performance_dashboard', 'csv'),
+        ]:
+            Report.objects.create(type=type_, format=format_, status=status_, user=self.manager)
+        other = User.objects.create_user(email='other@example.com', password='password', role='manager')
+        Report.objects.create(type='performance_dashboard', user=other)
+
+        url = '/api/v1/reports/metrics/'
+        with self.assertNumQueries(2):
+            data = self.client.get(url).data['data']
+        self.assertEqual(
+            (data['total_reports'], data['generated_reports'], data['failed_reports'],
+             data['pending_reports'], data['processing_reports']),
+            (4, 2, 1, 1, 0)
+        )
+        self.assertEqual(data['report_types']['performance_dashboard'], 3)
+        self.assertEqual(data['report_types']['issue_summary'], 0)
+        self.assertEqual(data['report_formats'], {'xlsx': 0, 'csv': 2, 'pdf': 2})
+        self.assertEqual(len(data['recent_reports']), 4)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+
+        # Generation changing a report's state invalidates the entry
+        report = Report.objects.filter(user=self.manager, status='pending').get()
+        report.status = 'generated'
+        report.save(update_fields=['status', 'updated_at'])
+        response = self.client.get(url)
+        self.assertEqual((response['X-Cache'], response.data['data']['generated_reports']), ('MISS', 3))
+
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.3)
+            return {'value': 42}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(ResultCache.get_or_compute('test', {}, compute, [Report])))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(outcome for _, outcome in results), ['miss', 'wait', 'wait', 'wait'])
+        self.assertTrue(all(value == {'value': 42} for value, _ in results))
+
+
+class IssueExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.manager = User.objects.create_user(email='manager@example.com', password='password', role='manager')
+        self.client.force_authenticate(user=self.manager)
+        self.resolved = Issue.objects.create(
+            title='Resolved, with comma', description='Desc', status='resolved', priority='high',
+            reporter=self.manager, created_by=self.manager, assignee=self.manager
+        )
+        Issue.objects.filter(pk=self.resolved.pk).update(resolved_at=self.resolved.created_at + timedelta(hours=3))
+        Issue.objects.create(title='Open', description='Desc', reporter=self.manager, created_by=self.manager)
+
+    def test_streams_csv_rows(self):
+        response = self.client.get('/api/v1/reports/export/', {'mode': 'issues'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([row['title'] for row in rows], ['Resolved, with comma', 'Open'])
+        self.assertEqual(rows[0]['assignee_email'], 'manager@example.com')
+        self.assertEqual(rows[0]['resolution_hours'], '3.0')
+        self.assertEqual((rows[1]['assignee_email'], rows[1]['resolution_hours']), ('', ''))
+
+    def test_streams_gzipped_ndjson_with_filters(self):
+        response = self.client.get('/api/v1/reports/export/', {'mode': 'issues', 'output': 'ndjson',
+                                                               'gzip': 'true', 'priority': 'high'})
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+
+        lines = gzip.decompress(b''.join(response.streaming_content)).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+        row = json.loads(lines[0])
+        self.assertEqual((row['id'], row['status'], row['closed_at']), (str(self.resolved.pk), 'resolved', None))
+
+
+class TimeSeriesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.manager = User.objects.create_user(email='manager@example.com', password='password', role='manager')
+        self.client.force_authenticate(user=self.manager)
+        self.now = timezone.localtime()
+        older = Issue.objects.create(title='Older', description='Desc', status='resolved', priority='high',
+                                     reporter=self.manager, created_by=self.manager)
+        Issue.objects.filter(pk=older.pk).update(created_at=self.now - timedelta(days=3),
+                                                 resolved_at=self.now - timedelta(days=1))
+        Issue.objects.create(title='Today', description='Desc', reporter=self.manager, created_by=self.manager)
+
+    def test_daily_series_fills_gaps_in_one_query_per_metric(self):
+        start = (self.now - timedelta(days=6)).date()
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/v1/reports/timeseries/', {
+                'start_date': start.isoformat(), 'end_date': self.now.date().isoformat()
+            })
+        series = response.data['data']['series']
+        self.assertEqual([point['period'] for point in series],
+                         [(start + timedelta(days=i)).isoformat() for i in range(7)])
+        self.assertEqual([point['created'] for point in series], [0, 0, 0, 1, 0, 0, 1])
+        self.assertEqual([point['resolved'] for point in series], [0, 0, 0, 0, 0, 1, 0])
+        self.assertEqual(response.data['data']['totals'], {'created': 2, 'resolved': 1, 'closed': 0})
+
+    def test_weekly_and_monthly_buckets_with_filters(self):
+        response = self.client.get('/api/v1/reports/timeseries/', {'granularity': 'week', 'priority': 'high'})
+        series = response.data['data']['series']
+        self.assertTrue(all(datetime.fromisoformat(point['period']).weekday() == 0 for point in series))
+        self.assertEqual(response.data['data']['totals'], {'created': 1, 'resolved': 1, 'closed': 0})
+
+        response = self.client.get('/api/v1/reports/timeseries/', {'granularity': 'month'})
+        self.assertTrue(all(point['period'].endswith('-01') for point in response.data['data']['series']))
+        self.assertEqual(response.data['data']['totals']['created'], 2)
+
+    def test_rejects_bad_granularity_and_oversized_ranges(self):
+        self.assertEqual(self.client.get('/api/v1/reports/timeseries/', {'granularity': 'hour'}).status_code, 400)
+        with self.settings(REPORT_TIMESERIES_MAX_PERIODS=5):
+            self.assertEqual(self.client.get('/api/v1/reports/timeseries/').status_code, 400)
+
+
+class KpiExecutorTests(TransactionTestCase):
+    def setUp(self):
+        User.objects.create_user(email='manager@example.com', password='password', role='manager')
+
+    def slow_count(self):
+        time.sleep(0.3)
+        return User.objects.count(), threading.get_ident()
+
+    def test_blocks_run_concurrently_on_their_own_connections(self):
+        start = time.monotonic()
+        results, report = run_blocks({f'block{i}': self.slow_count for i in range(3)}, workers=3, timeout=5)
+        self.assertLess(time.monotonic() - start, 0.8)
+        self.assertEqual({count for count, _ in results.values()}, {1})
+        self.assertEqual(len({ident for _, ident in results.values()}), 3)
+        self.assertTrue(all(block['status'] == 'ok' for block in report.values()))
+
+    def test_timeouts_and_errors_are_reported(self):
+        def failing():
+            raise ValueError('boom')
+
+        results, report = run_blocks({
+            'fast': lambda: 1, 'slow': lambda: time.sleep(1), 'failing': failing,
+        }, workers=3, timeout=0.2)
+        self.assertEqual(results, {'fast': 1})
+        self.assertEqual(
+            {name: block['status'] for name, block in report.items()},
+            {'fast': 'ok', 'slow': 'timeout', 'failing': 'error'}
+        )
+        self.assertEqual(report['failing']['error'], 'boom')
+
+    def test_queue_wait_does_not_count_towards_the_timeout(self):
+        pool = executor.ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(pool.shutdown)
+        outcomes = []
+
+        def dashboard():
+            outcomes.append(run_blocks({'a': self.slow_count, 'b': self.slow_count}, workers=2, timeout=0.5))
+
+        # The second call's blocks queue behind the first's for ~0.3s, then run for 0.3s
+        with patch.object(executor, '_pool', pool):
+            callers = [threading.Thread(target=dashboard) for _ in range(2)]
+            for caller in callers:
+                caller.start()
+            for caller in callers:
+                caller.join()
+        self.assertEqual(
+            [sorted(block['status'] for block in report.values()) for _, report in outcomes],
+            [['ok', 'ok'], ['ok', 'ok']]
+        )
+
+
+class AnalyticsPartialResultTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.manager = User.objects.create_user(email='manager@example.com', password='password', role='manager')
+        self.client.force_authenticate(user=self.manager)
+
+    def test_blocks_run_inline_inside_a_transaction(self):
+        results, _ = run_blocks({'a': threading.get_ident, 'b': threading.get_ident}, workers=4, timeout=5)
+        self.assertEqual(set(results.values()), {threading.get_ident()})
+
+    def test_inline_block_failure_is_rolled_back_to_its_savepoint(self):
+        def failing():
+            User.objects.create_user(email='partial@example.com', password='password')
+            raise DatabaseError('aborted')
+
+        results, report = run_blocks({
+            'failing': failing, 'after': lambda: User.objects.count(),
+        }, workers=4, timeout=5)
+        self.assertEqual((report['failing']['status'], results), ('error', {'after': 1}))
+
+    def test_failed_block_gives_partial_uncached_analytics(self):
+        with patch.object(ReportService, '_calculate_first_response_stats', side_effect=RuntimeError('down')):
+            response = self.client.get('/api/v1/reports/analytics/')
+            data = response.data['data']
+            self.assertEqual(data['partial'], ['first_response'])
+            self.assertEqual(data['summary']['first_response_time_hours'], 0.0)
+            self.assertEqual(data['summary']['active_users'], 1)
+            self.assertEqual(self.client.get('/api/v1/reports/analytics/')['X-Cache'], 'MISS')
+
+        self.assertEqual(self.client.get('/api/v1/reports/analytics/').data['data']['partial'], [])
+        self.assertEqual(self.client.get('/api/v1/reports/analytics/')['X-Cache'], 'HIT')
+
+
+class ReportDeduplicationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.manager = User.objects.create_user(email='manager@example.com', password='password', role='manager')
+        self.other_manager = User.objects.create_user(email='other@example.com', password='password', role='manager')
+        self.client.force_authenticate(user=self.manager)
+
+    def request_report(self, user, parameters):
+        today = timezone.localdate()
+        parameters = {'start_date': str(today - timedelta(days=7)), 'end_date': str(today),
+                      'report_type': 'performance_dashboard', **parameters}
+        self.client.force_authenticate(user=user)
+        response = self.client.post('/api/v1/reports/', {
+            'type': 'performance_dashboard', 'format': 'csv', 'parameters': parameters
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data, Report.objects.get(pk=response.data['report_id'])
+
+    def test_fingerprint_normalizes_parameters(self):
+        self.assertEqual(
+            ReportService.fingerprint('performance_dashboard', 'csv', {'priority': 'high,low', 'sla_only': False}),
+            ReportService.fingerprint('performance_dashboard', 'csv', {'priority': ['low', 'high']}),
+        )
+        self.assertNotEqual(
+            ReportService.fingerprint('performance_dashboard', 'csv', {}),
+            ReportService.fingerprint('performance_dashboard', 'pdf', {}),
+        )
+
+    def test_identical_request_reuses_file_until_data_changes(self):
+        first, first_report = self.request_report(self.manager, {'priority': ['high', 'low']})
+        self.assertIsNone(first['deduplicated'])
+        self.assertEqual(first_report.status, 'generated')
+        self.assertEqual(first_report.result_path.name, f'reports/{first_report.fingerprint}.csv')
+
+        with patch('apps.reports.tasks.generate_report_task.delay') as mock_delay:
+            second, second_report = self.request_report(self.other_manager, {'priority': 'low,high'})
+        mock_delay.assert_not_called()
+        self.assertEqual(second['deduplicated'], 'reused')
+        self.assertEqual((second_report.status, second_report.result_path.name),
+                         ('generated', first_report.result_path.name))
+
+        # Deleting one report keeps the shared file
+        second_report.delete()
+        self.assertTrue(first_report.result_path.storage.exists(first_report.result_path.name))
+
+        Issue.objects.create(title='New', description='Desc', reporter=self.manager, created_by=self.manager)
+        third, third_report = self.request_report(self.manager, {'priority': ['high', 'low']})
+        self.assertIsNone(third['deduplicated'])
+        self.assertNotEqual(third_report.fingerprint, first_report.fingerprint)
+
+    def test_data_version_survives_cache_flush(self):
+        before = ReportService.fingerprint('performance_dashboard', 'csv', {})
+        issue = Issue.objects.create(title='New', description='Desc', reporter=self.manager, created_by=self.manager)
+        cache.clear()
+        after_create = ReportService.fingerprint('performance_dashboard', 'csv', {})
+        self.assertNotEqual(after_create, before)
+
+        issue.title = 'Renamed'
+        issue.save()
+        cache.clear()
+        self.assertNotEqual(ReportService.fingerprint('performance_dashboard', 'csv', {}), after_create)
+
+    def test_old_files_and_held_locks_are_not_trusted(self):
+        _, first_report = self.request_report(self.manager, {})
+        Report.objects.filter(pk=first_report.pk).update(updated_at=timezone.now() - timedelta(hours=2))
+        second, _ = self.request_report(self.other_manager, {})
+        self.assertIsNone(second['deduplicated'])
+
+        # Another request holds the decision lock past the wait: generate independently, leave its lock
+        lock_key = f'reports:fingerprint:{first_report.fingerprint}'
+        cache.set(lock_key, 1, 60)
+        with self.settings(REPORT_DEDUP_LOCK_TIMEOUT=0.2):
+            third, _ = self.request_report(self.manager, {})
+        self.assertIsNone(third['deduplicated'])
+        self.assertEqual(cache.get(lock_key), 1)
+
+    def test_in_flight_request_is_followed(self):
+        with patch('apps.reports.tasks.generate_report_task.delay') as mock_delay:
+            mock_delay.return_value.id = 'task-1'
+            _, leader = self.request_report(self.manager, {})
+            follower_data, follower = self.request_report(self.other_manager, {})
+        self.assertEqual(mock_delay.call_count, 1)
+        self.assertEqual((follower_data['deduplicated'], follower.task_id), ('attached', 'task-1'))
+
+        generate_report_task(str(leader.pk))
+        follower.refresh_from_db()
+        leader.refresh_from_db()
+        self.assertEqual((follower.status, follower.result_path.name), ('generated', leader.result_path.name))
+
+
+class PdfRenderingTests(TestCase):
+    def setUp(self):
+        self.data = {
+            'period_display': 'Jan 01, 2026 - Jan 31, 2026',
+            'summary': {'total_issues': 3},
+            'issues_by_status': [{'status': 'open', 'status_display': 'Open', 'count': 3, 'percentage': 100.0}],
+            'team_performance': [{'name': f'Member {i}', 'efficiency': 50.0} for i in range(50)],
+        }
+
+    def test_styles_are_built_once_per_process(self):
+        self.assertIs(rendering.get_styles(), rendering.get_styles())
+        self.assertTrue(rendering.render_pdf_pooled(self.data, processes=0, timeout=60).startswith(b'%PDF'))
+
+    def test_renders_in_process_pool(self):
+        pdf = rendering.render_pdf_pooled(self.data, processes=1, timeout=60)
+        self.assertTrue(pdf.startswith(b'%PDF'))
+        self.assertIsNotNone(rendering._pool)
+
+    def test_timed_out_render_does_not_overwrite_the_fallback(self):
+        output = os.path.join(tempfile.mkdtemp(), 'report.pdf')
+        self.addCleanup(shutil.rmtree, os.path.dirname(output))
+        with self.assertRaises(TimeoutError):
+            rendering.render_pdf_pooled(self.data, processes=1, timeout=0.001)  # warm pool
+        with self.assertRaises(TimeoutError):
+            rendering.render_pdf_pooled(self.data, processes=1, timeout=0.001, output=output)
+        with open(output, 'w') as fallback:
+            fallback.write('fallback')
+
+        # Once the late render has finished, the fallback is still intact
+        rendering.render_pdf_pooled(self.data, processes=1, timeout=60)
+        with open(output, 'rb') as stored:
+            self.assertEqual(stored.read(), b'fallback')
+        # and its partial file has been removed
+        self.assertEqual(os.listdir(os.path.dirname(output)), ['report.pdf'])
+
+    def test_renders_inline_in_a_prefork_worker(self):
+        # Celery prefork children are daemonic and cannot start a pool
+        with billiard.Pool(1) as workers:
+            pdf = workers.apply(render_in_worker, (self.data,))
+        self.assertTrue(pdf.startswith(b'%PDF'))
+
+    def test_pool_start_failure_renders_inline(self):
+        pool = Mock()
+        pool.submit.side_effect = RuntimeError('cannot start new thread')
+        with patch.object(rendering, '_get_pool', return_value=pool), \
+                patch.object(rendering, '_reset_pool') as reset_pool:
+            pdf = rendering.render_pdf_pooled(self.data, processes=1, timeout=60)
+        self.assertTrue(pdf.startswith(b'%PDF'))
+        reset_pool.assert_called_once_with(pool)
+
+
+def render_in_worker(data):
+    return rendering.render_pdf_pooled(data, processes=1, timeout=60)
+
+
+class ReportFileTests(TestCase):
+    def setUp(self):
+        self.manager = User.objects.create_user(email='manager@example.com', password='password', role='manager')
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+
+    def generate(self, report_format):
+        today = str(timezone.localdate())
+        report = Report.objects.create(type='performance_dashboard', format=report_format, user=self.manager,
+                                       parameters={'start_date': today, 'end_date': today})
+        with self.settings(FILE_UPLOAD_TEMP_DIR=self.temp_dir, REPORT_RENDER_PROCESSES=0):
+            generate_report_task.delay(str(report.id))
+        report.refresh_from_db()
+        self.addCleanup(report.result_path.delete, save=False)
+        return report
+
+    def test_rendered_file_is_moved_into_storage(self):
+        with patch('django.core.files.storage.filesystem.file_move_safe', wraps=file_move_safe) as move:
+            report = self.generate('csv')
+        self.assertEqual(report.status, 'generated')
+        move.assert_called_once()
+        with report.result_path.open('rb') as stored:
+            self.assertTrue(stored.read().startswith(b'CFITP ANALYTICS DASHBOARD REPORT'))
+        # The temporary directory is gone once storage has the file
+        self.assertEqual(os.listdir(self.temp_dir), [])
+
+    def test_pdf_and_json_are_written_to_disk(self):
+        with self.generate('pdf').result_path.open('rb') as stored:
+            self.assertTrue(stored.read().startswith(b'%PDF'))
+        with self.generate('json').result_path.open('rb') as stored:
+            self.assertIn('summary', json.load(stored))
+        self.assertEqual(os.listdir(self.temp_dir), [])
+
+
+@override_settings(REPORT_STATUS_POLL_INTERVAL=0.01)
+class ReportProgressTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.manager = User.objects.create_user(email='manager@example.com', password='password', role='manager')
+        self.client.force_authenticate(user=self.manager)
+
+    def test_generation_records_stages(self):
+        stages = []
+        today = str(timezone.localdate())
+        with patch('apps.reports.tasks.advance_report', side_effect=lambda report, stage: stages.append(stage)):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post('/api/v1/reports/', {'type': 'performance_dashboard', 'format': 'csv', 'parameters': {
+                    'start_date': today, 'end_date': today, 'report_type': 'performance_dashboard'
+                }}, format='json')
+
+        self.assertEqual(stages, ['querying', 'rendering', 'storing'])
+        snapshot = ReportProgress.get(response.data['report_id'])
+        self.assertEqual((snapshot['status'], snapshot['progress_stage'], snapshot['progress']), ('generated', 'done', 100))
+
+    def test_status_is_served_from_snapshot_and_long_polls(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            report = Report.objects.create(type='performance_dashboard', user=self.manager, status='processing',
+                                           progress_stage='querying', progress=10)
+        url = f'/api/v1/reports/{report.pk}/status/'
+
+        with self.assertNumQueries(0):
+            data = self.client.get(url).data['data']
+        self.assertEqual((data['progress_stage'], data['progress'], data['task_status']), ('querying', 10, 'STARTED'))
+        self.assertNotIn('user_id', data)
+
+        # Nothing changes: the long-poll times out with the same snapshot
+        start = time.monotonic()
+        same = self.client.get(url, {'wait': 0.2, 'version': data['version']}).data['data']
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
+        self.assertEqual(same['version'], data['version'])
+
+        # A change published meanwhile ends the wait
+        report.progress_stage, report.progress = 'rendering', 50
+        report.updated_at = report.updated_at + timedelta(seconds=1)
+        threading.Timer(0.05, ReportProgress.publish, [report]).start()
+        changed = self.client.get(url, {'wait': 5, 'version': data['version']}).data['data']
+        self.assertEqual((changed['progress_stage'], changed['progress']), ('rendering', 50))
+
+        self.assertEqual(self.client.get(url, {'wait': 'abc'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'wait': 'nan'}).status_code, 400)
+
+        other = User.objects.create_user(email='other@example.com', password='password', role='manager')
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+@override_settings(REPORT_STATUS_POLL_INTERVAL=0.01, REPORT_STATUS_STREAM_KEEPALIVE=0.05)
+class ReportStatusStreamTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.manager = User.objects.create_user(email='manager@example.com', password='password', role='manager')
+        self.token = str(AccessToken.for_user(self.manager))
+        self.report = Report.objects.create(type='performance_dashboard', user=self.manager, status='processing')
+
+    async def test_stream_pushes_changes_until_finished(self):
+        response = await AsyncClient().get(f'/api/v1/reports/{self.report.pk}/stream/?token={self.token}')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertIn(b'retry:', await anext(stream))
+        first = json.loads((await anext(stream)).decode().split('data: ', 1)[1])
+        self.assertEqual(first['status'], 'processing')
+        self.assertEqual(await anext(stream), b': keepalive\n\n')
+
+        self.report.status, self.report.progress_stage, self.report.progress = 'generated', 'done', 100
+        self.report.updated_at = self.report.updated_at + timedelta(seconds=1)
+        ReportProgress.publish(self.report)
+
+        chunk = await anext(stream)
+        while chunk == b': keepalive\n\n':
+            chunk = await anext(stream)
+        self.assertEqual(json.loads(chunk.decode().split('data: ', 1)[1])['progress'], 100)
+        with self.assertRaises(StopAsyncIteration):
+            await anext(stream)
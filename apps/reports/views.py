@@ -4,11 +4,22 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
 from datetime import datetime
-from django.http import HttpResponse, FileResponse
+from django.http import Http404, HttpResponse, FileResponse, JsonResponse, StreamingHttpResponse
+from django.conf import settings
+from django.db.models import Count
+from asgiref.sync import sync_to_async
 import csv
+import json
+import math
 import os
 
+from CFIT.cache import ResultCache
+from apps.feedback.models import Feedback
+from apps.issues.models import Issue
+from apps.users.models import User
+from apps.notifications.views import authenticate_stream_request
 from .models import Report
+from .progress import ReportProgress, TERMINAL_STATUSES
 from .serializers import ReportSerializer
 from apps.users.permissions import IsStaffOrManager
 
@@ -47,27 +58,14 @@ class ReportViewSet(mixins.CreateModelMixin,
             
             report = serializer.instance
             
-            # ✅ REAL CELERY TASK - IMPORT INSIDE FUNCTION TO AVOID CIRCULAR IMPORTS
-            try:
-                # CRITICAL: Import inside the function to avoid circular imports
-                from .tasks import generate_report_task
-                
-                # Start the Celery task asynchronously
-                task = generate_report_task.delay(str(report.id))
-                
-                # Store task ID for reference
-                report.task_id = task.id
-                report.save(update_fields=['task_id', 'updated_at'])
-                
-                logger.info(f"Started Celery task {task.id} for report {report.id}")
-                print(f"✅ [DJANGO VIEW] Celery task started: {task.id} for report {report.id}")
-                
-            except Exception as celery_error:
-                # If Celery fails, mark as failed
-                logger.error(f"Failed to start Celery task: {celery_error}")
-                report.status = 'failed'
-                report.error_message = f"Failed to start background task: {celery_error}"
-                report.save(update_fields=['status', 'error_message', 'updated_at'])
+            # Identical requests reuse a generated file or follow the running task
+            from .services import ReportService
+            deduplicated = ReportService.deduplicate(report)
+            
+            if deduplicated:
+                logger.info(f"Report {report.id} {deduplicated} existing report {report.fingerprint[:12]}")
+            else:
+                self._start_generation(report)
             
             headers = self.get_success_headers(serializer.data)
             return Response({
@@ -75,7 +73,8 @@ class ReportViewSet(mixins.CreateModelMixin,
                 'success': True,
                 'message': 'Report generation started successfully',
                 'task_id': getattr(report, 'task_id', None),
-                'report_id': str(report.id)
+                'report_id': str(report.id),
+                'deduplicated': deduplicated
             }, status=status.HTTP_201_CREATED, headers=headers)
             
         except Exception as e:
@@ -87,6 +86,31 @@ class ReportViewSet(mixins.CreateModelMixin,
                 'message': 'Failed to create report request'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+    def _start_generation(self, report):
+        """Enqueue generate_report_task, marking the report failed if Celery is unavailable"""
+        # ✅ REAL CELERY TASK - IMPORT INSIDE FUNCTION TO AVOID CIRCULAR IMPORTS
+        try:
+            # CRITICAL: Import inside the function to avoid circular imports
+            from .tasks import generate_report_task
+            
+            # Start the Celery task asynchronously
+            task = generate_report_task.delay(str(report.id))
+            
+            # Store task ID for reference
+            report.task_id = task.id
+            report.save(update_fields=['task_id', 'updated_at'])
+            
+            logger.info(f"Started Celery task {task.id} for report {report.id}")
+            print(f"✅ [DJANGO VIEW] Celery task started: {task.id} for report {report.id}")
+            
+        except Exception as celery_error:
+            # If Celery fails, mark as failed
+            logger.error(f"Failed to start Celery task: {celery_error}")
+            report.status = 'failed'
+            report.error_message = f"Failed to start background task: {celery_error}"
+            report.progress_stage = 'failed'
+            report.save(update_fields=['status', 'error_message', 'progress_stage', 'updated_at'])
+    
     @action(detail=False, methods=['get'])
     def analytics(self, request):
         """
@@ -121,21 +145,35 @@ class ReportViewSet(mixins.CreateModelMixin,
             # IMPORT INSIDE FUNCTION to avoid circular imports
             from .services import ReportService
             
-            analytics_data = ReportService.get_analytics_data(
-                start_date=start_date,
-                end_date=end_date,
-                user=request.user,
-                priority_filter=priority,
-                status_filter=status_filter,
-                sla_only=sla_only
+            # Cached until an issue, feedback or staff user changes; results
+            # missing a timed-out or failed block are not cached
+            params = {
+                'start_date': start_date, 'end_date': end_date,
+                'priority': sorted(priority), 'status': sorted(status_filter),
+                'sla_only': sla_only, 'role': request.user.role,
+            }
+            analytics_data, outcome = ResultCache.get_or_compute(
+                'analytics', params,
+                lambda: ReportService.get_analytics_data(
+                    start_date=start_date,
+                    end_date=end_date,
+                    user=request.user,
+                    priority_filter=priority,
+                    status_filter=status_filter,
+                    sla_only=sla_only
+                ),
+                models=[Issue, Feedback, User],
+                cacheable=lambda data: not data['partial']
             )
             
-            return Response({
+            response = Response({
                 'data': analytics_data,
                 'success': True,
                 'message': 'Analytics data retrieved successfully',
                 'generated_at': timezone.now().isoformat()
             })
+            response['X-Cache'] = outcome.upper()
+            return response
             
         except Exception as e:
             logger.error(f"Failed to fetch analytics data: {e}")
@@ -146,53 +184,123 @@ class ReportViewSet(mixins.CreateModelMixin,
                 'message': 'Failed to fetch analytics data'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+    @action(detail=False, methods=['get'])
+    def timeseries(self, request):
+        """
+        Created/resolved/closed issue counts per day, week or month
+        (?granularity=), with the same date and filter parameters as analytics
+        """
+        try:
+            start_date_str = request.query_params.get('start_date')
+            end_date_str = request.query_params.get('end_date')
+            
+            start_date = None
+            end_date = None
+            
+            if start_date_str:
+                start_date = datetime.fromisoformat(start_date_str)
+                if timezone.is_naive(start_date):
+                    start_date = timezone.make_aware(start_date)
+            
+            if end_date_str:
+                end_date = datetime.fromisoformat(end_date_str)
+                if timezone.is_naive(end_date):
+                    end_date = timezone.make_aware(end_date)
+                end_date = end_date.replace(hour=23, minute=59, second=59)
+            
+            granularity = request.query_params.get('granularity', 'day')
+            priority = request.query_params.get('priority', '').split(',') if request.query_params.get('priority') else []
+            status_filter = request.query_params.get('status', '').split(',') if request.query_params.get('status') else []
+            sla_only = request.query_params.get('sla_only', '').lower() == 'true'
+            
+            priority = [p for p in priority if p]
+            status_filter = [s for s in status_filter if s]
+        except ValueError as e:
+            return Response({
+                'data': None,
+                'success': False,
+                'error': str(e),
+                'message': 'Invalid date parameter'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        from .services import TimeSeriesService
+        
+        try:
+            params = {
+                'start_date': start_date, 'end_date': end_date, 'granularity': granularity,
+                'priority': sorted(priority), 'status': sorted(status_filter), 'sla_only': sla_only,
+            }
+            series, outcome = ResultCache.get_or_compute(
+                'timeseries', params,
+                lambda: TimeSeriesService.get_series(
+                    start_date=start_date,
+                    end_date=end_date,
+                    granularity=granularity,
+                    priority_filter=priority,
+                    status_filter=status_filter,
+                    sla_only=sla_only
+                ),
+                models=[Issue]
+            )
+        except ValueError as e:
+            return Response({
+                'data': None,
+                'success': False,
+                'error': str(e),
+                'message': 'Invalid timeseries request'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Failed to fetch timeseries data: {e}")
+            return Response({
+                'data': None,
+                'success': False,
+                'error': str(e),
+                'message': 'Failed to fetch timeseries data'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        
+        response = Response({
+            'data': series,
+            'success': True,
+            'message': 'Timeseries data retrieved successfully'
+        })
+        response['X-Cache'] = outcome.upper()
+        return response
+    
     @action(detail=True, methods=['get'])
     def status(self, request, pk=None):
         """
-        Check the status of a report generation task
+        Report status and progress from the cached snapshot, without touching
+        the database or the Celery result backend. With ?wait=<seconds> and
+        the `version` of the last response, long-polls until the status changes.
+        A long-poll holds a worker, so waits are capped at REPORT_STATUS_MAX_WAIT;
+        clients following a report to completion should use the SSE stream
+        at /api/v1/reports/<id>/stream/ instead
         """
         try:
-            report = self.get_object()
-            
-            # Check if Celery task is still running
-            task_status = 'unknown'
-            if hasattr(report, 'task_id') and report.task_id:
-                try:
-                    # Import inside function to avoid circular imports
-                    from celery.result import AsyncResult
-                    from CFIT.celery import app
-                    
-                    result = AsyncResult(report.task_id, app=app)
-                    task_status = result.status
-                    
-                    # If task failed but report status hasn't been updated
-                    if result.failed() and report.status != 'failed':
-                        report.status = 'failed'
-                        report.error_message = str(result.result)
-                        report.save(update_fields=['status', 'error_message', 'updated_at'])
-                    
-                except Exception as task_error:
-                    task_status = 'unknown'
-                    logger.error(f"Failed to check Celery task status: {task_error}")
+            wait = float(request.query_params.get('wait') or 0)
+            if not math.isfinite(wait):
+                raise ValueError(wait)
+        except ValueError:
+            return Response({
+                'data': None,
+                'success': False,
+                'error': 'wait must be a number of seconds'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        wait = min(max(wait, 0), settings.REPORT_STATUS_MAX_WAIT)
+        
+        try:
+            snapshot = self._status_snapshot(pk)
+            version = request.query_params.get('version')
+            if wait > 0 and version and snapshot['version'] == version:
+                snapshot = ReportProgress.wait(pk, version, wait) or self._status_snapshot(pk)
             
             return Response({
-                'data': {
-                    'id': str(report.id),
-                    'type': report.type,
-                    'type_display': report.get_type_display(),
-                    'format': report.format,
-                    'status': report.status,
-                    'status_display': report.get_status_display(),
-                    'created_at': report.created_at,
-                    'updated_at': report.updated_at,
-                    'result_available': report.status == 'generated' and bool(report.result_path),
-                    'result_path': report.result_path.url if report.result_path else None,
-                    'task_status': task_status,
-                    'error_message': report.error_message
-                },
+                'data': ReportProgress.public(snapshot),
                 'success': True
             })
             
+        except Http404:
+            raise
         except Exception as e:
             logger.error(f"Failed to get report status: {e}")
             return Response({
@@ -201,10 +309,20 @@ class ReportViewSet(mixins.CreateModelMixin,
                 'error': str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+    def _status_snapshot(self, pk):
+        """The user's cached snapshot, loading (and caching) the report on a miss"""
+        snapshot = ReportProgress.get(pk)
+        if snapshot is None or snapshot['user_id'] != str(self.request.user.id):
+            report = self.get_object()
+            ReportProgress.publish(report)
+            snapshot = ReportProgress.snapshot(report)
+        return snapshot
+    
     @action(detail=False, methods=['get'])
     def export(self, request):
         """
         Quick CSV export endpoint for dashboard data - USES REAL DATA
+        With mode=issues, streams every issue in the range instead
         """
         try:
             start_date_str = request.query_params.get('start_date')
@@ -230,6 +348,10 @@ class ReportViewSet(mixins.CreateModelMixin,
             priority = [p for p in priority if p]
             status_filter = [s for s in status_filter if s]
             
+            # mode=issues streams every issue instead of the summary
+            if request.query_params.get('mode') == 'issues':
+                return self._stream_issue_export(request, start_date, end_date, priority, status_filter)
+            
             # ✅ Get REAL data from database
             # IMPORT INSIDE FUNCTION to avoid circular imports
             from .services import ReportService
@@ -305,6 +427,41 @@ class ReportViewSet(mixins.CreateModelMixin,
                 "detail": "CSV export failed"
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+    def _stream_issue_export(self, request, start_date, end_date, priority, status_filter):
+        """
+        Stream one row per issue as CSV (output=csv) or NDJSON (output=ndjson),
+        gzipped when gzip=true
+        """
+        from .services import IssueExportService
+        
+        output = request.query_params.get('output', 'csv').lower()
+        if output not in ('csv', 'ndjson'):
+            return Response({
+                'error': f'Unsupported output "{output}"',
+                'detail': 'Use output=csv or output=ndjson'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        rows = IssueExportService.rows(
+            start_date=start_date,
+            end_date=end_date,
+            priority_filter=priority,
+            status_filter=status_filter,
+            chunk_size=settings.REPORT_EXPORT_CHUNK_SIZE
+        )
+        if output == 'csv':
+            chunks, content_type = IssueExportService.csv_chunks(rows), 'text/csv'
+        else:
+            chunks, content_type = IssueExportService.ndjson_chunks(rows), 'application/x-ndjson'
+        
+        filename = f'cfitp_issues_{timezone.now().strftime("%Y%m%d_%H%M%S")}.{output}'
+        if request.query_params.get('gzip', '').lower() == 'true':
+            chunks, content_type = IssueExportService.gzip_chunks(chunks), 'application/gzip'
+            filename += '.gz'
+        
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+    
     @action(detail=True, methods=['get'])
     def download(self, request, pk=None):
         """
@@ -359,38 +516,19 @@ class ReportViewSet(mixins.CreateModelMixin,
         Quick metrics endpoint using REAL database data
         """
         try:
-            user_reports = Report.objects.filter(user=request.user)
-            
-            # Get active report tasks
-            pending_tasks = user_reports.filter(status='processing').count()
-            
-            metrics_data = {
-                'total_reports': user_reports.count(),
-                'generated_reports': user_reports.filter(status='generated').count(),
-                'processing_reports': pending_tasks,
-                'pending_reports': user_reports.filter(status='pending').count(),
-                'failed_reports': user_reports.filter(status='failed').count(),
-                'recent_reports': ReportSerializer(
-                    user_reports.order_by('-created_at')[:5], 
-                    many=True
-                ).data,
-                'report_types': {
-                    'performance_dashboard': user_reports.filter(type='performance_dashboard').count(),
-                    'team_member_performance': user_reports.filter(type='team_member_performance').count(),
-                    'issue_summary': user_reports.filter(type='issue_summary').count(),
-                },
-                'report_formats': {
-                    'pdf': user_reports.filter(format='pdf').count(),
-                    'csv': user_reports.filter(format='csv').count(),
-                    'xlsx': user_reports.filter(format='xlsx').count(),
-                }
-            }
+            # Cached per user until a report is saved or deleted
+            metrics_data, outcome = ResultCache.get_or_compute(
+                'metrics', {'user': str(request.user.pk)},
+                lambda: self._compute_metrics(request.user), models=[Report]
+            )
             
-            return Response({
+            response = Response({
                 'data': metrics_data,
                 'success': True,
                 'message': 'Metrics retrieved successfully'
             })
+            response['X-Cache'] = outcome.upper()
+            return response
             
         except Exception as e:
             logger.error(f"Failed to fetch metrics: {e}")
@@ -399,4 +537,94 @@ class ReportViewSet(mixins.CreateModelMixin,
                 'success': False,
                 'error': str(e),
                 'message': 'Failed to fetch metrics'
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    def _compute_metrics(self, user):
+        user_reports = Report.objects.filter(user=user)
+        
+        # One grouped pass for every status/type/format count, folded below
+        statuses = dict.fromkeys([value for value, _ in Report.STATUS_CHOICES], 0)
+        report_types = dict.fromkeys(
+            ['team_member_performance', 'issue_summary'] + [value for value, _ in Report.TYPE_CHOICES], 0
+        )
+        report_formats = dict.fromkeys(['xlsx'] + [value for value, _ in Report.FORMAT_CHOICES], 0)
+        total = 0
+        for row in user_reports.order_by().values('status', 'type', 'format').annotate(count=Count('id')):
+            total += row['count']
+            statuses[row['status']] = statuses.get(row['status'], 0) + row['count']
+            report_types[row['type']] = report_types.get(row['type'], 0) + row['count']
+            report_formats[row['format']] = report_formats.get(row['format'], 0) + row['count']
+        
+        metrics_data = {
+            'total_reports': total,
+            'generated_reports': statuses['generated'],
+            'processing_reports': statuses['processing'],
+            'pending_reports': statuses['pending'],
+            'failed_reports': statuses['failed'],
+            'recent_reports': ReportSerializer(
+                user_reports.select_related('user').order_by('-created_at')[:5],
+                many=True
+            ).data,
+            'report_types': report_types,
+            'report_formats': report_formats,
+        }
+        return metrics_data
+    
+    @action(detail=False, methods=['get'], url_path='cache-stats')
+    def cache_stats(self, request):
+        """
+        Hit/miss counters for the cached analytics, timeseries, metrics and attachment stats
+        """
+        return Response({
+            'data': ResultCache.stats(['analytics', 'timeseries', 'metrics', 'attachment_stats']),
+            'success': True
+        })
+
+
+async def report_status_stream(request, pk):
+    """
+    Server-sent events with a report's status: the current snapshot, then
+    one `status` event per change until the report is generated or failed.
+    Authenticates like the notification stream (header or ?token=).
+    Waiting reads the cached snapshot only
+    """
+    user = await authenticate_stream_request(request)
+    if user is None:
+        return JsonResponse({"detail": "Authentication credentials were not provided or are invalid."}, status=401)
+    
+    snapshot = await sync_to_async(_owned_status_snapshot)(pk, user)
+    if snapshot is None:
+        return JsonResponse({"detail": "Not found."}, status=404)
+    
+    response = StreamingHttpResponse(_stream_status(pk, user, snapshot), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Disable proxy buffering (nginx)
+    return response
+
+
+def _owned_status_snapshot(pk, user):
+    snapshot = ReportProgress.get(pk)
+    if snapshot is not None and snapshot['user_id'] == str(user.id):
+        return snapshot
+    report = Report.objects.filter(pk=pk, user=user).first()
+    if report is None:
+        return None
+    ReportProgress.publish(report)
+    return ReportProgress.snapshot(report)
+
+
+async def _stream_status(pk, user, snapshot):
+    yield 'retry: 5000\n\n'
+    yield f'event: status\ndata: {json.dumps(ReportProgress.public(snapshot))}\n\n'
+    while snapshot['status'] not in TERMINAL_STATUSES:
+        latest = await ReportProgress.await_change(pk, snapshot['version'], settings.REPORT_STATUS_STREAM_KEEPALIVE)
+        if latest is None:
+            # Snapshot expired; reload it from the report
+            latest = await sync_to_async(_owned_status_snapshot)(pk, user)
+            if latest is None:
+                return
+        if latest['version'] == snapshot['version'] and latest['status'] == snapshot['status']:
+            yield ': keepalive\n\n'
+            continue
+        snapshot = latest
+        yield f'event: status\ndata: {json.dumps(ReportProgress.public(snapshot))}\n\n'
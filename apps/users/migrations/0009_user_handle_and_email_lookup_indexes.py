@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:25
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+def backfill_handles(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+
+    batch = []
+    for user in User.objects.only('id', 'email').iterator(chunk_size=1000):
+        user.handle = user.email.split('@')[0].lower()
+        batch.append(user)
+        if len(batch) >= 1000:
+            User.objects.bulk_update(batch, ['handle'])
+            batch = []
+    User.objects.bulk_update(batch, ['handle'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0008_remove_user_email_verified_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='handle',
+            field=models.CharField(blank=True, default='', editable=False, max_length=150),
+        ),
+        migrations.RunPython(backfill_handles, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='users_email_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['handle'], name='users_handle_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 import uuid
 from django.conf import settings
@@ -32,6 +33,8 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     email = models.EmailField(unique=True)
+    # Lower-cased local part of the email, used to resolve @mentions
+    handle = models.CharField(max_length=150, blank=True, default='', editable=False)
     
     first_name = models.CharField(max_length=100, blank=True, default='')
     last_name = models.CharField(max_length=100, blank=True, default='')
@@ -63,9 +66,21 @@ class User(AbstractBaseUser, PermissionsMixin):
     class Meta:
         db_table = 'users'
         ordering = ['-date_joined']
+        indexes = [
+            models.Index(Lower('email'), name='users_email_lower_idx'),
+            # varchar_pattern_ops lets Postgres use the index for prefix matches
+            models.Index(fields=['handle'], name='users_handle_idx', opclasses=['varchar_pattern_ops']),
+        ]
 
     def __str__(self):
         return self.email
+
+    def save(self, *args, **kwargs):
+        self.handle = self.email.split('@')[0].lower() if self.email else ''
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'email' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'handle'}
+        super().save(*args, **kwargs)
     
     def get_full_name(self):
         return f"{self.first_name} {self.last_name}".strip() or self.email
@@ -1,3 +1,6 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
 from .models import User
 
 class UserService:
@@ -9,4 +12,50 @@ class UserService:
     def update_profile(user, data):
         user.email = data.get('email', user.email)
         user.save()
-        return user
\ No newline at end of file
+        return user
+
+
+class AudienceService:
+    """
+    Cached IDs of active users per role set, used for notification fan-out.
+    Entries are keyed by a version counter that is bumped whenever user
+    roles or active flags may have changed, so stale lists are never read.
+    """
+    VERSION_KEY = 'users:audience:version'
+
+    @staticmethod
+    def get_user_ids(roles, exclude=None):
+        """Return IDs of active users with any of `roles`, minus `exclude` (a user or ID)."""
+        roles = sorted(set(roles))
+        key = f"users:audience:{AudienceService._version()}:{','.join(roles)}"
+        user_ids = cache.get(key)
+        if user_ids is None:
+            user_ids = list(
+                User.objects.filter(role__in=roles, is_active=True)
+                .order_by('id').values_list('id', flat=True)
+            )
+            cache.set(key, user_ids, settings.AUDIENCE_CACHE_TIMEOUT)
+
+        if exclude is not None:
+            exclude = getattr(exclude, 'pk', exclude)
+            user_ids = [user_id for user_id in user_ids if user_id != exclude]
+        return user_ids
+
+    @staticmethod
+    def invalidate():
+        """Drop every cached audience, now and again once the current transaction commits."""
+        AudienceService._bump_version()
+        transaction.on_commit(AudienceService._bump_version)
+
+    @staticmethod
+    def _version():
+        return cache.get_or_set(AudienceService.VERSION_KEY, 1, None) or 1
+
+    @staticmethod
+    def _bump_version():
+        cache.add(AudienceService.VERSION_KEY, 1, None)
+        try:
+            cache.incr(AudienceService.VERSION_KEY)
+        except ValueError:
+            # Key evicted between add and incr; a fresh version is as good
+            cache.set(AudienceService.VERSION_KEY, 1, None)
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import User
+from .services import AudienceService
+
+# Fields that decide which notification audiences a user belongs to
+AUDIENCE_FIELDS = {'role', 'is_active'}
+
+@receiver(post_save, sender=User)
+def invalidate_audiences_on_save(sender, instance, created, update_fields=None, **kwargs):
+    """Invalidate cached audiences unless the save only touched unrelated fields (e.g. last_login)."""
+    if created or update_fields is None or AUDIENCE_FIELDS & set(update_fields):
+        AudienceService.invalidate()
+
+@receiver(post_delete, sender=User)
+def invalidate_audiences_on_delete(sender, instance, **kwargs):
+    AudienceService.invalidate()
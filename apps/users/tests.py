@@ -1,6 +1,8 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.core.cache import cache
 from rest_framework.test import APIClient
 from .models import User
+from .services import AudienceService
 import uuid
 
 
@@ -28,3 +30,49 @@ class UserTests(TestCase):
             format='json'
         )
         self.assertEqual(response.status_code, 201)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class AudienceServiceTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.manager = User.objects.create_user(email='manager@example.com', password='StrongPass123!', role='manager')
+        self.admin = User.objects.create_user(email='admin@example.com', password='StrongPass123!', role='admin', is_staff=True)
+        User.objects.create_user(email='client@example.com', password='StrongPass123!', role='client')
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_audience_is_served_from_cache(self):
+        self.assertCountEqual(
+            AudienceService.get_user_ids(['manager', 'admin']),
+            [self.manager.id, self.admin.id]
+        )
+        with self.assertNumQueries(0):
+            ids = AudienceService.get_user_ids(['admin', 'manager'], exclude=self.admin)
+        self.assertEqual(ids, [self.manager.id])
+
+    def test_role_and_active_changes_invalidate(self):
+        AudienceService.get_user_ids(['manager', 'admin'])
+
+        self.manager.role = 'client'
+        self.manager.save()
+        self.assertEqual(AudienceService.get_user_ids(['manager', 'admin']), [self.admin.id])
+
+        # last_login updates don't touch audiences and keep the cache warm
+        self.admin.save(update_fields=['last_login'])
+        with self.assertNumQueries(0):
+            AudienceService.get_user_ids(['manager', 'admin'])
+
+    def test_bulk_deactivate_invalidates(self):
+        AudienceService.get_user_ids(['manager', 'admin'])
+        client = APIClient()
+        client.force_authenticate(self.admin)
+
+        response = client.post(
+            '/api/v1/users/admin/users/bulk/',
+            {'user_ids': [str(self.manager.id)], 'action': 'deactivate'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(AudienceService.get_user_ids(['manager', 'admin']), [self.admin.id])
@@ -21,6 +21,7 @@ from .serializers import (
     ChangePasswordSerializer,
     AdminCreateUserSerializer
 )
+from .services import AudienceService
 
 User = get_user_model()
 
@@ -546,6 +547,9 @@ class UserViewSet(viewsets.ModelViewSet):
                 users.delete()
                 message = f"Deleted {count} users"
             
+            # queryset.update() bypasses post_save, so drop cached audiences here
+            AudienceService.invalidate()
+            
             return Response({"detail": message})
             
         except Exception as e: